@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,6 +32,7 @@ CORS_ALLOWED_ORIGINS = [
   "http://localhost:3000",
   "http://127.0.0.1:3000",
 ]
+CORS_EXPOSE_HEADERS = ['Link']   # next-page cursor on /nubuzz/fetch-news/
 
 # Application definition
 
@@ -50,11 +53,19 @@ INSTALLED_APPS = [
 ]
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Bearer JWTs are checked without touching the DB; DRF tokens resolve
+    # through the cache (see nubuzz/authentication.py).
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
+        'nubuzz.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
 }
 MIDDLEWARE = [
+    'nubuzz.metrics.MetricsMiddleware',          # first, so it times everything below
     'corsheaders.middleware.CorsMiddleware',    # must be *above* CommonMiddleware
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -89,15 +100,94 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+#
+# SQLite by default; DB_ENGINE=postgres for production. `manage.py bench_db`
+# measures concurrent reads and ingest writes under either.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# writer instead of waiting on its lock; synchronous=NORMAL only fsyncs at
+# checkpoints (still crash-safe in WAL mode); mmap serves reads from the page
+# cache; busy_timeout makes a second writer wait its turn instead of failing.
+# auto_vacuum is deliberately not here: setting it takes the write lock
+# even when unchanged (see migration 0017 / `archive_articles --full-vacuum`).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous':  'NORMAL',
+    'mmap_size':    256 * 2**20,
+    'cache_size':   -32 * 2**10,   # KiB, i.e. 32 MiB per connection
+    'temp_store':   'MEMORY',
+    'busy_timeout': 10_000,        # ms
+}
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get('POSTGRES_DB', 'nubuzz'),
+            "USER": os.environ.get('POSTGRES_USER', 'nubuzz'),
+            "PASSWORD": os.environ.get('POSTGRES_PASSWORD', ''),
+            "HOST": os.environ.get('POSTGRES_HOST', 'localhost'),
+            "PORT": os.environ.get('POSTGRES_PORT', '5432'),
+            # psycopg's connection pool (psycopg[pool]): connections outlive
+            # requests and, unlike CONN_MAX_AGE, are safe under ASGI.
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.environ.get('POSTGRES_POOL_MIN', 2)),
+                    "max_size": int(os.environ.get('POSTGRES_POOL_MAX', 20)),
+                    "timeout":  10,
+                },
+            },
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {
+                "init_command": ';'.join(f'PRAGMA {k}={v}' for k, v in SQLITE_PRAGMAS.items()),
+                # Take the write lock when a transaction starts, so a
+                # read-then-write block waits in busy_timeout rather than
+                # failing with "database is locked" when it upgrades.
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# The feed cache is invalidated by a generation counter that ingestion and
+# the summarizer worker bump. Those run in other processes, so in production
+# point this at a shared backend (Redis / Memcached); local memory is only
+# coherent within one process and relies on FEED_CACHE_TIMEOUT to expire.
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
+FEED_CACHE_ALIAS   = 'default'
+FEED_CACHE_TIMEOUT = 60          # seconds
+
+# Token → user resolutions. Logout evicts them, so with several processes
+# this must be the shared cache too.
+AUTH_TOKEN_CACHE_ALIAS   = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 5 * 60   # seconds
+
+
+# JWTs (/api/token/). Access tokens are validated statelessly, so a
+# deactivated user keeps access until theirs expires: keep it short.
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME':  timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -139,3 +229,146 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Feed pagination (keyset over published_at, id)
+
+NEWS_PAGE_SIZE     = 100
+NEWS_MAX_PAGE_SIZE = 500
+
+SEARCH_PAGE_SIZE     = 20
+SEARCH_MAX_PAGE_SIZE = 100
+NDJSON_CHUNK_SIZE    = 2000      # rows fetched and encoded per chunk of a ?format=ndjson export
+
+
+# NewsAPI ingestion (see `manage.py ingest_news`)
+
+NEWS_API_KEY  = os.environ.get('NEWS_API_KEY', '15866422dea04a8b85fc0ae163cdca13')
+NEWS_API_URL  = os.environ.get('NEWS_API_URL', 'https://newsapi.org/v2')
+NEWS_API_COUNTRY   = 'us'
+NEWS_API_PAGE_SIZE = 100
+NEWS_API_TIMEOUT   = 5
+
+NEWS_API_MAX_CONNECTIONS = 10    # shared keep-alive pool for concurrent refreshes
+NEWS_API_PER_HOST_LIMIT  = 8     # in-flight requests per upstream host
+
+NEWS_API_CATEGORIES    = []      # empty → all NewsAPI categories
+NEWS_API_POLL_INTERVAL = 15 * 60 # seconds between polls of one category
+NEWS_API_POLL_JITTER   = 0.1     # ± fraction applied to every delay
+NEWS_API_MAX_BACKOFF   = 60 * 60 # cap on the failure backoff, in seconds
+
+NEWS_FETCH_ON_MISS = True        # a never-ingested category feed is fetched on first read
+
+# Upstream quota (nubuzz/quota.py). Every NewsAPI call, scheduled or on a
+# feed miss, spends from the daily budget; set it to your plan's allowance.
+# Feed-miss fetches are also token-bucket limited per client IP and overall
+# (rate in calls/second, burst = bucket size). Counters live in this cache,
+# which must be shared across processes for the limits to be global.
+NEWS_API_DAILY_BUDGET = int(os.environ.get('NEWS_API_DAILY_BUDGET', 1000))
+UPSTREAM_IP_RATE      = 1 / 60
+UPSTREAM_IP_BURST     = 3
+UPSTREAM_GLOBAL_RATE  = 1 / 6
+UPSTREAM_GLOBAL_BURST = 10
+QUOTA_CACHE_ALIAS     = 'default'
+
+
+# Live headline stream (see nubuzz/live.py; needs the ASGI server)
+
+LIVE_POLL_INTERVAL = 1           # seconds between checks for new rows, per process
+LIVE_OVERLAP       = 30          # seconds a transaction may commit after a later id and still be sent
+LIVE_KEEPALIVE     = 15          # seconds of silence before a keepalive comment
+LIVE_RETRY         = 5           # seconds a disconnected client waits before reconnecting
+LIVE_QUEUE_SIZE    = 500         # events buffered per client before it is cut off
+LIVE_BACKLOG       = 200         # missed stories replayed to a reconnecting client
+
+
+# Near-duplicate story clustering at ingest (see nubuzz/dedupe.py)
+
+DEDUPE_ON_INGEST    = True
+DEDUPE_NUM_PERM     = 128        # MinHash slots per article (512 bytes stored)
+DEDUPE_BANDS        = 42         # LSH bands of 3 rows: 94% of pairs at 0.4 Jaccard become candidates
+DEDUPE_THRESHOLD    = 0.4        # estimated Jaccard needed to call it the same story
+DEDUPE_WINDOW_HOURS = 72         # how far back new articles are compared
+
+
+# Sentiment / location enrichment (see nubuzz/enrich.py and
+# `manage.py enrich_articles` for backfills)
+
+ENRICH_ON_INGEST  = True
+ENRICH_BATCH_SIZE = 2000
+
+
+# Related articles (see nubuzz/embeddings.py and `manage.py embed_articles`)
+
+EMBEDDING_MODEL      = os.environ.get('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+EMBEDDING_DIR        = os.environ.get('EMBEDDING_DIR', str(BASE_DIR / 'embeddings'))
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_TRAIN_MIN  = 10_000    # below this, lookups scan every vector exactly
+EMBEDDING_NLIST      = None      # IVF lists; None → sqrt(rows) at training time
+EMBEDDING_NPROBE     = 16        # lists scanned per lookup
+RELATED_SIZE         = 10
+RELATED_MAX_SIZE     = 50
+
+
+# Image proxy (see nubuzz/thumbnails.py): /nubuzz/img/... serves WebP
+# renditions of url_to_image at these widths, cached on local disk.
+# THUMBNAIL_BASE_URL is prefixed to the URLs in API responses: a CDN in
+# front of the proxy, or this server's origin for a frontend served
+# elsewhere; empty → root-relative URLs.
+
+THUMBNAIL_DIR              = os.environ.get('THUMBNAIL_DIR', str(BASE_DIR / 'thumbnails'))
+THUMBNAIL_BASE_URL         = os.environ.get('THUMBNAIL_BASE_URL', '')
+THUMBNAIL_WIDTHS           = [160, 320, 640]
+THUMBNAIL_QUALITY          = 80          # WebP quality, 0-100
+THUMBNAIL_CACHE_MAX_BYTES  = 512 * 1024 * 1024
+THUMBNAIL_CACHE_LOW_WATER  = 0.9         # eviction trims to this fraction of the cap
+THUMBNAIL_MAX_SOURCE_BYTES = 20 * 1024 * 1024
+THUMBNAIL_FETCH_TIMEOUT    = 5
+THUMBNAIL_FAILURE_TTL      = 10 * 60     # seconds a broken image is answered 404 without refetching
+THUMBNAIL_CACHE_ALIAS      = 'default'   # where those failures are remembered
+
+
+# Retention (see nubuzz/archive.py and `manage.py archive_articles`):
+# older articles move to a compressed archive table, still readable by id
+# at /api/news/<id>/ and by url at /api/news/lookup/?url=.
+
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_CODEC      = 'zstd'          # needs the zstandard package; zlib otherwise
+
+
+# Request metrics (see nubuzz/metrics.py), scraped from /metrics. Requests
+# slower than the threshold are logged with their breakdown on the
+# `nubuzz.slow` logger (None turns that off). An empty allowlist leaves
+# /metrics open; set METRICS_ALLOWED_IPS to the scrapers' addresses.
+
+METRICS_SLOW_REQUEST_SECONDS = 1.0
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
+
+
+# Personal feeds (see nubuzz/personalize.py). Boosts are in minutes of
+# recency: a story in a followed category ranks as if published 12h later.
+
+PERSONAL_FEED_SIZE           = 200
+PERSONAL_FEED_CATEGORY_BOOST = 12 * 60
+PERSONAL_FEED_LOCATION_BOOST = 6 * 60
+
+
+# Batch summarizer (see `manage.py summarize_worker`)
+
+SUMMARIZER_MODEL      = os.environ.get('SUMMARIZER_MODEL') or None  # None → pipeline default
+SUMMARIZER_BATCH_SIZE = 8
+SUMMARIZER_MAX_LENGTH = 50
+SUMMARIZER_MIN_LENGTH = 25
+SUMMARIZER_IDLE_SLEEP = 2        # seconds the worker waits when the queue is empty
+SUMMARIZER_CLAIM_TIMEOUT = 10 * 60  # seconds before a running job is presumed lost and reclaimed
+SUMMARIZER_CORES_PER_PROCESS = 2 # torch threads per model process; one model per N cores
+
+SUMMARIZE_ON_INGEST        = True          # queue every newly ingested article
+SUMMARIZER_CATEGORY_BOOST  = 6 * 60        # minutes of recency a fully popular category is worth
+SUMMARIZER_ON_DEMAND_BOOST = 7 * 24 * 60   # minutes; readers waiting jump the ingest backlog
+SUMMARIZER_CPU_SHARE       = 0.5           # max fraction of its cores the worker keeps busy
+SUMMARIZER_NICE            = 10            # model processes run at lower OS priority
+
+SUMMARY_MAX_WAIT      = 30       # cap on /summary/<id>/?wait=<seconds> long-polls
+SUMMARY_POLL_INTERVAL = 0.5      # seconds between status checks for long-polling readers
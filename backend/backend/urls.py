@@ -2,7 +2,9 @@
 from django.contrib import admin
 from django.urls import path,include
 from django.http import JsonResponse
+from nubuzz.metrics import metrics_view
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('nubuzz/', include('nubuzz.urls'))
+    path('nubuzz/', include('nubuzz.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,195 @@
+# nubuzz/archive.py
+#
+# Retention: articles older than ARCHIVE_AFTER_DAYS move from the hot
+# Article table into ArchivedArticle. There each row is its id, url and
+# publication time plus one compressed JSON blob of everything else, so
+# feed scans, indexes and backups only carry recent stories while old
+# ones stay readable by id or url. Deleting from the hot table leaves free
+# pages behind; `reclaim_space` hands them back to the filesystem.
+
+import json
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .feedcache import bump_generation
+from .models import Article, ArchivedArticle
+from .personalize import add_to_feeds
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 10
+
+# Columns kept in the blob. id, url and published_at are real columns of
+# the archive; minhash and the content / enrichment hashes only matter to
+# ingest-time dedupe and re-enrichment, which never see archived rows.
+PAYLOAD_FIELDS = [
+    'source_id', 'source_name', 'author', 'title', 'description', 'content',
+    'url_to_image', 'category', 'sentiment', 'location', 'summarize_article',
+    'duplicate_of_id',
+]
+
+
+def archive_codec():
+    """ARCHIVE_CODEC, falling back to zlib when zstandard isn't installed."""
+    if settings.ARCHIVE_CODEC == ArchivedArticle.ZSTD and zstandard is not None:
+        return ArchivedArticle.ZSTD
+    return ArchivedArticle.ZLIB
+
+
+def compress(data, codec):
+    if codec == ArchivedArticle.ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data, codec):
+    if codec == ArchivedArticle.ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Archived article is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def promote_copies(head_ids, leaving):
+    """
+    For each story head about to be archived, make its earliest copy that
+    stays behind the new head and point the story's other copies at it.
+    Left to SET_NULL, every remaining copy would turn into a head of its own
+    and the story would show up once per copy. Returns the promoted ids.
+    """
+    copies = (
+        Article.objects.filter(duplicate_of_id__in=head_ids).exclude(id__in=leaving)
+        .order_by('published_at', 'id').values_list('id', 'duplicate_of_id')
+    )
+    promoted = {}
+    for pk, head in copies:
+        promoted.setdefault(head, pk)
+    for head, pk in promoted.items():
+        others = Article.objects.filter(duplicate_of_id=head).exclude(id__in=[pk, *leaving])
+        others.update(duplicate_of_id=pk)
+        Article.objects.filter(id=pk).update(duplicate_of_id=None)
+    return list(promoted.values())
+
+
+def archive_articles(before=None, batch_size=None):
+    """
+    Move every article published before `before` (default: ARCHIVE_AFTER_DAYS
+    ago) into the archive, oldest first, one transaction per batch. The
+    hot rows' feed entries and summary jobs go with them; the earliest
+    remaining copy of an archived story becomes its head. A url that is
+    already archived keeps its archived copy.
+    Returns the number of articles archived.
+    """
+    before = before or timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    codec = archive_codec()
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Article.objects.filter(published_at__lt=before)
+                .order_by('published_at', 'id')
+                .values('id', 'url', 'published_at', *PAYLOAD_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            # A url archived before ingest learned to skip archived stories
+            # may have come back as a new hot row; the archived copy (and
+            # the id readers know it by) is kept and the hot one dropped.
+            ArchivedArticle.objects.bulk_create([
+                ArchivedArticle(
+                    id=row['id'], url=row['url'], published_at=row['published_at'], codec=codec,
+                    payload=compress(json.dumps({f: row[f] for f in PAYLOAD_FIELDS}).encode(), codec),
+                )
+                for row in rows
+            ], ignore_conflicts=True)
+            ids = [row['id'] for row in rows]
+            heads = [row['id'] for row in rows if row['duplicate_of_id'] is None]
+            promoted = promote_copies(heads, ids)
+            Article.objects.filter(id__in=ids).delete()
+            add_to_feeds(promoted)
+            bump_generation()
+        archived += len(rows)
+    return archived
+
+
+def restore(archived):
+    """An unsaved Article rebuilt from an ArchivedArticle."""
+    fields = json.loads(decompress(bytes(archived.payload), archived.codec))
+    return Article(id=archived.id, url=archived.url, published_at=archived.published_at, **fields)
+
+
+def find_article(pk=None, url=None):
+    """
+    The article with this id or url, hot or archived, or None. Archived
+    ones come back as unsaved Article instances with `archived = True`.
+    """
+    lookup = {'pk': pk} if pk is not None else {'url': url}
+    article = Article.objects.filter(**lookup).first()
+    if article is not None:
+        article.archived = False
+        return article
+    archived = ArchivedArticle.objects.filter(**lookup).first()
+    if archived is None:
+        return None
+    article = restore(archived)
+    article.archived = True
+    return article
+
+
+def database_size():
+    """Bytes in use by the database file (SQLite), or None elsewhere."""
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+
+
+def incremental_vacuum_enabled():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum')
+        return cursor.fetchone()[0] == 2
+
+
+def reclaim_space(pages=None, full=False):
+    """
+    Return pages freed by archiving to the filesystem.
+
+    SQLite: `PRAGMA incremental_vacuum` releases up to `pages` free pages
+    (all of them by default) without rewriting the file. That needs
+    auto_vacuum=INCREMENTAL, which migration 0017 sets on a new database;
+    an older one is converted by a single full VACUUM (`full=True`), which
+    rewrites the whole file under an exclusive lock. Returns False if the
+    database still needs that conversion.
+
+    PostgreSQL: VACUUM ANALYZE of the article table, making the dead rows'
+    space reusable; the file itself only shrinks with VACUUM FULL.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'VACUUM ANALYZE {Article._meta.db_table}')
+            return True
+        if connection.vendor != 'sqlite':
+            return True
+        if not incremental_vacuum_enabled():
+            if not full:
+                return False
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+    # The sqlite3 module steps a statement without result columns once,
+    # and each step of incremental_vacuum frees a single page; a script is
+    # run to completion.
+    limit = '' if pages is None else f'({int(pages)})'
+    connection.connection.executescript(f'PRAGMA incremental_vacuum{limit}; PRAGMA wal_checkpoint(TRUNCATE);')
+    return True
@@ -0,0 +1,96 @@
+# nubuzz/authentication.py
+#
+# Request authentication without a DB round trip on the hot path:
+#
+#   Authorization: Bearer <jwt>   signature + expiry check only; request.user
+#                                 is a TokenUser carrying the id claim
+#                                 (simplejwt's JWTStatelessUserAuthentication)
+#   Authorization: Token <key>    DRF token, resolved once and then served
+#                                 from the cache until logout, a change to
+#                                 the user, or AUTH_TOKEN_CACHE_TIMEOUT
+
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def token_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_cache_key(key):
+    # Hashed, so raw credentials never sit in a shared cache.
+    return 'auth:token:' + token_digest(key)
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_tokens(keys, user_id=None):
+    """
+    Drop cached resolutions, e.g. on logout or when the user changes.
+    Deferred to commit, like bump_generation, so the eviction follows the
+    change it reflects; AUTH_TOKEN_CACHE_TIMEOUT bounds anything a request
+    racing it manages to re-cache.
+    """
+    keys = [token_cache_key(key) for key in keys]
+    if user_id is not None:
+        keys.append(user_cache_key(user_id))
+    if keys:
+        transaction.on_commit(lambda: token_cache().delete_many(keys))
+
+
+def cached_user(user_id):
+    """
+    The user with this id, or None. Cached without its password hash: the
+    field is deferred, so it is neither pickled nor written back by a save.
+    """
+    cache = token_cache()
+    user = cache.get(user_cache_key(user_id))
+    if user is None:
+        user = get_user_model().objects.defer('password').filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(user_cache_key(user_id), user, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication whose token → user lookup (a token / user join) is
+    cached as the user id and a hash of the key; the user itself is cached
+    apart, without its password. Invalidation is signal-driven (see
+    signals.py): deleting a token or saving its user evicts them, so logout
+    and deactivation take effect on the next request.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = token_cache()
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, (user.pk, token_digest(key)), settings.AUTH_TOKEN_CACHE_TIMEOUT)
+            return user, token
+
+        user_id, digest = cached
+        if not hmac.compare_digest(digest, token_digest(key)):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        user = cached_user(user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # Unsaved: request.auth carries the key, as with DRF's own lookup.
+        return user, Token(key=key, user=user)
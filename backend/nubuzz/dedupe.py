@@ -0,0 +1,235 @@
+# nubuzz/dedupe.py
+#
+# Near-duplicate story detection: MinHash signatures over title+description
+# shingles, banded LSH to find candidate pairs without comparing every pair,
+# and a signature-agreement check to confirm them.
+
+import re
+import zlib
+from bisect import bisect_left
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .feedcache import bump_generation
+from .models import Article
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+MAX_HASH = np.uint32((1 << 32) - 1)
+SHIFT = np.uint64(32)
+
+# Docs per vectorized chunk; bounds the (shingles × num_perm) work array.
+CHUNK = 2000
+
+# Earlier bucket members each new row is compared with. Real buckets hold a
+# handful of copies of one story; the cap only stops a degenerate bucket
+# (say, many empty descriptions) from going quadratic.
+MAX_BUCKET_PAIRS = 32
+
+
+def shingles(text, size):
+    """Hashed word n-grams of `text` (falls back to single words for short text)."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < size:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {zlib.crc32(g.encode('utf-8')) for g in grams}
+
+
+class MinHasher:
+    """
+    Vectorized MinHash: for a batch of texts, every shingle hash is pushed
+    through `num_perm` multiply-shift hash functions at once (uint64
+    arithmetic wraps, the high 32 bits are kept) and the per-document
+    minimum taken with one np.minimum.reduceat per chunk. Shingles run
+    along the contiguous axis so the reduction streams through memory.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=2, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self.b = rng.randint(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64)
+
+    def signatures(self, texts):
+        """(len(texts), num_perm) uint32 array; empty texts get an all-max row."""
+        out = np.full((len(texts), self.num_perm), MAX_HASH, dtype=np.uint32)
+        for start in range(0, len(texts), CHUNK):
+            sets = [shingles(t, self.shingle_size) for t in texts[start:start + CHUNK]]
+            lengths = np.fromiter((len(s) for s in sets), dtype=np.int64, count=len(sets))
+            nonempty = lengths > 0
+            if not nonempty.any():
+                continue
+            hashes = np.fromiter((h for s in sets for h in s), dtype=np.uint64, count=int(lengths.sum()))
+            offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+            permuted = ((self.a * hashes + self.b) >> SHIFT).astype(np.uint32)
+            out[start + np.flatnonzero(nonempty)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        return out
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: fraction of agreeing MinHash slots."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def band_hashes(signatures, bands):
+    """(n, bands) uint64: each band's rows folded into one bucket key."""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    sig = signatures[:, :bands * rows].astype(np.uint64).reshape(n, bands, rows)
+    coeffs = (np.uint64(1000003) ** np.arange(rows, dtype=np.uint64)).astype(np.uint64)
+    return (sig * coeffs).sum(axis=2, dtype=np.uint64)
+
+
+def candidate_pairs(signatures, bands, first_new=0):
+    """
+    Pairs (i, j), i < j, that share a bucket in at least one band. Rows
+    are sorted by bucket once per band and each member is paired with up
+    to MAX_BUCKET_PAIRS members before it, so two copies of a story meet
+    even when the bucket's first row is a different story, and the cost
+    stays O(n log n) per band rather than O(n²) overall. Only pairs with
+    j >= `first_new` are produced, so incremental runs skip buckets that
+    hold already-clustered rows alone.
+    """
+    keys = band_hashes(signatures, bands)
+    pairs = set()
+    for band in range(bands):
+        column = keys[:, band]
+        order = np.argsort(column, kind='stable')
+        sorted_keys = column[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        sizes = np.diff(np.concatenate((starts, [len(order)])))
+        wanted = (sizes > 1) & (np.maximum.reduceat(order, starts) >= first_new)
+        for start, size in zip(starts[wanted], sizes[wanted]):
+            members = np.sort(order[start:start + size]).tolist()
+            for k in range(max(1, bisect_left(members, first_new)), size):
+                pairs.update((i, members[k]) for i in members[max(0, k - MAX_BUCKET_PAIRS):k])
+    return pairs
+
+
+def cluster(signatures, bands, threshold, first_new=0):
+    """
+    Union-find over verified candidate pairs. Returns an array mapping each
+    row to the lowest row index in its cluster. Rows before `first_new` are
+    treated as already clustered: they are only compared with newer rows.
+    """
+    parent = list(range(len(signatures)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in candidate_pairs(signatures, bands, first_new):
+        if similarity(signatures[i], signatures[j]) >= threshold:
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+    return np.array([find(i) for i in range(len(signatures))])
+
+
+def get_hasher():
+    if not hasattr(get_hasher, 'hasher'):
+        get_hasher.hasher = MinHasher(num_perm=settings.DEDUPE_NUM_PERM)
+    return get_hasher.hasher
+
+
+def story_text(title, description):
+    return f"{title} {description}"
+
+
+def story_signatures(rows):
+    """
+    Signature bytes (Article.minhash) for normalized article rows, so
+    ingest can store them with the insert instead of updating every new
+    row afterwards.
+    """
+    sigs = get_hasher().signatures([story_text(r['title'], r['description']) for r in rows])
+    return [sig.tobytes() for sig in sigs]
+
+
+def cluster_new_articles(article_ids):
+    """
+    Ingest stage: link each newly stored near-duplicate to the first article
+    of its story through Article.duplicate_of. Signatures stored with the
+    insert (see story_signatures) are reused; missing ones are computed.
+    New articles are compared against each other and against everything
+    published within DEDUPE_WINDOW_HOURS of them (wire copies appear
+    together), so the index stays small however large the table gets.
+    Returns the number of articles marked as duplicates.
+    """
+    new = list(
+        Article.objects.filter(id__in=article_ids)
+        .order_by('id').values('id', 'title', 'description', 'published_at', 'minhash')
+    )
+    if not new:
+        return 0
+    hasher = get_hasher()
+    unsigned = [a for a in new if a['minhash'] is None]
+    for art, sig in zip(unsigned, story_signatures(unsigned)):
+        art['minhash'] = sig
+    new_sigs = np.frombuffer(b''.join(bytes(a['minhash']) for a in new), dtype=np.uint32)
+    new_sigs = new_sigs.reshape(len(new), hasher.num_perm)
+
+    window = timedelta(hours=settings.DEDUPE_WINDOW_HOURS)
+    oldest = min(a['published_at'] for a in new) - window
+    existing = list(
+        Article.objects.filter(published_at__gte=oldest, minhash__isnull=False)
+        .exclude(id__in=article_ids)
+        .order_by('id').values_list('id', 'duplicate_of_id', 'minhash')
+    )
+    old_sigs = np.frombuffer(b''.join(m for _, _, m in existing), dtype=np.uint32)
+    old_sigs = old_sigs.reshape(len(existing), hasher.num_perm)
+
+    # Existing rows first (lower ids), so a story's head is always its
+    # earliest stored article and is never reassigned.
+    ids = [pk for pk, _, _ in existing] + [a['id'] for a in new]
+    heads = [head or pk for pk, head, _ in existing] + [a['id'] for a in new]
+    roots = cluster(
+        np.vstack([old_sigs, new_sigs]), settings.DEDUPE_BANDS, settings.DEDUPE_THRESHOLD,
+        first_new=len(existing),
+    )
+
+    # Only rows that gained a head or a signature are written; a
+    # bulk_update over every new row dominated the cost of ingest.
+    duplicates = []
+    for offset, art in enumerate(new):
+        row = len(existing) + offset
+        head = heads[roots[row]]
+        if head != ids[row]:
+            duplicates.append(Article(id=art['id'], duplicate_of_id=head))
+    with transaction.atomic():
+        Article.objects.bulk_update(
+            [Article(id=a['id'], minhash=a['minhash']) for a in unsigned], ['minhash'], batch_size=500,
+        )
+        Article.objects.bulk_update(duplicates, ['duplicate_of'], batch_size=500)
+    return len(duplicates)
+
+
+def cluster_unsigned_articles(batch_size=CHUNK):
+    """
+    Backfill for rows stored before clustering existed (or with
+    DEDUPE_ON_INGEST off): sign and cluster every article without a
+    signature, oldest first, so each story's head stays its earliest row.
+    Returns the number marked as duplicates.
+    """
+    marked, last_id = 0, 0
+    while True:
+        ids = list(
+            Article.objects.filter(minhash__isnull=True, id__gt=last_id)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return marked
+        with transaction.atomic():
+            found = cluster_new_articles(ids)
+            if found:
+                bump_generation()
+        marked += found
+        last_id = ids[-1]
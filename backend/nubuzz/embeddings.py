@@ -0,0 +1,271 @@
+# nubuzz/embeddings.py
+#
+# "Related coverage": sentence embeddings of title+description from a small
+# local model, stored as an append-only float16 memmap keyed by article id,
+# and searched through an IVF (inverted-file) index — spherical k-means
+# centroids, each vector filed under its nearest one, queries scanning only
+# the `nprobe` closest lists.
+#
+# Files in EMBEDDING_DIR (one writer: `manage.py embed_articles`; any number
+# of readers, which pick up appended rows on their next lookup):
+#
+#   vectors.f16     rows × dim float16, L2-normalized
+#   lists.i32       IVF list of every row (-1 before the index is trained)
+#   ids.i64         article id of every row, ascending; its length is the
+#                   committed row count, so it is written last
+#   centroids.npy   nlist × dim float32 (absent until trained)
+#
+# Rows are never rewritten. An article whose title or description changes
+# after it was embedded keeps its first vector, and an archived or deleted
+# article keeps its row. `embed_articles --retrain` compacts the IVF lists,
+# filing those dead rows under no list so lookups stop scanning them; the
+# bytes they take stay in the files.
+
+import json
+import os
+
+import numpy as np
+from django.conf import settings
+
+from .models import Article
+
+VECTORS, LISTS, IDS, CENTROIDS, META = 'vectors.f16', 'lists.i32', 'ids.i64', 'centroids.npy', 'meta.json'
+
+# Rows per chunk when assigning vectors to centroids; bounds the
+# (chunk × nlist) score matrix.
+ASSIGN_CHUNK = 20_000
+
+
+def get_embedder():
+    """
+    Lazy-loaded (tokenizer, model) pair, one per process; transformers is
+    imported here so web workers never pay for it.
+    """
+    if not hasattr(get_embedder, 'model'):
+        from transformers import AutoModel, AutoTokenizer
+        get_embedder.tokenizer = AutoTokenizer.from_pretrained(settings.EMBEDDING_MODEL)
+        get_embedder.model = AutoModel.from_pretrained(settings.EMBEDDING_MODEL).eval()
+    return get_embedder.tokenizer, get_embedder.model
+
+
+def embed_texts(texts):
+    """Mean-pooled, L2-normalized embeddings as a (len(texts), dim) float16 array."""
+    import torch
+
+    tokenizer, model = get_embedder()
+    out = []
+    for start in range(0, len(texts), settings.EMBEDDING_BATCH_SIZE):
+        batch = tokenizer(
+            list(texts[start:start + settings.EMBEDDING_BATCH_SIZE]),
+            padding=True, truncation=True, max_length=128, return_tensors='pt',
+        )
+        with torch.inference_mode():
+            hidden = model(**batch).last_hidden_state
+        mask = batch['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1)
+        out.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+    if not out:
+        return np.zeros((0, 0), dtype=np.float16)
+    return np.concatenate(out).astype(np.float16)
+
+
+def spherical_kmeans(vectors, nlist, iterations=10, seed=0):
+    """Centroids (unit length) maximizing cosine similarity to their members."""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        empty = ~sums.any(axis=1)
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+    return centroids
+
+
+def assign(vectors, centroids):
+    """Nearest centroid of every vector, in bounded chunks."""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK], dtype=np.float32)
+        labels[start:start + len(chunk)] = (chunk @ centroids.T).argmax(axis=1)
+    return labels
+
+
+class EmbeddingIndex:
+    """
+    Reader/writer for one EMBEDDING_DIR. `refresh()` is a couple of stat()
+    calls and only maps new rows when the writer has appended some.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dim = None
+        self.count = 0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, 0), dtype=np.float16)
+        self.centroids = None
+        self.centroids_mtime = None
+        self.lists = []         # IVF list → array of rows
+        self.pending = []       # per list, rows appended since the last concatenate
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    # ── reading ────────────────────────────────────────────────────────────
+
+    def refresh(self):
+        try:
+            with open(self.file(META)) as f:
+                self.dim = json.load(f)['dim']
+        except FileNotFoundError:
+            return self
+        mtime = os.stat(self.file(CENTROIDS)).st_mtime_ns if os.path.exists(self.file(CENTROIDS)) else None
+        if mtime != self.centroids_mtime:
+            self.centroids = np.load(self.file(CENTROIDS)) if mtime else None
+            self.centroids_mtime = mtime
+            self.count = 0      # re-file every row under the new centroids
+        count = os.path.getsize(self.file(IDS)) // 8
+        if count != self.count:
+            self.load_rows(count)
+        return self
+
+    def load_rows(self, count):
+        self.ids = np.memmap(self.file(IDS), dtype=np.int64, mode='r', shape=(count,))
+        self.vectors = np.memmap(self.file(VECTORS), dtype=np.float16, mode='r', shape=(count, self.dim))
+        if self.centroids is None:
+            self.count = count
+            return
+        lists = np.memmap(self.file(LISTS), dtype=np.int32, mode='r', shape=(count,))
+        if self.count == 0:
+            order = np.argsort(lists, kind='stable')
+            bounds = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+            self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+            self.pending = [[] for _ in self.centroids]
+        else:
+            new = np.arange(self.count, count)
+            for row, label in zip(new.tolist(), np.asarray(lists[self.count:count]).tolist()):
+                self.pending[label].append(row)
+        self.count = count
+
+    def row_of(self, article_id):
+        row = int(np.searchsorted(self.ids, article_id))
+        return row if row < self.count and self.ids[row] == article_id else None
+
+    def candidates(self, query, nprobe):
+        """Rows to score exactly: all of them, or the `nprobe` nearest IVF lists."""
+        if self.centroids is None:
+            return np.arange(self.count)
+        probe = np.argsort(self.centroids @ query)[::-1][:nprobe]
+        parts = []
+        for label in probe.tolist():
+            if self.pending[label]:
+                self.lists[label] = np.concatenate([self.lists[label], self.pending[label]]).astype(np.int64)
+                self.pending[label] = []
+            parts.append(self.lists[label])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def search(self, query, k, nprobe=None, exclude_row=None):
+        """[(article_id, cosine similarity)] of the top `k` rows for a unit `query`."""
+        query = np.asarray(query, dtype=np.float32)
+        rows = self.candidates(query, nprobe or settings.EMBEDDING_NPROBE)
+        if exclude_row is not None:
+            rows = rows[rows != exclude_row]
+        if not len(rows):
+            return []
+        rows = np.sort(rows)    # sequential reads through the memmap
+        scores = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        top = np.argpartition(-scores, min(k, len(rows)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[rows[i]]), float(scores[i])) for i in top]
+
+    def related(self, article_id, k):
+        row = self.row_of(article_id)
+        if row is None:
+            return None
+        return self.search(self.vectors[row], k, exclude_row=row)
+
+    # ── writing (single writer) ────────────────────────────────────────────
+
+    def append(self, article_ids, vectors):
+        """Append rows for new, ascending article ids; files them under their IVF list."""
+        if not len(article_ids):
+            return
+        os.makedirs(self.path, exist_ok=True)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self.file(META), 'w') as f:
+                json.dump({'dim': self.dim}, f)
+        labels = (assign(vectors, self.centroids) if self.centroids is not None
+                  else np.full(len(vectors), -1, dtype=np.int32))
+        with open(self.file(VECTORS), 'ab') as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float16).tobytes())
+        with open(self.file(LISTS), 'ab') as f:
+            f.write(labels.astype(np.int32).tobytes())
+        with open(self.file(IDS), 'ab') as f:
+            f.write(np.asarray(article_ids, dtype=np.int64).tobytes())
+        self.refresh()
+
+    def train(self, nlist=None, sample=None, live_ids=None):
+        """
+        (Re)build the IVF lists over every stored row, or only over the rows
+        whose article id is in `live_ids`; the others are left out of every
+        list (label -1) and so are never searched.
+        """
+        self.refresh()
+        live = np.isin(self.ids, live_ids) if live_ids is not None else np.ones(self.count, dtype=bool)
+        rows = np.flatnonzero(live)
+        nlist = nlist or settings.EMBEDDING_NLIST or max(1, int(np.sqrt(len(rows))))
+        sample = sample or 64 * nlist
+        rng = np.random.default_rng(0)
+        picks = np.sort(rng.choice(rows, min(sample, len(rows)), replace=False))
+        centroids = spherical_kmeans(self.vectors[picks], nlist)
+        labels = assign(self.vectors, centroids)
+        labels[~live] = -1
+        labels.tofile(self.file(LISTS + '.tmp'))
+        os.replace(self.file(LISTS + '.tmp'), self.file(LISTS))
+        with open(self.file(CENTROIDS + '.tmp'), 'wb') as f:
+            np.save(f, centroids)
+        os.replace(self.file(CENTROIDS + '.tmp'), self.file(CENTROIDS))
+        return self.refresh()
+
+
+def get_index():
+    """The process-wide index over EMBEDDING_DIR, refreshed on every call."""
+    if getattr(get_index, 'index', None) is None or get_index.index.path != settings.EMBEDDING_DIR:
+        get_index.index = EmbeddingIndex(settings.EMBEDDING_DIR)
+    return get_index.index.refresh()
+
+
+def retrain_index(index=None):
+    """Train `index` (default: the shared one) over the rows of articles still in the hot table."""
+    index = index or get_index()
+    live_ids = np.fromiter(Article.objects.order_by('id').values_list('id', flat=True).iterator(), dtype=np.int64)
+    return index.train(live_ids=live_ids)
+
+
+def embed_new_articles(embed=embed_texts, batch_size=None):
+    """
+    Embed every article newer than the last stored row, in id order, and
+    train the IVF index once EMBEDDING_TRAIN_MIN rows exist. Returns the
+    number of articles embedded.
+    """
+    index = get_index()
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE * 8
+    last_id = int(index.ids[-1]) if index.count else 0
+    done = 0
+    while True:
+        rows = list(
+            Article.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'title', 'description')[:batch_size]
+        )
+        if not rows:
+            break
+        ids, titles, descriptions = zip(*rows)
+        index.append(ids, embed([f'{t}. {d}' for t, d in zip(titles, descriptions)]))
+        done += len(ids)
+        last_id = ids[-1]
+    if index.centroids is None and index.count >= settings.EMBEDDING_TRAIN_MIN:
+        retrain_index(index)
+    return done
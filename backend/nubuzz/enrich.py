@@ -0,0 +1,192 @@
+# nubuzz/enrich.py
+#
+# Enrichment stage: lexicon sentiment and mentioned-location extraction for
+# batches of stored articles. Each batch is tokenized once into interned
+# token ids, the lexicon / gazetteer are consulted once per distinct word,
+# and every per-article score is a NumPy gather + reduction over the batch.
+
+import re
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from .feedcache import bump_generation
+from .models import Article
+from .taxonomy import LOCATION_ALIASES
+
+TOKEN_RE = re.compile(r"[a-z][a-z'\-]*")
+
+# News-oriented valence lexicon, -3 (very negative) .. +3 (very positive).
+LEXICON = {
+    # negative
+    'abuse': -3, 'accident': -2, 'bad': -2, 'falls': -1, 'kills': -3, 'accused': -2, 'alarm': -2, 'arrest': -2, 'arrested': -2,
+    'attack': -3, 'attacks': -3, 'ban': -1, 'bankrupt': -3, 'bankruptcy': -3, 'bleak': -2,
+    'blast': -2, 'bomb': -3, 'breach': -2, 'catastrophe': -3, 'collapse': -3, 'collapsed': -3,
+    'concern': -1, 'concerns': -1, 'conflict': -2, 'crash': -3, 'crisis': -3, 'critical': -1,
+    'cut': -1, 'cuts': -1, 'damage': -2, 'danger': -2, 'dead': -3, 'death': -3, 'deaths': -3,
+    'decline': -2, 'defeat': -2, 'deficit': -1, 'delay': -1, 'disaster': -3, 'dispute': -1,
+    'downturn': -2, 'drought': -2, 'emergency': -2, 'evacuate': -2, 'fail': -2, 'failed': -2,
+    'failure': -2, 'fall': -1, 'fear': -2, 'fears': -2, 'fine': -1, 'fined': -2, 'fire': -1,
+    'flood': -2, 'fraud': -3, 'hack': -2, 'hurt': -2, 'injured': -2, 'inflation': -1,
+    'kill': -3, 'killed': -3, 'lawsuit': -2, 'layoffs': -2, 'lose': -2, 'loss': -2,
+    'losses': -2, 'murder': -3, 'outage': -2, 'outbreak': -2, 'plunge': -2, 'poor': -2,
+    'protest': -1, 'recall': -1, 'recession': -3, 'risk': -1, 'riot': -3, 'scandal': -3,
+    'shooting': -3, 'shortage': -2, 'slump': -2, 'storm': -1, 'strike': -1, 'struggle': -2,
+    'suspect': -1, 'threat': -2, 'tragedy': -3, 'trial': -1, 'violence': -3, 'war': -3,
+    'warning': -2, 'weak': -2, 'wildfire': -2, 'worst': -3,
+    # positive
+    'achieve': 2, 'advance': 1, 'agreement': 1, 'approve': 1, 'approved': 1, 'award': 2,
+    'best': 3, 'boom': 2, 'boost': 2, 'breakthrough': 3, 'celebrate': 3, 'celebrates': 3, 'champion': 2,
+    'cure': 2, 'deal': 1, 'discover': 1, 'discovery': 2, 'ease': 1, 'eases': 1, 'gain': 2,
+    'gains': 2, 'good': 2, 'great': 3, 'growth': 2, 'help': 2, 'hope': 2, 'improve': 2, 'improved': 2,
+    'innovation': 2, 'launch': 1, 'lead': 1, 'peace': 2, 'praise': 2, 'profit': 2,
+    'progress': 2, 'record': 1, 'recover': 2, 'recovery': 2, 'relief': 2, 'rescue': 2,
+    'rise': 1, 'rises': 1, 'safe': 1, 'save': 2, 'soar': 2, 'strong': 2, 'success': 2,
+    'successful': 2, 'support': 1, 'surge': 1, 'thrive': 2, 'triumph': 3, 'upgrade': 1,
+    'victory': 3, 'win': 3, 'wins': 3, 'winner': 2,
+}
+
+NEGATORS = {'not', 'no', 'never', "isn't", "wasn't", "don't", "doesn't", "didn't", "won't", 'without'}
+NEGATION_SCALE = -0.74      # VADER's damping for a negated term
+NEGATION_WINDOW = 3         # tokens after a negator that it can flip
+NORMALIZE_ALPHA = 15        # compound = s / sqrt(s² + alpha), as in VADER
+SENTIMENT_THRESHOLD = 0.05
+TITLE_WEIGHT = 2            # a place in the headline outweighs one in the body
+
+# Adjectives that also pin an article to a country, on top of the
+# filter vocabulary's city / country names. Bare ISO codes are left out:
+# "us" and "in" are everyday words.
+DEMONYMS = {
+    'american': 'us', 'british': 'gb', 'english': 'gb', 'japanese': 'jp', 'french': 'fr',
+    'australian': 'au', 'german': 'de', 'canadian': 'ca', 'singaporean': 'sg',
+    'indian': 'in', 'chinese': 'cn',
+}
+GAZETTEER = {**LOCATION_ALIASES, **DEMONYMS}
+LOCATIONS = sorted(set(GAZETTEER.values()))
+
+# First words of multi-word place names; only bigrams starting with one of
+# these are ever built.
+BIGRAM_HEADS = {name.split()[0] for name in GAZETTEER if ' ' in name}
+
+
+def tokenize(texts, vocab):
+    """
+    Token ids (interned through the batch-wide `vocab` dict) plus the
+    document index of every token, as NumPy arrays.
+    """
+    ids, docs = [], []
+    for i, text in enumerate(texts):
+        words = TOKEN_RE.findall(text.lower())
+        ids.extend([vocab.setdefault(word, len(vocab)) for word in words])
+        docs.extend([i] * len(words))
+    return np.array(ids, dtype=np.int64), np.array(docs, dtype=np.int64)
+
+
+def vocab_table(words, table, missing, dtype):
+    """One value per distinct batch word: the whole lexicon lookup is this list."""
+    return np.array([table.get(word, missing) for word in words], dtype=dtype)
+
+
+def sentiment_scores(ids, docs, words, count):
+    """VADER-style compound score in [-1, 1] per document, from its token ids."""
+    valence = vocab_table(words, LEXICON, 0, np.float64)[ids]
+    negator = vocab_table(words, dict.fromkeys(NEGATORS, True), False, bool)[ids]
+    # A term is negated if a negator of the same article sits within the
+    # previous NEGATION_WINDOW tokens.
+    negated = np.zeros(len(ids), dtype=bool)
+    for shift in range(1, NEGATION_WINDOW + 1):
+        negated[shift:] |= negator[:-shift] & (docs[shift:] == docs[:-shift])
+    valence[negated] *= NEGATION_SCALE
+    sums = np.bincount(docs, weights=valence, minlength=count)
+    return sums / np.sqrt(sums * sums + NORMALIZE_ALPHA)
+
+
+def sentiment_labels(scores):
+    labels = np.full(len(scores), 'neutral', dtype=object)
+    labels[scores >= SENTIMENT_THRESHOLD] = 'positive'
+    labels[scores <= -SENTIMENT_THRESHOLD] = 'negative'
+    return labels.tolist()
+
+
+def place_mentions(ids, docs, words, counts, weight):
+    """Add `weight` to counts[doc, place] for every place named in the tokens."""
+    code_index = {code: i for i, code in enumerate(LOCATIONS)}
+    places = vocab_table(words, {w: code_index[c] for w, c in GAZETTEER.items()}, -1, np.int64)
+    hits = places[ids]
+    found = hits >= 0
+    np.add.at(counts, (docs[found], hits[found]), weight)
+
+    # Two-word names ('new york'): only where the first word can start one.
+    heads = vocab_table(words, dict.fromkeys(BIGRAM_HEADS, True), False, bool)
+    starts = np.flatnonzero(heads[ids[:-1]] & (docs[1:] == docs[:-1]))
+    for pos in starts.tolist():
+        code = GAZETTEER.get(f'{words[ids[pos]]} {words[ids[pos + 1]]}')
+        if code:
+            counts[docs[pos], code_index[code]] += weight
+
+
+def analyze(titles, descriptions, contents):
+    """
+    (sentiment labels, mentioned locations) for parallel lists of article
+    fields. Location is the most-mentioned country code (headline mentions
+    count double), or '' when no known place is named.
+    """
+    vocab = {}
+    title_ids, title_docs = tokenize(titles, vocab)
+    body_ids, body_docs = tokenize([f'{d} {c}' for d, c in zip(descriptions, contents)], vocab)
+    words = list(vocab)
+
+    scores = sentiment_scores(
+        np.concatenate([title_ids, body_ids]), np.concatenate([title_docs, body_docs]),
+        words, len(titles),
+    )
+    counts = np.zeros((len(titles), len(LOCATIONS)))
+    place_mentions(title_ids, title_docs, words, counts, TITLE_WEIGHT)
+    place_mentions(body_ids, body_docs, words, counts, 1)
+    best = counts.argmax(axis=1)
+    located = counts[np.arange(len(titles)), best] > 0
+    mentioned = [LOCATIONS[b] if f else '' for b, f in zip(best.tolist(), located.tolist())]
+    return sentiment_labels(scores), mentioned
+
+
+def stale(queryset):
+    """Rows whose current content has not been enriched yet."""
+    return queryset.filter(Q(enriched_hash__isnull=True) | ~Q(enriched_hash=F('content_hash')))
+
+
+def enrich_articles(queryset=None, batch_size=None):
+    """
+    Enrich every stale row of `queryset` (default: the whole table) in
+    batches of ENRICH_BATCH_SIZE: sentiment label, and the mentioned country
+    as location when the text names one (otherwise the feed's country
+    stays). Returns the number of articles processed.
+    """
+    queryset = stale(Article.objects.all() if queryset is None else queryset)
+    batch_size = batch_size or settings.ENRICH_BATCH_SIZE
+    fields = ('id', 'title', 'description', 'content', 'location', 'content_hash')
+    done, last_id = 0, 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list(*fields)[:batch_size])
+        if not rows:
+            return done
+        ids, titles, descriptions, contents, locations, hashes = zip(*rows)
+        sentiments, mentioned = analyze(titles, descriptions, contents)
+        # Rows sharing a result are written with one UPDATE; enriched_hash
+        # is copied from the row, and the hash filter skips any row whose
+        # content changed since it was read.
+        groups = defaultdict(lambda: ([], []))
+        for pk, sentiment, place, location, content_hash in zip(ids, sentiments, mentioned, locations, hashes):
+            group = groups[sentiment, place or location]
+            group[0].append(pk)
+            group[1].append(content_hash)
+        with transaction.atomic():
+            for (sentiment, location), (pks, content_hashes) in groups.items():
+                Article.objects.filter(id__in=pks, content_hash__in=content_hashes).update(
+                    sentiment=sentiment, location=location, enriched_hash=F('content_hash'),
+                )
+            bump_generation()
+        done += len(rows)
+        last_id = ids[-1]
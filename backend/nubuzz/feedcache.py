@@ -0,0 +1,149 @@
+# nubuzz/feedcache.py
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+GENERATION_KEY = 'nubuzz:feed-generation'
+
+# Response headers that are part of a cached feed page.
+CACHED_HEADERS = ['Content-Type', 'Last-Modified', 'Link']
+
+# Set on pages served while NewsAPI could not be reached or was not allowed
+# to be; they are never cached, so the next request tries again.
+DEGRADED_HEADER = 'X-Nubuzz-Degraded'
+
+
+def feed_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def current_generation():
+    """Counter bumped on every Article write; part of every feed cache key."""
+    cache = feed_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+async def acurrent_generation():
+    cache = feed_cache()
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, 1, timeout=None)
+        generation = await cache.aget(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_generation():
+    """
+    Invalidate every cached feed page at once. Deferred to commit so readers
+    never cache a page built from the pre-write snapshot under the new
+    generation.
+    """
+    def bump():
+        cache = feed_cache()
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, 2, timeout=None)
+    transaction.on_commit(bump)
+
+
+def feed_cache_key(request, generation):
+    query = sorted(request.GET.lists())
+    accept = request.META.get('HTTP_ACCEPT', '')
+    raw = repr((request.path, query, accept)).encode('utf-8')
+    return f'nubuzz:feed:{generation}:{hashlib.sha1(raw).hexdigest()}'
+
+
+def cached_feed(view):
+    """
+    Wrap a feed view with a shared response cache plus conditional GET.
+
+    Cache entries are keyed on (path, query string, Accept, generation), so
+    an ingestion write makes every stale entry unreachable without having
+    to enumerate them. Each 200 JSON response gets a strong ETag (hash of
+    the body); views may set `Last-Modified` themselves. Requests carrying a
+    matching If-None-Match / If-Modified-Since get a 304 either way.
+
+    Async views get an async wrapper that talks to the cache with
+    aget / aset, so a remote cache never blocks the event loop.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+            cache = feed_cache()
+            key = feed_cache_key(request, await acurrent_generation())
+            entry = await cache.aget(key)
+            response = None
+            if entry is None:
+                response = await view(request, *args, **kwargs)
+                entry = cache_entry(response)
+                if entry is None:
+                    return response
+                await cache.aset(key, entry, settings.FEED_CACHE_TIMEOUT)
+            return conditional_response(request, entry, response)
+
+        return markcoroutinefunction(async_wrapper)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        cache = feed_cache()
+        key = feed_cache_key(request, current_generation())
+        entry = cache.get(key)
+        response = None
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            entry = cache_entry(response)
+            if entry is None:
+                return response
+            cache.set(key, entry, settings.FEED_CACHE_TIMEOUT)
+        return conditional_response(request, entry, response)
+
+    return wrapper
+
+
+def cache_entry(response):
+    """Cacheable form of a fresh response, or None if it must not be cached."""
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200 or not response.get('Content-Type', '').startswith('application/json'):
+        return None
+    if response.has_header(DEGRADED_HEADER):
+        return None
+    return {
+        'body':    response.content,
+        'etag':    '"%s"' % hashlib.sha1(response.content).hexdigest(),
+        'headers': {h: response[h] for h in CACHED_HEADERS if response.has_header(h)},
+    }
+
+
+def conditional_response(request, entry, response=None):
+    """304, the fresh `response`, or a response rebuilt from the cache entry."""
+    last_modified = parse_http_date_safe(entry['headers'].get('Last-Modified', ''))
+    not_modified = get_conditional_response(request, etag=entry['etag'], last_modified=last_modified)
+    if not_modified is not None:
+        response = not_modified
+    elif response is None:
+        response = HttpResponse(entry['body'])
+        for header, value in entry['headers'].items():
+            response[header] = value
+    response['ETag'] = entry['etag']
+    response['Cache-Control'] = 'no-cache'  # always revalidate; 304s are cheap
+    patch_vary_headers(response, ['Accept'])
+    return response
@@ -0,0 +1,170 @@
+# nubuzz/fetcher.py
+
+import asyncio
+import logging
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .ingest import upsert_articles
+from .metrics import upstream
+from .newsapi import RATE_LIMITED, BudgetExhausted, NewsAPIError, parse_response, top_headlines_params
+from .quota import upstream_budget
+
+logger = logging.getLogger(__name__)
+
+
+class HeadlineFetcher:
+    """
+    Fetch many NewsAPI (category, page) requests concurrently over one
+    pooled keep-alive httpx.AsyncClient.
+
+    - `max_connections` bounds the shared pool,
+    - `per_host` bounds in-flight requests to any single upstream host,
+    - identical in-flight requests are coalesced onto one upstream call.
+
+    Use as an async context manager so the pool is closed afterwards.
+    """
+
+    def __init__(self, max_connections=None, per_host=None, timeout=None, client=None):
+        self.max_connections = max_connections or settings.NEWS_API_MAX_CONNECTIONS
+        self.per_host        = per_host or settings.NEWS_API_PER_HOST_LIMIT
+        self.timeout         = timeout or settings.NEWS_API_TIMEOUT
+        self.client          = client
+        self._owns_client    = client is None
+        self._host_limits    = {}
+        self._inflight       = {}
+
+    async def __aenter__(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._owns_client:
+            await self.client.aclose()
+            self.client = None
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def _get(self, url, params):
+        budget = upstream_budget()
+        if not await budget.aspend():
+            raise BudgetExhausted()
+        async with self._host_limit(url):
+            try:
+                with upstream('newsapi'):
+                    resp = await self.client.get(url, params=params)
+                    data = resp.json()
+            except (httpx.HTTPError, ValueError) as e:
+                raise NewsAPIError(f'NewsAPI request failed: {e}') from e
+        try:
+            return parse_response(data)
+        except NewsAPIError as e:
+            if e.code == RATE_LIMITED:
+                await budget.aexhaust()
+            raise
+
+    async def fetch(self, category=None, page=None):
+        """Raw articles for one (category, page); duplicate callers share a request."""
+        key = (category, page)
+        task = self._inflight.get(key)
+        if task is None:
+            url = f"{settings.NEWS_API_URL.rstrip('/')}/top-headlines"
+            task = asyncio.ensure_future(self._get(url, top_headlines_params(category, page)))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def fetch_all(self, categories, pages=1):
+        """
+        Fetch pages 1..`pages` of every category at once.
+        Returns (articles, errors) where errors maps (category, page) → message.
+        """
+        keys = [(category, page) for category in categories for page in range(1, pages + 1)]
+        results = await asyncio.gather(
+            *(self.fetch(category, page) for category, page in keys),
+            return_exceptions=True,
+        )
+        articles, errors = [], {}
+        for key, result in zip(keys, results):
+            if isinstance(result, NewsAPIError):
+                errors[key] = str(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                # Tag each article with its feed so the writer records it.
+                articles.extend({**raw, 'category': key[0] or ''} for raw in result)
+        return articles, errors
+
+
+async def fetch_categories(categories, pages=1, **fetcher_options):
+    async with HeadlineFetcher(**fetcher_options) as fetcher:
+        return await fetcher.fetch_all(categories, pages)
+
+
+def refresh_categories(categories, pages=1, **fetcher_options):
+    """
+    Full refresh: fetch every category/page concurrently, then hand the
+    merged batch to the bulk writer in one go. Wall-clock is roughly the
+    slowest upstream call rather than the sum of all of them.
+    """
+    articles, errors = asyncio.run(fetch_categories(categories, pages, **fetcher_options))
+    for (category, page), message in errors.items():
+        logger.warning("NewsAPI fetch for %r page %d failed: %s", category, page, message)
+    counts = upsert_articles(articles)
+    counts['failed'] = len(errors)
+    return counts
+
+
+# Event loop → {category: in-flight refresh task}.
+_refreshing = weakref.WeakKeyDictionary()
+
+# SQLite has one writer: request-path refreshes (from any thread or event
+# loop) take turns storing their page instead of timing out on each other.
+_store_lock = threading.Lock()
+
+
+async def refresh_category(category):
+    """
+    Request-path fallback for a category feed that has never been ingested:
+    fetch its first page over an async client and store it. Concurrent
+    callers on the same event loop share one fetch and one write. Returns
+    upsert counts, or None if NewsAPI failed.
+    """
+    inflight = _refreshing.setdefault(asyncio.get_running_loop(), {})
+    task = inflight.get(category)
+    if task is None:
+        task = asyncio.ensure_future(_refresh_category(category))
+        inflight[category] = task
+        task.add_done_callback(lambda _: inflight.pop(category, None))
+    return await asyncio.shield(task)
+
+
+async def _refresh_category(category):
+    async with HeadlineFetcher() as fetcher:
+        try:
+            articles = await fetcher.fetch(category, 1)
+        except NewsAPIError as e:
+            logger.warning("NewsAPI fetch for %r on a feed miss failed: %s", category, e)
+            return None
+    return await sync_to_async(_store)([{**raw, 'category': category} for raw in articles])
+
+
+def _store(articles):
+    with _store_lock:
+        return upsert_articles(articles)
@@ -0,0 +1,40 @@
+# nubuzz/filters.py
+
+import django_filters
+
+from .models import Article
+from .taxonomy import normalize_category, normalize_location
+
+
+class ArticleFilter(django_filters.FilterSet):
+    """
+    ?category= / ?location= on the feeds. Both accept the frontend's labels
+    ('Tech', 'New York') and match the normalized values ingestion stores,
+    so each filter is one equality lookup on its (x, -published_at, -id)
+    index. Near-duplicate copies of a story are hidden by default.
+    """
+    category   = django_filters.CharFilter(method='filter_category')
+    location   = django_filters.CharFilter(method='filter_location')
+    duplicates = django_filters.BooleanFilter(method='filter_duplicates')
+
+    class Meta:
+        model  = Article
+        fields = ['category', 'location', 'duplicates']
+
+    def filter_queryset(self, queryset):
+        """One card per story unless ?duplicates=true asks for every copy."""
+        queryset = super().filter_queryset(queryset)
+        if not self.form.cleaned_data.get('duplicates'):
+            queryset = queryset.filter(duplicate_of__isnull=True)
+        return queryset
+
+    def filter_duplicates(self, queryset, name, value):
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        value = normalize_category(value)
+        return queryset.filter(category=value) if value else queryset
+
+    def filter_location(self, queryset, name, value):
+        value = normalize_location(value)
+        return queryset.filter(location=value) if value else queryset
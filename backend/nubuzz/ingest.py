@@ -0,0 +1,226 @@
+# nubuzz/ingest.py
+
+import hashlib
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .dedupe import cluster_new_articles, story_signatures
+from .enrich import enrich_articles
+from .feedcache import bump_generation
+from .models import Article, ArchivedArticle
+from .personalize import add_to_feeds
+from .summarizer import enqueue
+from .taxonomy import feed_location, normalize_category
+
+# Columns rewritten when an already-stored URL comes back with new content.
+# sentiment / summarize_article are owned by later stages and are
+# deliberately left alone on conflict. location is reset to the feed's
+# country here and refined by the enrichment stage when content changes.
+# category is only written while the row has none (see upsert_articles).
+UPSERT_FIELDS = [
+    'source_id',
+    'source_name',
+    'title',
+    'author',
+    'description',
+    'content',
+    'url_to_image',
+    'published_at',
+    'location',
+    'content_hash',
+]
+
+# existing_rows() marker for a URL that has been moved to the archive.
+ARCHIVED = object()
+
+# Keeps `url__in` lookups and INSERT statements well under SQLite's
+# bound-parameter limit.
+BATCH_SIZE = 500
+
+
+def compute_content_hash(values):
+    """
+    Stable SHA-1 over the upstream-owned columns of a normalized article,
+    so a re-ingest of an unchanged headline can be skipped without a write.
+    category is compared separately: the same story legitimately shows up
+    in several category feeds.
+    """
+    digest = hashlib.sha1()
+    for field in UPSERT_FIELDS:
+        if field == 'content_hash':
+            continue
+        value = values[field]
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        digest.update(str(value).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def normalize_article(raw, category=''):
+    """
+    Map one NewsAPI article dict onto Article column values.
+    `category` is the feed the article was fetched from; a `category` key
+    on the raw dict (set by our fetchers, never by NewsAPI) takes precedence.
+    Returns None for entries that cannot be stored (no url / publish date).
+    """
+    url = raw.get('url')
+    published_at = raw.get('publishedAt')
+    if isinstance(published_at, str):
+        published_at = parse_datetime(published_at)
+    if not url or published_at is None:
+        return None
+    if timezone.is_naive(published_at):
+        published_at = timezone.make_aware(published_at, dt_timezone.utc)
+
+    source      = raw.get('source') or {}
+    source_name = source.get('name') or ''
+    desc        = raw.get('description') or ''
+    content     = raw.get('content')     or ''
+
+    values = {
+        'url':          url,
+        'source_id':    source.get('id') or '',
+        'source_name':  source_name,
+        'title':        raw.get('title')  or '',
+        'author':       raw.get('author') or '',
+        'description':  desc,
+        'content':      f"{desc}\n\n{content}".strip(),
+        'url_to_image': raw.get('urlToImage') or '',
+        'published_at': published_at,
+        'location':     feed_location(),
+    }
+    values['content_hash'] = compute_content_hash(values)
+    values['category'] = normalize_category(raw.get('category') or category)
+    return values
+
+
+def normalize_articles(raw_articles, category=''):
+    """
+    Normalize a whole NewsAPI payload in memory. Later duplicates of the
+    same URL win, matching what the old per-row update_or_create did.
+    """
+    by_url = {}
+    for raw in raw_articles:
+        values = normalize_article(raw, category)
+        if values is not None:
+            by_url[values['url']] = values
+    return list(by_url.values())
+
+
+def existing_rows(urls):
+    """
+    url → (content_hash, category) for the given URLs already in the DB,
+    or ARCHIVED for those retention has moved to the archive table.
+    """
+    rows = {}
+    for start in range(0, len(urls), BATCH_SIZE):
+        chunk = urls[start:start + BATCH_SIZE]
+        for url in ArchivedArticle.objects.filter(url__in=chunk).values_list('url', flat=True):
+            rows[url] = ARCHIVED
+        for url, content_hash, category in (
+            Article.objects.filter(url__in=chunk).values_list('url', 'content_hash', 'category')
+        ):
+            rows[url] = (content_hash, category)
+    return rows
+
+
+def article_ids(urls):
+    ids = []
+    for start in range(0, len(urls), BATCH_SIZE):
+        chunk = urls[start:start + BATCH_SIZE]
+        ids.extend(Article.objects.filter(url__in=chunk).values_list('id', flat=True))
+    return ids
+
+
+def upsert_articles(raw_articles, category=''):
+    """
+    Persist a NewsAPI payload with one diff lookup and batched upserts:
+
+      1. normalize every entry in memory,
+      2. fetch stored content hashes with `url__in`,
+      3. bulk_create(update_conflicts=True) only new/changed rows (new
+         ones with their MinHash signature), in a single transaction,
+      4. score sentiment / mentioned location of new and changed content,
+      5. link new near-duplicates to their story's first article,
+      6. merge new stories into the materialized personal feeds,
+      7. queue newly created articles on the summarization backlog.
+
+    `category` tags rows fetched from a category feed. A row keeps the first
+    category it was stored with: the same story shows up in several
+    category feeds, and re-tagging it on every poll would count as a change
+    and invalidate the feed cache each time. Stories already archived
+    are left there and count as unchanged.
+
+    Returns counts of created / updated / unchanged rows.
+    """
+    rows = normalize_articles(raw_articles, category)
+    stored = existing_rows([row['url'] for row in rows])
+    if settings.DEDUPE_ON_INGEST:
+        new_rows = [row for row in rows if row['url'] not in stored]
+        for row, sig in zip(new_rows, story_signatures(new_rows)):
+            row['minhash'] = sig
+
+    # Split by which columns are written on conflict: the category only
+    # when the batch knows it and the row has none yet, the upstream
+    # columns only when they changed (so a newly tagged story keeps its
+    # enriched location).
+    with_category, without_category, category_only = [], [], []
+    new_urls, changed_urls = [], []
+    created = updated = 0
+    for row in rows:
+        previous = stored.get(row['url'])
+        if previous is ARCHIVED:
+            continue
+        tags = bool(row['category']) and not (previous and previous[1])
+        if previous is None:
+            created += 1
+            new_urls.append(row['url'])
+        elif previous[0] != row['content_hash']:
+            updated += 1
+        elif tags:
+            updated += 1
+            category_only.append(Article(**row))
+            continue
+        else:
+            continue
+        changed_urls.append(row['url'])
+        (with_category if tags else without_category).append(Article(**row))
+
+    # One transaction for the write and every ingest stage, so readers (the
+    # live stream in particular) never see a new row before it has been
+    # enriched and clustered.
+    with transaction.atomic():
+        if with_category or without_category or category_only:
+            for pending, fields in ((with_category, UPSERT_FIELDS + ['category']),
+                                    (without_category, UPSERT_FIELDS),
+                                    (category_only, ['category'])):
+                if pending:
+                    Article.objects.bulk_create(
+                        pending,
+                        batch_size=BATCH_SIZE,
+                        update_conflicts=True,
+                        unique_fields=['url'],
+                        update_fields=fields,
+                    )
+            bump_generation()
+        if changed_urls and settings.ENRICH_ON_INGEST:
+            for start in range(0, len(changed_urls), BATCH_SIZE):
+                enrich_articles(Article.objects.filter(url__in=changed_urls[start:start + BATCH_SIZE]))
+        if new_urls:
+            new_ids = article_ids(new_urls)
+            if settings.DEDUPE_ON_INGEST:
+                cluster_new_articles(new_ids)
+            add_to_feeds(new_ids)
+            if settings.SUMMARIZE_ON_INGEST:
+                enqueue(new_ids, on_demand=False)
+
+    return {
+        'created':   created,
+        'updated':   updated,
+        'unchanged': len(rows) - created - updated,
+    }
@@ -0,0 +1,191 @@
+# nubuzz/live.py
+#
+# Live push of newly ingested headlines (GET /nubuzz/api/news/live/).
+# Ingest runs in its own process, so new rows are found by polling — but
+# once per LIVE_POLL_INTERVAL per event loop, however many clients are
+# connected: one Broadcaster reads the rows it hasn't seen, encodes each new
+# story as a server-sent event once, and fans the bytes out to the queues of
+# the subscribers whose category / location filter it matches.
+#
+# Ids are handed out when a row is inserted but become visible when its
+# transaction commits, so on PostgreSQL a lower id can show up after a
+# higher one. Each poll therefore re-reads ids above the newest one seen
+# more than LIVE_OVERLAP seconds ago, skipping the rows it has already
+# sent. (published_at is no watermark: it is the publisher's time, and
+# stories routinely arrive hours after it.)
+
+import asyncio
+import logging
+import weakref
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Max
+
+from .metrics import untracked
+from .models import Article
+from .renderers import dumps
+from .serializers import ArticleSerializer
+from .taxonomy import normalize_category, normalize_location
+
+logger = logging.getLogger(__name__)
+
+
+def sse_events(rows):
+    """One `article` event per row; the id lets a reconnecting client resume via Last-Event-ID."""
+    return [
+        b'id: %d\nevent: article\ndata: %s\n\n' % (item['id'], dumps(item))
+        for item in ArticleSerializer(rows, many=True).data
+    ]
+
+
+def card_rows(queryset):
+    return queryset.values(*ArticleSerializer.Meta.fields)
+
+
+class Subscription:
+    """One connected client: its filter, and the events waiting to be sent to it."""
+
+    def __init__(self, category='', location=''):
+        self.category = normalize_category(category)
+        self.location = normalize_location(location)
+        self.queue = asyncio.Queue(settings.LIVE_QUEUE_SIZE)
+        self.overflowed = False
+
+    def matches(self, row):
+        return ((not self.category or row['category'] == self.category)
+                and (not self.location or row['location'] == self.location))
+
+    def filter(self, queryset):
+        if self.category:
+            queryset = queryset.filter(category=self.category)
+        if self.location:
+            queryset = queryset.filter(location=self.location)
+        return queryset
+
+    def put(self, article_id, event):
+        """Queue an event; a client too slow to keep up is cut off and resumes on reconnect."""
+        try:
+            self.queue.put_nowait((article_id, event))
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def close(self):
+        """End the client's stream; it reconnects and resumes from Last-Event-ID."""
+        self.overflowed = True
+        try:
+            self.queue.put_nowait((None, None))
+        except asyncio.QueueFull:
+            pass
+
+
+class Broadcaster:
+    """Polls for new rows while anyone is subscribed and fans them out."""
+
+    def __init__(self, interval, overlap):
+        self.interval = interval
+        self.overlap = overlap
+        self.subscribers = set()
+        self.last_id = None      # newest row seen
+        self.settled_id = None   # rows at or below this id are not read again
+        self.recent = deque()    # (loop time, id) of rows seen within `overlap`
+        self.task = None
+        self.polls = 0
+
+    async def subscribe(self, subscription):
+        """Register a client; returns the id of the last row it is not sent live."""
+        if self.last_id is None:
+            newest = await Article.objects.aaggregate(last=Max('id'))
+            self.last_id = self.settled_id = newest['last'] or 0
+        self.subscribers.add(subscription)
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+        return self.last_id
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    async def run(self):
+        untracked()
+        try:
+            while self.subscribers:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.poll()
+                except Exception:
+                    # A dropped connection or a locked database is retried
+                    # on the next tick rather than ending every stream.
+                    logger.exception("Live headline poll failed")
+        finally:
+            # Nobody listening: the next subscriber starts from the then-newest
+            # row. If the loop was cancelled instead, whoever is still
+            # connected is told so and reconnects.
+            for subscription in list(self.subscribers):
+                subscription.close()
+            self.task = None
+            self.last_id = self.settled_id = None
+            self.recent.clear()
+
+    async def poll(self):
+        self.polls += 1
+        now = asyncio.get_running_loop().time()
+        while self.recent and self.recent[0][0] <= now - self.overlap:
+            self.settled_id = max(self.settled_id, self.recent.popleft()[1])
+        unseen = (Article.objects.filter(id__gt=self.settled_id)
+                  .exclude(id__in=[pk for _, pk in self.recent]).order_by('id'))
+        rows = [row async for row in card_rows(unseen)]
+        if not rows:
+            return
+        self.recent.extend((now, row['id']) for row in rows)
+        self.last_id = max(self.last_id, rows[-1]['id'])
+        stories = [row for row in rows if row['duplicate_of'] is None]
+        for row, event in zip(stories, sse_events(stories)):
+            for subscription in self.subscribers:
+                if subscription.matches(row):
+                    subscription.put(row['id'], event)
+
+
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+def broadcaster():
+    """The running event loop's Broadcaster."""
+    loop = asyncio.get_running_loop()
+    if loop not in _broadcasters:
+        _broadcasters[loop] = Broadcaster(settings.LIVE_POLL_INTERVAL, settings.LIVE_OVERLAP)
+    return _broadcasters[loop]
+
+
+async def live_events(subscription, last_event_id=None):
+    """
+    The SSE body for one client: a retry hint, the stories it missed since
+    `last_event_id` (the newest LIVE_BACKLOG of them), then live events as
+    they are broadcast, with a comment line every LIVE_KEEPALIVE seconds so
+    proxies keep the connection open.
+    """
+    hub = broadcaster()
+    start = await hub.subscribe(subscription)
+    try:
+        yield b'retry: %d\n\n' % (settings.LIVE_RETRY * 1000)
+        replayed = set()
+        if last_event_id is not None and last_event_id < start:
+            missed = subscription.filter(Article.objects.filter(
+                id__gt=last_event_id, id__lte=start, duplicate_of__isnull=True,
+            ))
+            backlog = [row async for row in card_rows(missed.order_by('-id')[:settings.LIVE_BACKLOG])]
+            replayed = {row['id'] for row in backlog}
+            for event in reversed(sse_events(backlog)):
+                yield event
+        while not subscription.overflowed:
+            try:
+                article_id, event = await asyncio.wait_for(subscription.queue.get(), settings.LIVE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+                continue
+            if article_id is None:
+                break
+            # A row committed late can reach both the backlog and the broadcast.
+            if article_id not in replayed:
+                yield event
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,69 @@
+# nubuzz/longpoll.py
+#
+# Long-polling for summaries from async views. However many requests are
+# waiting, each event loop runs one poller that checks all their jobs with
+# a single query per SUMMARY_POLL_INTERVAL, so waiting costs no thread and
+# no per-request DB traffic.
+
+import asyncio
+import weakref
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .metrics import untracked
+from .models import SummaryJob
+from .summarizer import job_statuses
+
+FINISHED = (SummaryJob.DONE, SummaryJob.FAILED)
+
+
+class SummaryWatcher:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.waiting = defaultdict(list)   # article id → futures
+        self.task = None
+
+    async def wait(self, article_id, timeout):
+        """The job's status dict once it is done or failed, or None after `timeout` seconds."""
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[article_id].append(future)
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            futures = self.waiting.get(article_id, [])
+            if future in futures:
+                futures.remove(future)
+                if not futures:
+                    del self.waiting[article_id]
+
+    async def run(self):
+        untracked()
+        try:
+            while self.waiting:
+                await asyncio.sleep(self.interval)
+                statuses = await sync_to_async(job_statuses)(list(self.waiting))
+                for article_id, status in statuses.items():
+                    if status['status'] in FINISHED:
+                        for future in self.waiting.pop(article_id, []):
+                            if not future.done():
+                                future.set_result(status)
+        finally:
+            self.task = None
+
+
+_watchers = weakref.WeakKeyDictionary()
+
+
+def summary_watcher():
+    """The running event loop's SummaryWatcher."""
+    loop = asyncio.get_running_loop()
+    if loop not in _watchers:
+        _watchers[loop] = SummaryWatcher(settings.SUMMARY_POLL_INTERVAL)
+    return _watchers[loop]
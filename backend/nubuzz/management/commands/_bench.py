@@ -0,0 +1,193 @@
+# nubuzz/management/commands/_bench.py
+#
+# Shared helpers for the bench_* management commands. The leading underscore
+# keeps Django from registering this module as a command.
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import connection
+from django.test import override_settings
+
+WORDS = (
+    'market election storm vaccine league court senate startup climate '
+    'merger rocket coach tariff drought launch summit earnings outbreak '
+    'verdict playoff satellite inflation protest wildfire chip treaty '
+    'budget strike rally museum festival trial bridge reactor harvest'
+).split()
+
+SOURCES = ['Reuters', 'Associated Press', 'BBC News', 'CNN', 'The Verge', 'Bloomberg']
+
+
+@contextmanager
+def scratch_database(on_disk=True):
+    """
+    Run a benchmark against a throwaway copy of the schema so the project's
+    db.sqlite3 is never touched. SQLite benchmarks default to an on-disk
+    file, since an in-memory DB hides fsync/transaction costs.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    tmpdir = None
+    if on_disk and connection.vendor == 'sqlite':
+        tmpdir = tempfile.mkdtemp(prefix='nubuzz-bench-')
+        test_settings['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+        if tmpdir:
+            # WAL mode leaves -wal / -shm files behind while threads that
+            # touched the DB still hold connections.
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+@contextmanager
+def timed(results, key):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+def sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def synthetic_articles(count, seed=0, url_prefix='https://example.com/story'):
+    """NewsAPI-shaped article dicts with unique URLs and plausible text."""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    articles = []
+    for i in range(count):
+        name = rng.choice(SOURCES)
+        articles.append({
+            'source':      {'id': name.lower().replace(' ', '-'), 'name': name},
+            'author':      f'Reporter {rng.randint(1, 500)}',
+            'title':       sentence(rng, 8),
+            'description': sentence(rng, 25),
+            'url':         f'{url_prefix}/{seed}/{i}',
+            'urlToImage':  f'https://example.com/img/{seed}/{i}.jpg',
+            'publishedAt': (base + timedelta(minutes=i)).isoformat().replace('+00:00', 'Z'),
+            'content':     sentence(rng, 60),
+        })
+    return articles
+
+
+# Error bodies the stub answers with when `server.status` is set to one of
+# these, shaped like NewsAPI's own.
+STUB_ERRORS = {
+    429: {'status': 'error', 'code': 'rateLimited',
+          'message': 'You have made too many requests recently.'},
+    500: {'status': 'error', 'code': 'unexpectedError',
+          'message': 'This shouldn\'t happen, and if it does then it\'s our fault, not yours.'},
+}
+
+
+class StubNewsAPIHandler(BaseHTTPRequestHandler):
+    """
+    Answers /v2/top-headlines with synthetic articles after `latency`
+    seconds, or with the NewsAPI error for `server.status` if it isn't 200.
+    """
+
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real API
+
+    def do_GET(self):
+        server = self.server
+        query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.latency)
+
+        if server.status != 200:
+            payload = STUB_ERRORS[server.status]
+        else:
+            category = query.get('category', 'top')
+            page = int(query.get('page', 1))
+            articles = synthetic_articles(
+                server.page_size,
+                seed=page,
+                url_prefix=f'https://example.com/{category}',
+            )
+            payload = {'status': 'ok', 'totalResults': len(articles), 'articles': articles}
+        body = json.dumps(payload).encode()
+        self.send_response(server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def stub_newsapi(latency=0.0, page_size=20, daily_budget=10 ** 9):
+    """
+    Serve a local NewsAPI stand-in and point NEWS_API_URL at it.
+    Yields the server so callers can read `server.requests` or set
+    `server.status` to make it fail. The stub has no quota of its own, so
+    the daily budget is effectively unlimited unless one is given.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubNewsAPIHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.page_size = page_size
+    server.requests = 0
+    server.status = 200
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with override_settings(NEWS_API_URL=f'http://127.0.0.1:{server.server_port}/v2',
+                               NEWS_API_DAILY_BUDGET=daily_budget):
+            yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class StubFileHandler(SimpleHTTPRequestHandler):
+    """Static files from the server's directory, counting requests."""
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def stub_file_server(directory):
+    """
+    Serve `directory` over HTTP on a local port, standing in for publisher
+    image hosts. Yields the server; its `url` is the base URL and
+    `requests` counts GETs.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(StubFileHandler, directory=directory))
+    server.daemon_threads = True
+    server.requests = 0
+    server.lock = threading.Lock()
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,38 @@
+# nubuzz/management/commands/archive_articles.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from nubuzz.archive import archive_articles, archive_codec, database_size, reclaim_space
+
+
+class Command(BaseCommand):
+    help = ("Move articles older than ARCHIVE_AFTER_DAYS into the compressed archive table, "
+            "then return the freed space to the filesystem with an incremental vacuum.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help="Archive articles published more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--vacuum-pages', type=int, default=None,
+                            help="Free at most this many pages (SQLite); default all.")
+        parser.add_argument('--no-vacuum', action='store_true')
+        parser.add_argument('--full-vacuum', action='store_true',
+                            help="Convert an existing SQLite file to incremental vacuum first "
+                                 "(one-off; rewrites the file under an exclusive lock).")
+
+    def handle(self, *args, days, batch_size, vacuum_pages, no_vacuum, full_vacuum, **options):
+        before = timezone.now() - timedelta(days=days)
+        count = archive_articles(before, batch_size)
+        self.stdout.write(f"Archived {count} articles published before {before:%Y-%m-%d} ({archive_codec()})")
+        if no_vacuum:
+            return
+        size = database_size()
+        if not reclaim_space(vacuum_pages, full=full_vacuum):
+            self.stderr.write("Database isn't set up for incremental vacuum; "
+                              "run once with --full-vacuum to convert it.")
+        elif size is not None:
+            self.stdout.write(f"Database {size / 2**20:.1f} MiB → {database_size() / 2**20:.1f} MiB")
@@ -0,0 +1,110 @@
+# nubuzz/management/commands/bench_archive.py
+
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from nubuzz.archive import PAYLOAD_FIELDS, archive_articles, archive_codec, database_size, reclaim_space
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article, ArchivedArticle
+
+from ._bench import scratch_database, sentence, synthetic_articles
+
+COMPARED = ['title', 'description', 'content', 'url', 'published_at', 'category', 'source_name']
+
+
+def timed_scan():
+    """A query that has to read every row: what old rows slow down."""
+    start = time.perf_counter()
+    Article.objects.filter(content__contains='no such phrase').count()
+    return time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = ("Archive the older part of a synthetic corpus: hot table size and scan time before / after, "
+            "compression ratio, space reclaimed, and lookups of archived articles by id and url.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=365, help="Span of publication dates.")
+        parser.add_argument('--keep-days', type=int, default=90, help="Archive what is older than this.")
+
+    def handle(self, *args, articles, days, keep_days, **options):
+        setup_test_environment()
+        with scratch_database():
+            self.seed(articles, days)
+            failures = self.run(keep_days)
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} archive check(s) failed")
+
+    def seed(self, count, days):
+        rng = random.Random(3)
+        now = timezone.now()
+        for offset in range(0, count, 2000):
+            raw = synthetic_articles(min(2000, count - offset), seed=offset, url_prefix='https://example.com/archive')
+            for i, article in enumerate(raw):
+                published = now - timedelta(days=days) * (offset + i) / count
+                article['publishedAt'] = published.isoformat()
+                article['content'] = ' '.join(sentence(rng, 40) + '.' for _ in range(8))   # ~2 KB bodies
+            upsert_articles(raw, 'general')
+
+    def run(self, keep_days):
+        failures = []
+        cutoff = timezone.now() - timedelta(days=keep_days)
+        old = Article.objects.filter(published_at__lt=cutoff)
+        sample = list(old.order_by('?').values('id', *COMPARED)[:50])
+        total, to_archive = Article.objects.count(), old.count()
+        raw_bytes = sum(len(json.dumps({f: row[f] for f in PAYLOAD_FIELDS}).encode())
+                        for row in old.values(*PAYLOAD_FIELDS))
+        size_before, scan_before = database_size(), timed_scan()
+
+        start = time.perf_counter()
+        archived = archive_articles(cutoff)
+        archive_seconds = time.perf_counter() - start
+        size_archived = database_size()
+        start = time.perf_counter()
+        reclaimed = reclaim_space()
+        vacuum_seconds = time.perf_counter() - start
+        size_after, scan_after = database_size(), timed_scan()
+
+        stored = ArchivedArticle.objects.aggregate(n=Sum(Length('payload')))['n'] or 0
+        self.stdout.write(f"{total:,} articles; archived {archived:,} older than {keep_days} days "
+                          f"in {archive_seconds:.1f}s ({archive_codec()})")
+        self.stdout.write(f"  payloads {raw_bytes / 2**20:.1f} MiB → {stored / 2**20:.1f} MiB compressed "
+                          f"({raw_bytes / max(stored, 1):.1f}x)")
+        self.stdout.write(f"  database {size_before / 2**20:.1f} MiB → {size_archived / 2**20:.1f} MiB after archiving "
+                          f"→ {size_after / 2**20:.1f} MiB after incremental vacuum ({vacuum_seconds:.2f}s)")
+        self.stdout.write(f"  full scan of the hot table {scan_before * 1000:.0f} ms → {scan_after * 1000:.0f} ms")
+        if archived != to_archive or Article.objects.count() != total - to_archive:
+            failures.append(f"archived {archived} of {to_archive}; {Article.objects.count()} left hot")
+        if not reclaimed or size_after >= size_before:
+            failures.append("incremental vacuum gave nothing back")
+
+        client = Client()
+        wrong = 0
+        for row in sample:
+            by_id = client.get(f"/nubuzz/api/news/{row['id']}/").json()
+            by_url = client.get('/nubuzz/api/news/lookup/', {'url': row['url']}).json()
+            expected = {**{f: row[f] for f in COMPARED if f != 'published_at'}, 'archived': True}
+            for found in (by_id, by_url):
+                if {f: found.get(f) for f in expected} != expected or found['id'] != row['id'] \
+                        or found['published_at'][:19] != row['published_at'].isoformat()[:19]:
+                    wrong += 1
+        hot = Article.objects.order_by('-id').values_list('id', flat=True).first()
+        hot_ok = client.get(f'/nubuzz/api/news/{hot}/').json().get('archived') is False
+        missing = client.get('/nubuzz/api/news/999999999/').status_code
+        self.stdout.write(f"  lookups of {len(sample)} archived articles by id and url: {wrong} wrong; "
+                          f"hot article archived={not hot_ok}; unknown id → {missing}")
+        if wrong or not hot_ok or missing != 404:
+            failures.append("archived lookups returned the wrong article")
+        return failures
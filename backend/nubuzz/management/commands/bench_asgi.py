@@ -0,0 +1,225 @@
+# nubuzz/management/commands/bench_asgi.py
+
+import asyncio
+import io
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import override_settings
+from django.utils import timezone
+
+from nubuzz.feedcache import bump_generation
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article, SummaryJob
+from nubuzz.newsapi import CATEGORIES
+
+from ._bench import scratch_database, stub_newsapi, synthetic_articles
+
+PROBE = '/nubuzz/api/news/?page_size=1'
+
+
+class Server:
+    """In-flight bookkeeping shared by both drivers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+
+    def leave(self):
+        with self.lock:
+            self.inflight -= 1
+
+
+class WSGIServer(Server):
+    """The WSGI handler behind a pool of `threads` workers, like gunicorn --threads."""
+    name = 'wsgi'
+
+    def __init__(self, threads):
+        super().__init__()
+        self.handler = WSGIHandler()
+        self.threads = threads
+
+    def call(self, url):
+        parts = urlsplit(url)
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': parts.path, 'QUERY_STRING': parts.query,
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+            'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        }
+        status = []
+        self.enter()
+        start = time.perf_counter()
+        try:
+            result = self.handler(environ, lambda s, headers: status.append(int(s.split()[0])))
+            b''.join(result)
+            result.close()
+        finally:
+            self.leave()
+        return status[0], time.perf_counter() - start
+
+    def run(self, urls, probe_after):
+        with ThreadPoolExecutor(self.threads) as pool:
+            futures = [pool.submit(self.call, url) for url in urls]
+            time.sleep(probe_after)
+            submitted = time.perf_counter()
+            status, _ = pool.submit(self.call, PROBE).result()
+            probe = time.perf_counter() - submitted
+            return [f.result() for f in futures], probe
+
+
+class ASGIServer(Server):
+    """The ASGI handler driven in-process on one event loop, like uvicorn with one worker."""
+    name = 'asgi'
+
+    def __init__(self):
+        super().__init__()
+        self.app = ASGIHandler()
+
+    async def call(self, url):
+        parts = urlsplit(url)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': parts.path, 'raw_path': parts.path.encode(),
+            'query_string': parts.query.encode(), 'root_path': '',
+            'headers': [(b'host', b'localhost')], 'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+        }
+        done = asyncio.Event()
+        requested = []
+        status = []
+
+        async def receive():
+            if not requested:
+                requested.append(True)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                done.set()
+
+        self.enter()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.leave()
+        return status[0], time.perf_counter() - start
+
+    def run(self, urls, probe_after):
+        async def main():
+            tasks = [asyncio.ensure_future(self.call(url)) for url in urls]
+            await asyncio.sleep(probe_after)
+            submitted = time.perf_counter()
+            await self.call(PROBE)
+            probe = time.perf_counter() - submitted
+            return await asyncio.gather(*tasks), probe
+
+        return asyncio.run(main())
+
+
+def stub_summarizer(delay, stop):
+    """Finish every pending job `delay` seconds after it was queued, like a model with fixed latency."""
+    try:
+        while not stop.is_set():
+            ready = list(SummaryJob.objects.filter(
+                status=SummaryJob.PENDING, created_at__lte=timezone.now() - timedelta(seconds=delay),
+            ).values_list('article_id', flat=True))
+            if ready:
+                Article.objects.filter(id__in=ready).update(summarize_article='Stub summary.')
+                SummaryJob.objects.filter(article_id__in=ready).update(status=SummaryJob.DONE)
+            time.sleep(0.02)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = ("Load-test the async views under WSGI (thread pool) and ASGI (one event loop): "
+            "summary long-polls against a stub summarizer, and cold category feeds against a stub NewsAPI.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Concurrent clients per scenario.")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads.")
+        parser.add_argument('--latency', type=float, default=0.5,
+                            help="Seconds the stub summarizer and stub NewsAPI take per job / request.")
+        parser.add_argument('--min-speedup', type=float, default=2.0,
+                            help="Fail if ASGI long-poll throughput is not this many times WSGI's.")
+
+    def handle(self, *args, requests, threads, latency, min_speedup, **options):
+        with scratch_database(), override_settings(SUMMARIZE_ON_INGEST=False, SUMMARY_POLL_INTERVAL=0.05):
+            upsert_articles([{**raw, 'category': 'general'} for raw in synthetic_articles(requests)])
+            ids = list(Article.objects.values_list('id', flat=True))
+            servers = [WSGIServer(threads), ASGIServer()]
+
+            throughput = {}
+            for server in servers:
+                Article.objects.update(summarize_article='')
+                SummaryJob.objects.all().delete()
+                bump_generation()
+                close_old_connections()
+                throughput[server.name] = self.scenario(
+                    server, 'summary long-poll', [f'/nubuzz/summary/{pk}/?wait=30' for pk in ids],
+                    lambda: self.run_with_summarizer(server, ids, latency),
+                )
+
+            cold = [c for c in CATEGORIES if c != 'general']
+            for server in servers:
+                Article.objects.exclude(category='general').delete()
+                bump_generation()
+                close_old_connections()
+                urls = [f'/nubuzz/fetch-news/?category={cold[i % len(cold)]}' for i in range(requests)]
+                # Coalescing is what is measured here, not the upstream limiter.
+                with stub_newsapi(latency=latency) as upstream, \
+                        override_settings(UPSTREAM_IP_BURST=10 ** 9, UPSTREAM_GLOBAL_BURST=10 ** 9):
+                    self.scenario(server, 'cold category feeds', urls, lambda: server.run(urls, latency / 2),
+                                  upstream=upstream)
+
+        speedup = throughput['asgi'] / throughput['wsgi']
+        self.stdout.write(f"long-poll throughput: ASGI {speedup:.1f}x WSGI")
+        if speedup < min_speedup:
+            raise CommandError(f"ASGI long-poll throughput only {speedup:.1f}x WSGI (want {min_speedup}x)")
+
+    def run_with_summarizer(self, server, ids, latency):
+        stop = threading.Event()
+        worker = threading.Thread(target=stub_summarizer, args=(latency, stop))
+        worker.start()
+        try:
+            return server.run([f'/nubuzz/summary/{pk}/?wait=30' for pk in ids], latency / 2)
+        finally:
+            stop.set()
+            worker.join()
+
+    def scenario(self, server, label, urls, run, upstream=None):
+        start = time.perf_counter()
+        results, probe = run()
+        elapsed = time.perf_counter() - start
+        statuses = sorted({status for status, _ in results})
+        latencies = sorted(seconds for _, seconds in results)
+        line = (
+            f"{server.name} {label:20} {len(urls)} requests in {elapsed:6.2f}s "
+            f"({len(urls) / elapsed:7.1f}/s), p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+            f"max {latencies[-1] * 1000:7.1f} ms, peak in flight {server.peak:3d}, "
+            f"probe {probe * 1000:7.1f} ms, statuses {statuses}"
+        )
+        if upstream is not None:
+            line += f", upstream calls {upstream.requests}"
+        self.stdout.write(line)
+        server.peak = 0
+        return len(urls) / elapsed
@@ -0,0 +1,111 @@
+# nubuzz/management/commands/bench_auth.py
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from nubuzz.authentication import CachedTokenAuthentication, token_cache
+from nubuzz.ingest import upsert_articles
+from nubuzz.views import PersonalFeedView
+
+from ._bench import scratch_database, synthetic_articles
+
+# (label, authenticator class, header scheme)
+AUTHENTICATORS = [
+    ('DRF token',       TokenAuthentication,            'Token'),
+    ('cached token',    CachedTokenAuthentication,      'Token'),
+    ('JWT + user row',  JWTAuthentication,              'Bearer'),
+    ('JWT stateless',   JWTStatelessUserAuthentication, 'Bearer'),
+]
+
+
+def measure(n, fn):
+    """(µs per call, queries per call) over `n` calls."""
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - start
+    return elapsed / n * 1e6, len(queries) / n
+
+
+class Command(BaseCommand):
+    help = "Per-request cost of each authentication path, alone and through /api/feed/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, requests, **options):
+        setup_test_environment()
+        with scratch_database():
+            upsert_articles(synthetic_articles(300))
+            user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+            credentials = {
+                'Token': Token.objects.create(user=user).key,
+                'Bearer': str(RefreshToken.for_user(user).access_token),
+            }
+            token_cache().clear()
+            self.authenticate_only(requests, credentials)
+            self.through_view(requests // 10, credentials)
+            self.check_logout(credentials['Token'])
+
+    def authenticate_only(self, n, credentials):
+        factory = APIRequestFactory()
+        self.stdout.write(f"authenticate() alone, {n} requests:")
+        for label, authenticator, scheme in AUTHENTICATORS:
+            header = f'{scheme} {credentials[scheme]}'
+
+            def call():
+                request = Request(factory.get('/', HTTP_AUTHORIZATION=header), authenticators=[authenticator()])
+                assert request.user.id is not None
+
+            call()  # warm the cache where there is one
+            micros, queries = measure(n, call)
+            self.stdout.write(f"  {label:16} {micros:8.1f} µs  {queries:.2f} queries")
+
+    def through_view(self, n, credentials):
+        client = Client()
+        self.stdout.write(f"GET /nubuzz/api/feed/, {n} requests (one indexed feed read each):")
+        configured = PersonalFeedView.authentication_classes
+        for label, authenticators, scheme in [('DRF token', [TokenAuthentication], 'Token'),
+                                              ('cached token', configured, 'Token'),
+                                              ('JWT stateless', configured, 'Bearer')]:
+            header = f'{scheme} {credentials[scheme]}'
+
+            def call():
+                response = client.get('/nubuzz/api/feed/', HTTP_AUTHORIZATION=header)
+                assert response.status_code == 200, response.status_code
+
+            PersonalFeedView.authentication_classes = authenticators
+            try:
+                call()
+                micros, queries = measure(n, call)
+            finally:
+                PersonalFeedView.authentication_classes = configured
+            self.stdout.write(f"  {label:16} {micros / 1000:8.2f} ms  {queries:.2f} queries")
+
+    def check_logout(self, key):
+        client = Client()
+        header = f'Token {key}'
+        before = client.get('/nubuzz/api/feed/', HTTP_AUTHORIZATION=header).status_code
+        client.post('/nubuzz/api/logout/', HTTP_AUTHORIZATION=header)
+        after = client.get('/nubuzz/api/feed/', HTTP_AUTHORIZATION=header).status_code
+        self.stdout.write(f"logout: feed answered {before} before, {after} after with the same token")
+        if (before, after) != (200, 401):
+            raise CommandError("Cached token survived logout")
@@ -0,0 +1,143 @@
+# nubuzz/management/commands/bench_db.py
+
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article
+from nubuzz.newsapi import CATEGORIES
+from nubuzz.views import CARD_FIELDS
+
+from ._bench import scratch_database, synthetic_articles
+
+# Connection setups compared per backend: the stock one, then the
+# configured one from settings.DATABASES.
+PROFILES = {
+    'sqlite': {
+        'stock': {'OPTIONS': {}, 'CONN_MAX_AGE': 0},
+        'tuned': None,
+    },
+    'postgresql': {
+        'connect per request': {'OPTIONS': {}, 'CONN_MAX_AGE': 0},
+        'pooled': None,
+    },
+}
+
+
+class Workload:
+    """Feed-page readers and ingest writers hammering one database until `deadline`."""
+
+    def __init__(self, deadline, batch_size):
+        self.deadline = deadline
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.reads, self.writes = [], []
+        self.errors = {'read': 0, 'write': 0}
+
+    def request(self, kind, fn, timings):
+        """One unit of work bracketed like a request: connections are recycled afterwards."""
+        start = time.perf_counter()
+        try:
+            fn()
+        except OperationalError:    # "database is locked"
+            with self.lock:
+                self.errors[kind] += 1
+        else:
+            with self.lock:
+                timings.append(time.perf_counter() - start)
+        finally:
+            close_old_connections()
+
+    def reader(self, n):
+        try:
+            i = n
+            while time.perf_counter() < self.deadline:
+                category = CATEGORIES[i % len(CATEGORIES)]
+                i += 1
+                self.request('read', lambda: list(
+                    Article.objects.filter(category=category, duplicate_of__isnull=True)
+                    .order_by('-published_at', '-id').values(*CARD_FIELDS)[:50]
+                ), self.reads)
+        finally:
+            connection.close()
+
+    def writer(self, n):
+        try:
+            batch = 0
+            while time.perf_counter() < self.deadline:
+                raw = synthetic_articles(self.batch_size, seed=batch,
+                                         url_prefix=f'https://example.com/bench-db/{n}/{batch}')
+                category = CATEGORIES[batch % len(CATEGORIES)]
+                batch += 1
+                self.request('write', lambda: upsert_articles(raw, category), self.writes)
+        finally:
+            connection.close()
+
+
+def percentile(timings, q):
+    return sorted(timings)[min(len(timings) - 1, int(len(timings) * q))] if timings else float('nan')
+
+
+class Command(BaseCommand):
+    help = ("Concurrent feed reads and ingest writes against the configured database, "
+            "with the stock connection setup and with the tuned / pooled one.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=50, help="Articles per ingest batch.")
+        parser.add_argument('--seed', type=int, default=5000, help="Articles stored before the run.")
+
+    def handle(self, *args, seconds, readers, writers, batch_size, seed, **options):
+        vendor = connection.vendor
+        if vendor not in PROFILES:
+            raise CommandError(f"No benchmark profiles for {vendor}")
+        self.stdout.write(f"{vendor}: {readers} readers, {writers} writers × {batch_size}-article batches, "
+                          f"{seconds:g}s per profile")
+        configured = {key: connection.settings_dict[key] for key in ('OPTIONS', 'CONN_MAX_AGE')}
+        try:
+            for name, profile in PROFILES[vendor].items():
+                self.use(profile or configured)
+                with scratch_database():
+                    for offset in range(0, seed, 500):
+                        raw = synthetic_articles(500, seed=offset, url_prefix=f'https://example.com/seed/{offset}')
+                        upsert_articles(raw, CATEGORIES[offset // 500 % len(CATEGORIES)])
+                    close_old_connections()
+                    self.report(name, self.run(seconds, readers, writers, batch_size), batch_size, seconds)
+        finally:
+            self.use(configured)
+
+    def use(self, profile):
+        """Point every connection opened from now on at `profile`."""
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()     # rebuilt with the new options on next use
+        connection.settings_dict.update(profile)
+        settings.DATABASES[connection.alias].update(profile)
+
+    def run(self, seconds, readers, writers, batch_size):
+        workload = Workload(time.perf_counter() + seconds, batch_size)
+        threads = [threading.Thread(target=workload.reader, args=(n,)) for n in range(readers)]
+        threads += [threading.Thread(target=workload.writer, args=(n,)) for n in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return workload
+
+    def report(self, name, workload, batch_size, seconds):
+        reads, writes = workload.reads, workload.writes
+        self.stdout.write(
+            f"  {name:20} reads {len(reads) / seconds:7.1f}/s "
+            f"(p50 {statistics.median(reads) * 1000 if reads else float('nan'):6.1f} ms, "
+            f"p99 {percentile(reads, 0.99) * 1000:7.1f} ms)  "
+            f"ingest {len(writes) * batch_size / seconds:6.0f} articles/s "
+            f"(p50 batch {statistics.median(writes) * 1000 if writes else float('nan'):6.1f} ms)  "
+            f"locked: {workload.errors['read']} reads, {workload.errors['write']} writes"
+        )
@@ -0,0 +1,124 @@
+# nubuzz/management/commands/bench_dedupe.py
+
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from nubuzz import dedupe
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article
+
+from ._bench import SOURCES, WORDS, scratch_database
+
+VOCAB = WORDS + [f'{w}{n}' for n, w in zip(range(5000), ['zeph', 'quor', 'bas', 'lant'] * 1250)]
+
+
+def corpus(count, dup_rate, seed):
+    """
+    (titles, descriptions, story ids): `count` articles of which roughly
+    `dup_rate` are rewritten copies of an earlier story, the way wire
+    copy gets re-headlined and lightly edited by each outlet.
+    """
+    rng = random.Random(seed)
+    titles, descriptions, stories = [], [], []
+    originals = []
+    for i in range(count):
+        if originals and rng.random() < dup_rate:
+            story = rng.choice(originals)
+            title, description = titles[story].split(), descriptions[story].split()
+            if rng.random() < 0.3:
+                # New headline over the same body.
+                title = rng.choices(VOCAB, k=len(title))
+            for _ in range(rng.randint(0, 3)):
+                description[rng.randrange(len(description))] = rng.choice(VOCAB)
+            titles.append(' '.join(title))
+            descriptions.append(' '.join(description))
+            stories.append(stories[story])
+        else:
+            titles.append(' '.join(rng.choices(VOCAB, k=8)))
+            descriptions.append(' '.join(rng.choices(VOCAB, k=25)))
+            stories.append(i)
+            originals.append(i)
+    return titles, descriptions, stories
+
+
+def pair_scores(predicted, truth):
+    """Pairwise precision and recall of a clustering against the true stories."""
+    def pairs(counts):
+        return sum(n * (n - 1) // 2 for n in counts.values())
+
+    both = pairs(Counter(zip(predicted, truth)))
+    found, actual = pairs(Counter(predicted)), pairs(Counter(truth))
+    return (both / found if found else 1.0), (both / actual if actual else 1.0)
+
+
+class Command(BaseCommand):
+    help = "Benchmark MinHash/LSH near-duplicate clustering and check its precision/recall."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000)
+        parser.add_argument('--dup-rate', type=float, default=0.3)
+        parser.add_argument('--ingest-count', type=int, default=10_000,
+                            help="Articles pushed through upsert_articles in a scratch DB.")
+        parser.add_argument('--min-precision', type=float, default=0.95)
+        parser.add_argument('--min-recall', type=float, default=0.9)
+
+    def handle(self, *args, count, dup_rate, ingest_count, min_precision, min_recall, **options):
+        titles, descriptions, stories = corpus(count, dup_rate, seed=5)
+        hasher = dedupe.MinHasher(num_perm=dedupe.settings.DEDUPE_NUM_PERM)
+
+        start = time.perf_counter()
+        sigs = hasher.signatures([dedupe.story_text(t, d) for t, d in zip(titles, descriptions)])
+        hashed = time.perf_counter() - start
+        start = time.perf_counter()
+        roots = dedupe.cluster(sigs, dedupe.settings.DEDUPE_BANDS, dedupe.settings.DEDUPE_THRESHOLD)
+        clustered = time.perf_counter() - start
+
+        precision, recall = pair_scores(roots.tolist(), stories)
+        self.stdout.write(
+            f"{count} articles, {len(set(stories))} stories: "
+            f"signatures {hashed:.2f}s ({count / hashed:,.0f}/s), LSH+cluster {clustered:.2f}s, "
+            f"{len(set(roots.tolist()))} clusters"
+        )
+        self.stdout.write(f"pairwise precision {precision:.3f}  recall {recall:.3f}")
+
+        if ingest_count:
+            self.bench_ingest(titles[:ingest_count], descriptions[:ingest_count], stories[:ingest_count])
+
+        if precision < min_precision or recall < min_recall:
+            raise CommandError(
+                f"Clustering quality below target (precision >= {min_precision}, recall >= {min_recall})."
+            )
+
+    def bench_ingest(self, titles, descriptions, stories):
+        """Same corpus through the real ingest path, one NewsAPI-sized batch at a time."""
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        raw = [
+            {
+                'source':      {'id': None, 'name': SOURCES[i % len(SOURCES)]},
+                'title':       title,
+                'description': description,
+                'content':     description,
+                'url':         f'https://example.com/dedupe/{i}',
+                'publishedAt': (base + timedelta(seconds=i)).isoformat().replace('+00:00', 'Z'),
+            }
+            for i, (title, description) in enumerate(zip(titles, descriptions))
+        ]
+        with scratch_database(), override_settings(SUMMARIZE_ON_INGEST=False):
+            start = time.perf_counter()
+            for offset in range(0, len(raw), 100):
+                upsert_articles(raw[offset:offset + 100])
+            elapsed = time.perf_counter() - start
+
+            rows = dict(Article.objects.values_list('url', 'duplicate_of__url'))
+            heads = [rows[a['url']] or a['url'] for a in raw]
+            precision, recall = pair_scores(heads, stories)
+            duplicates = sum(1 for head in rows.values() if head)
+        self.stdout.write(
+            f"ingest: {len(raw)} articles in {elapsed:.2f}s ({len(raw) / elapsed:,.0f}/s), "
+            f"{duplicates} marked duplicate, precision {precision:.3f}  recall {recall:.3f}"
+        )
@@ -0,0 +1,92 @@
+# nubuzz/management/commands/bench_enrich.py
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from nubuzz import enrich
+from nubuzz.models import Article
+
+from ._bench import WORDS, scratch_database, synthetic_articles
+
+PLACES = ['London', 'New York', 'Tokyo', 'Paris', 'Berlin', 'Toronto', 'Mumbai', 'Beijing', 'Sydney']
+NEUTRAL_WORDS = [w for w in WORDS if w not in enrich.LEXICON]
+POSITIVE = [w for w, v in enrich.LEXICON.items() if v > 0]
+NEGATIVE = [w for w, v in enrich.LEXICON.items() if v < 0]
+
+
+def texts(count, seed=3):
+    """Synthetic (titles, descriptions, contents) mixing in lexicon words and places."""
+    rng = random.Random(seed)
+
+    def mix(n):
+        words = rng.choices(NEUTRAL_WORDS, k=n)
+        tone = rng.choice((POSITIVE, NEGATIVE, NEUTRAL_WORDS))
+        for _ in range(max(1, n // 10)):
+            words[rng.randrange(n)] = rng.choice(tone)
+        if rng.random() < 0.1:
+            words[rng.randrange(n)] = 'not'
+        if rng.random() < 0.6:
+            words[rng.randrange(n)] = rng.choice(PLACES)
+        return ' '.join(words)
+
+    return ([mix(8) for _ in range(count)], [mix(25) for _ in range(count)],
+            [mix(60) for _ in range(count)])
+
+
+class Command(BaseCommand):
+    help = "Benchmark the vectorized sentiment/location enrichment stage (articles/sec on CPU)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--db-count', type=int, default=20_000,
+                            help="Rows enriched end to end in a scratch DB.")
+
+    def handle(self, *args, count, batch_size, db_count, **options):
+        titles, descriptions, contents = texts(count)
+
+        start = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            window = slice(offset, offset + batch_size)
+            enrich.analyze(titles[window], descriptions[window], contents[window])
+        batched = time.perf_counter() - start
+
+        # Same code one article at a time, as a request-path hook would run it.
+        sample = min(count, 5000)
+        start = time.perf_counter()
+        for i in range(sample):
+            enrich.analyze(titles[i:i + 1], descriptions[i:i + 1], contents[i:i + 1])
+        single = (time.perf_counter() - start) / sample * count
+
+        self.stdout.write(f"analyze, batches of {batch_size}: {count / batched:10,.0f} articles/s")
+        self.stdout.write(f"analyze, one at a time:     {count / single:10,.0f} articles/s")
+
+        if db_count:
+            self.bench_db(db_count, batch_size)
+
+    def bench_db(self, count, batch_size):
+        raw = synthetic_articles(count, seed=9)
+        titles, descriptions, contents = texts(count, seed=9)
+        with scratch_database():
+            with transaction.atomic():
+                Article.objects.bulk_create([
+                    Article(title=t, description=d, content=c, url=a['url'],
+                            published_at=a['publishedAt'], content_hash=str(i))
+                    for i, (a, t, d, c) in enumerate(zip(raw, titles, descriptions, contents))
+                ], batch_size=500)
+
+            start = time.perf_counter()
+            done = enrich.enrich_articles(batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            again = enrich.enrich_articles(batch_size=batch_size)
+            sentiments = dict(
+                (s, Article.objects.filter(sentiment=s).count()) for s in ('positive', 'neutral', 'negative')
+            )
+            located = Article.objects.exclude(location='unknown').count()
+        self.stdout.write(
+            f"enrich_articles (DB read + write): {done / elapsed:,.0f} articles/s; "
+            f"re-run touched {again} rows; {sentiments}; {located} located"
+        )
@@ -0,0 +1,101 @@
+# nubuzz/management/commands/bench_export.py
+
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from nubuzz.models import Article
+from nubuzz.renderers import dumps
+from nubuzz.serializers import ArticleSerializer
+from nubuzz.views import article_list
+
+from ._bench import scratch_database, synthetic_articles
+
+SEED_BATCH = 5000
+
+
+def seed(count):
+    base = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    template = synthetic_articles(SEED_BATCH)
+    with transaction.atomic():
+        for start in range(0, count, SEED_BATCH):
+            Article.objects.bulk_create([
+                Article(
+                    source_name=raw['source']['name'], author=raw['author'], title=raw['title'],
+                    description=raw['description'], content=raw['content'],
+                    url=f'https://example.com/export/{i}', url_to_image=raw['urlToImage'],
+                    published_at=base + timedelta(seconds=i), category='general', location='us',
+                )
+                for i, raw in zip(range(start, min(start + SEED_BATCH, count)), template)
+            ])
+
+
+def in_memory_export():
+    """What a single giant JSON response costs: every row, then one encode."""
+    rows = Article.objects.order_by('-published_at', '-id').values(*ArticleSerializer.Meta.fields)
+    body = dumps(ArticleSerializer(rows, many=True).data)
+    return len(body), body.count(b'"id":')
+
+
+def streamed_export(first_byte):
+    request = RequestFactory().get('/nubuzz/api/news/', {'format': 'ndjson'})
+    response = async_to_sync(article_list)(request)
+    size = lines = 0
+    for chunk in response.streaming_content:
+        if not size:
+            first_byte.append(time.perf_counter())
+        size += len(chunk)
+        lines += chunk.count(b'\n')
+    assert response['Content-Type'] == 'application/x-ndjson'
+    return size, lines
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        size, rows = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, rows, time.perf_counter() - start, start, peak
+
+
+class Command(BaseCommand):
+    help = "Export a large feed as NDJSON and check that peak memory stays bounded."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200_000)
+        parser.add_argument('--max-peak-mb', type=float, default=32,
+                            help="Fail if the streamed export's traced peak exceeds this.")
+
+    def handle(self, *args, count, max_peak_mb, **options):
+        with scratch_database():
+            seed(count)
+            self.stdout.write(f"Seeded {count:,} articles")
+
+            first_byte = []
+            size, rows, seconds, start, peak = measure(streamed_export, first_byte)
+            self.stdout.write(
+                f"ndjson stream:  {rows:,} rows, {size / 2**20:6.1f} MiB in {seconds:5.2f}s, "
+                f"first byte after {(first_byte[0] - start) * 1000:6.1f} ms, "
+                f"peak {peak / 2**20:6.1f} MiB"
+            )
+            streamed_peak = peak
+
+            size, rows, seconds, start, peak = measure(in_memory_export)
+            self.stdout.write(
+                f"one JSON body:  {rows:,} rows, {size / 2**20:6.1f} MiB in {seconds:5.2f}s, "
+                f"first byte after {seconds * 1000:6.1f} ms, peak {peak / 2**20:6.1f} MiB"
+            )
+
+        if rows != count:
+            raise CommandError(f"Expected {count} rows, exported {rows}")
+        if streamed_peak > max_peak_mb * 2**20:
+            raise CommandError(f"Streamed export peaked at {streamed_peak / 2**20:.1f} MiB "
+                               f"(limit {max_peak_mb} MiB)")
@@ -0,0 +1,42 @@
+# nubuzz/management/commands/bench_fetch.py
+
+from django.core.management.base import BaseCommand
+
+from nubuzz.fetcher import refresh_categories
+from nubuzz.ingest import upsert_articles
+from nubuzz.newsapi import CATEGORIES, fetch_top_headlines
+
+from ._bench import scratch_database, stub_newsapi, timed
+
+
+def serial_refresh(categories, pages):
+    """The old shape: one blocking request after another, then write."""
+    for category in categories:
+        for page in range(1, pages + 1):
+            upsert_articles(fetch_top_headlines(category=category, page=page), category=category)
+
+
+class Command(BaseCommand):
+    help = "Benchmark a full multi-category refresh against a local stub NewsAPI."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=0.3,
+                            help="Simulated upstream latency per request, in seconds.")
+        parser.add_argument('--pages', type=int, default=2)
+
+    def handle(self, *args, latency, pages, **options):
+        calls = len(CATEGORIES) * pages
+        results = {}
+        with stub_newsapi(latency=latency) as server:
+            with scratch_database(), timed(results, 'serial'):
+                serial_refresh(CATEGORIES, pages)
+            serial_requests = server.requests
+
+            with scratch_database(), timed(results, 'concurrent'):
+                counts = refresh_categories(CATEGORIES, pages=pages)
+            concurrent_requests = server.requests - serial_requests
+
+        self.stdout.write(f"{calls} upstream calls at {latency * 1000:.0f} ms each "
+                          f"(sum {calls * latency:.2f}s, max {latency:.2f}s)")
+        self.stdout.write(f"    serial     {results['serial']:6.2f}s  ({serial_requests} requests)")
+        self.stdout.write(f"    concurrent {results['concurrent']:6.2f}s  ({concurrent_requests} requests) {counts}")
@@ -0,0 +1,77 @@
+# nubuzz/management/commands/bench_ingest.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from nubuzz.dedupe import cluster_new_articles
+from nubuzz.enrich import enrich_articles
+from nubuzz.ingest import normalize_article, upsert_articles
+from nubuzz.models import Article
+from nubuzz.personalize import add_to_feeds
+from nubuzz.summarizer import enqueue
+
+from ._bench import scratch_database, synthetic_articles, timed
+
+
+def legacy_ingest(raw_articles):
+    """
+    The pre-bulk path: one update_or_create (SELECT + write) per headline,
+    followed by the same ingest stages upsert_articles runs, so both sides
+    of the comparison do the same work.
+    """
+    created_ids, changed_ids = [], []
+    with transaction.atomic():
+        for raw in raw_articles:
+            values = normalize_article(raw)
+            if values is None:
+                continue
+            url = values.pop('url')
+            article, created = Article.objects.update_or_create(url=url, defaults=values)
+            changed_ids.append(article.id)
+            if created:
+                created_ids.append(article.id)
+        if settings.ENRICH_ON_INGEST:
+            enrich_articles(Article.objects.filter(id__in=changed_ids))
+        if created_ids:
+            if settings.DEDUPE_ON_INGEST:
+                cluster_new_articles(created_ids)
+            add_to_feeds(created_ids)
+            if settings.SUMMARIZE_ON_INGEST:
+                enqueue(created_ids, on_demand=False)
+
+
+class Command(BaseCommand):
+    help = "Benchmark article ingestion: per-row update_or_create vs. bulk upsert."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10_000)
+        parser.add_argument('--changed', type=float, default=0.1,
+                            help="Fraction of rows modified for the re-ingest pass.")
+
+    def handle(self, *args, count, changed, **options):
+        fresh = synthetic_articles(count, seed=1)
+        reingest = [dict(raw) for raw in fresh]
+        for raw in reingest[:int(count * changed)]:
+            raw['title'] += ' (updated)'
+
+        timings = {}
+        for label, ingest in (('before', legacy_ingest), ('after', upsert_articles)):
+            results = timings[label] = {}
+            with scratch_database():
+                with timed(results, 'insert'):
+                    ingest(fresh)
+                with timed(results, 'reingest'):
+                    ingest(reingest)
+                assert Article.objects.count() == count
+
+            for phase in ('insert', 'reingest'):
+                self.stdout.write(
+                    f"{label:>6} {phase:<9} {count:>7} rows  "
+                    f"{results[phase]:8.3f}s  {count / results[phase]:>10.0f} rows/s"
+                )
+
+        slower = [phase for phase in ('insert', 'reingest')
+                  if timings['after'][phase] >= timings['before'][phase]]
+        if slower:
+            raise CommandError(f"Bulk upsert is not faster than the per-row path for: {', '.join(slower)}")
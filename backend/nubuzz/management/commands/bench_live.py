@@ -0,0 +1,152 @@
+# nubuzz/management/commands/bench_live.py
+
+import asyncio
+import statistics
+import threading
+import time
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from nubuzz.ingest import upsert_articles
+from nubuzz.live import broadcaster
+from nubuzz.models import Article
+
+from ._bench import scratch_database, synthetic_articles
+
+FILTERS = ['', 'category=business', 'location=gb', 'category=technology&location=us', 'category=sports']
+CATEGORIES = ['business', 'technology', 'sports', 'health']
+
+
+async def sse_client(app, query, received, stop, last_event_id=None):
+    """
+    One EventSource connected to the ASGI app in-process; records
+    (article id, arrival time) for every event until `stop` is set.
+    """
+    headers = [(b'host', b'localhost')]
+    if last_event_id is not None:
+        headers.append((b'last-event-id', str(last_event_id).encode()))
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/nubuzz/api/news/live/',
+        'raw_path': b'/nubuzz/api/news/live/', 'query_string': query.encode(), 'root_path': '',
+        'headers': headers, 'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    requested = []
+    buffer = bytearray()
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await stop.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] != 'http.response.body':
+            return
+        buffer.extend(message.get('body', b''))
+        while b'\n\n' in buffer:
+            block, _, rest = bytes(buffer).partition(b'\n\n')
+            buffer[:] = rest
+            if block.startswith(b'id: '):
+                received.append((int(block.split(b'\n', 1)[0][4:]), time.perf_counter()))
+
+    await app(scope, receive, send)
+
+
+def write_batches(batches, batch_size, pause, committed):
+    """Ingest from another thread, as `ingest_news` would from another process."""
+    try:
+        raw = synthetic_articles(batches * batch_size, seed=7, url_prefix='https://example.com/live')
+        for b in range(batches):
+            time.sleep(pause)
+            chunk = raw[b * batch_size:(b + 1) * batch_size]
+            upsert_articles([{**r, 'category': CATEGORIES[i % len(CATEGORIES)]} for i, r in enumerate(chunk)])
+            now = time.perf_counter()
+            committed.update((r['url'], now) for r in chunk)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Connect many SSE clients to /api/news/live/ while articles are ingested; check delivery and DB polls."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--batches', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=0.25, help="LIVE_POLL_INTERVAL for the run.")
+
+    def handle(self, *args, clients, batches, batch_size, interval, **options):
+        with scratch_database(), override_settings(LIVE_POLL_INTERVAL=interval, SUMMARIZE_ON_INGEST=False):
+            upsert_articles(synthetic_articles(100))
+            resume_from = Article.objects.order_by('-id').values_list('id', flat=True)[50]
+            results = asyncio.run(self.run(clients, batches, batch_size, interval, resume_from))
+            self.verify(clients, *results, resume_from=resume_from, interval=interval)
+
+    async def run(self, clients, batches, batch_size, interval, resume_from):
+        app = ASGIHandler()
+        stop = asyncio.Event()
+        received = [[] for _ in range(clients)]
+        tasks = [
+            asyncio.ensure_future(sse_client(app, FILTERS[i % len(FILTERS)], received[i], stop))
+            for i in range(clients)
+        ]
+        replayed = []
+        tasks.append(asyncio.ensure_future(sse_client(app, '', replayed, stop, last_event_id=resume_from)))
+        while len(broadcaster().subscribers) < clients + 1:
+            await asyncio.sleep(0.01)
+        hub = broadcaster()
+        polls = hub.polls
+
+        committed = {}
+        start = time.perf_counter()
+        writer = threading.Thread(target=write_batches, args=(batches, batch_size, interval, committed))
+        writer.start()
+        while writer.is_alive():
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(interval * 3)
+        elapsed = time.perf_counter() - start
+        polls = hub.polls - polls
+
+        stop.set()
+        await asyncio.gather(*tasks)
+        return received, replayed, committed, polls, elapsed, len(hub.subscribers)
+
+    def verify(self, clients, received, replayed, committed, polls, elapsed, left, resume_from, interval):
+        rows = list(Article.objects.filter(url__in=committed, duplicate_of__isnull=True)
+                    .values_list('id', 'url', 'category', 'location'))
+        by_id = {pk: committed[url] for pk, url, _, _ in rows}
+        missing = extra = 0
+        latencies = []
+        for i, events in enumerate(received):
+            params = dict(p.split('=') for p in FILTERS[i % len(FILTERS)].split('&') if p)
+            expected = {pk for pk, _, category, location in rows
+                        if params.get('category', category) == category and params.get('location', location) == location}
+            got = [pk for pk, _ in events]
+            missing += len(expected - set(got))
+            extra += len(set(got) - expected) + len(got) - len(set(got))
+            latencies += [at - by_id[pk] for pk, at in events if pk in by_id]
+
+        backlog = sorted(Article.objects.filter(id__gt=resume_from, duplicate_of__isnull=True)
+                         .exclude(url__in=committed).values_list('id', flat=True))
+        replay_ok = [pk for pk, _ in replayed][:len(backlog)] == backlog
+
+        self.stdout.write(
+            f"{clients} clients, {len(rows)} new stories over {elapsed:.1f}s: "
+            f"{sum(map(len, received)):,} events delivered, {missing} missing, {extra} unexpected"
+        )
+        self.stdout.write(
+            f"delivery latency after commit: p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"max {max(latencies) * 1000:.0f} ms"
+        )
+        self.stdout.write(
+            f"DB polls: {polls} shared (per-client polling would be ~{int(clients * elapsed / interval):,})"
+        )
+        self.stdout.write(f"Last-Event-ID replay of {len(backlog)} stories: {'ok' if replay_ok else 'WRONG'}; "
+                          f"{left} subscribers left after disconnect")
+        if missing or extra or not replay_ok or left:
+            raise CommandError("Live stream delivered the wrong events.")
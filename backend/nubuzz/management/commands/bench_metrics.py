@@ -0,0 +1,147 @@
+# nubuzz/management/commands/bench_metrics.py
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment
+from prometheus_client.parser import text_string_to_metric_families
+
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article
+
+from ._bench import scratch_database, stub_newsapi, synthetic_articles
+
+
+class Captured(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def scrape(client):
+    """{(metric name, frozenset of labels): value} from /metrics."""
+    text = client.get('/metrics').content.decode()
+    return {
+        (sample.name, frozenset(sample.labels.items())): sample.value
+        for family in text_string_to_metric_families(text) for sample in family.samples
+    }
+
+
+def delta(before, after, name, **labels):
+    key = (name, frozenset(labels.items()))
+    return after.get(key, 0) - before.get(key, 0)
+
+
+class Command(BaseCommand):
+    help = ("Check what /metrics records for the instrumented views (sync and async paths), "
+            "the slow-request log, and the middleware's per-request overhead.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests for the overhead measurement.")
+
+    def handle(self, *args, requests, **options):
+        setup_test_environment()
+        failures = []
+        with scratch_database(), override_settings(SUMMARIZE_ON_INGEST=False, SUMMARY_POLL_INTERVAL=0.05):
+            upsert_articles(synthetic_articles(200), 'general')
+            failures += self.views()
+            failures += self.slow_log()
+            self.overhead(requests)
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} metrics check(s) failed")
+
+    def views(self):
+        failures = []
+        client = Client()
+        pk = Article.objects.values_list('id', flat=True).first()
+
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        before = scrape(client)
+        with connection.execute_wrapper(count):
+            client.get(f'/nubuzz/api/news/{pk}/')
+        after = scrape(client)
+        counted = delta(before, after, 'nubuzz_request_db_queries_sum', view='news-detail')
+        self.stdout.write(f"article detail (sync view): {counted:.0f} queries recorded, {len(queries)} executed")
+        if counted != len(queries) or not delta(before, after, 'nubuzz_request_stage_seconds_count',
+                                                view='news-detail', stage='serialize'):
+            failures.append("detail view: query count or serialize stage missing")
+
+        # Async views run their queries on sync_to_async threads' connections.
+        before = scrape(client)
+        asyncio.run(AsyncClient().get('/nubuzz/api/news/?page_size=50'))
+        after = scrape(client)
+        counted = delta(before, after, 'nubuzz_request_db_queries_sum', view='news-list')
+        size = delta(before, after, 'nubuzz_response_bytes_sum', view='news-list')
+        self.stdout.write(f"article list (async view, ASGI): {counted:.0f} queries, {size:,.0f} bytes recorded")
+        if counted < 1 or size < 1000:
+            failures.append("async view: queries or response size not recorded")
+
+        with stub_newsapi(latency=0.05) as upstream:
+            before = scrape(client)
+            response = client.get('/nubuzz/fetch-news/?category=science')
+            after = scrape(client)
+        calls = delta(before, after, 'nubuzz_upstream_seconds_count', upstream='newsapi', outcome='ok')
+        refresh = delta(before, after, 'nubuzz_request_stage_seconds_sum', view='fetch_news', stage='refresh')
+        upstream_stage = delta(before, after, 'nubuzz_request_stage_seconds_sum', view='fetch_news', stage='upstream')
+        self.stdout.write(f"cold feed: {upstream.requests} NewsAPI call(s), {calls:.0f} recorded; "
+                          f"refresh {refresh * 1000:.0f} ms of which upstream {upstream_stage * 1000:.0f} ms")
+        if response.status_code != 200 or calls != upstream.requests or not 0 < upstream_stage <= refresh:
+            failures.append("fetch-news: upstream call or stages not recorded")
+
+        before = scrape(client)
+        client.get(f'/nubuzz/summary/{pk}/?wait=0.2')
+        after = scrape(client)
+        waited = delta(before, after, 'nubuzz_request_stage_seconds_sum', view='summarize_article', stage='summary_wait')
+        self.stdout.write(f"summary long-poll with no worker: waited {waited * 1000:.0f} ms (recorded)")
+        if not 0.15 < waited < 1:
+            failures.append("summarize_article: summary_wait stage not recorded")
+        return failures
+
+    def slow_log(self):
+        handler = Captured()
+        log = logging.getLogger('nubuzz.slow')
+        log.addHandler(handler)
+        try:
+            with override_settings(METRICS_SLOW_REQUEST_SECONDS=0.1):
+                client = Client()
+                pk = Article.objects.values_list('id', flat=True).first()
+                client.get('/nubuzz/api/news/?page_size=5')
+                client.get(f'/nubuzz/summary/{pk}/?wait=0.2')
+        finally:
+            log.removeHandler(handler)
+        messages = [record.getMessage() for record in handler.records]
+        for message in messages:
+            self.stdout.write(f"slow log: {message}")
+        if len(messages) != 1 or 'summary_wait=' not in messages[0]:
+            return ["slow-request log missed the slow request or logged a fast one"]
+        return []
+
+    def overhead(self, n):
+        def per_request(middleware):
+            with override_settings(MIDDLEWARE=middleware):
+                client = Client()
+                client.get('/nubuzz/api/news/?page_size=20')
+                start = time.perf_counter()
+                for _ in range(n):
+                    client.get('/nubuzz/api/news/?page_size=20')
+                return (time.perf_counter() - start) / n
+
+        without = [m for m in settings.MIDDLEWARE if m != 'nubuzz.metrics.MetricsMiddleware']
+        off, on = per_request(without), per_request(settings.MIDDLEWARE)
+        self.stdout.write(f"middleware overhead on a cached feed page: {(on - off) * 1e6:.0f} µs/request "
+                          f"({off * 1000:.2f} → {on * 1000:.2f} ms)")
@@ -0,0 +1,135 @@
+# nubuzz/management/commands/bench_query_plan.py
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from nubuzz.filters import ArticleFilter
+from nubuzz.models import Article
+from nubuzz.newsapi import CATEGORIES
+from nubuzz.pagination import KeysetPagination, encode_cursor
+from nubuzz.taxonomy import COUNTRY_CODES, feed_location
+from nubuzz.views import CARD_FIELDS
+
+from ._bench import SOURCES, scratch_database
+
+SEED_BATCH = 5000
+DUPLICATE_RATE = 0.3    # share of rows that are copies of an earlier story
+ENRICHED_RATE  = 0.2    # share whose text named another country than the feed's
+
+# (label, query string) of the feed requests checked, as the frontend sends them.
+REQUESTS = [
+    ('feed',                 {}),
+    ('feed, every copy',     {'duplicates': 'true'}),
+    ('category',             {'category': 'Sports'}),
+    ('location',             {'location': 'New York'}),
+    ('location, enriched',   {'location': 'London'}),
+]
+
+
+def seed(count):
+    """
+    Rows shaped like ingested ones: normalized categories, the feed's
+    country as location unless enrichment found another, and a share of
+    near-duplicates pointing at an earlier story.
+    """
+    rng = random.Random(8)
+    base = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    home = feed_location()
+    elsewhere = sorted(COUNTRY_CODES - {home})
+    with transaction.atomic():
+        for start in range(0, count, SEED_BATCH):
+            Article.objects.bulk_create([
+                Article(
+                    id=i + 1,
+                    title=f'Story {i}',
+                    url=f'https://example.com/seed/{i}',
+                    # Coarse timestamps so the id tie-break actually matters.
+                    published_at=base + timedelta(minutes=5 * (i // 3)),
+                    category=rng.choice(CATEGORIES),
+                    location=rng.choice(elsewhere) if rng.random() < ENRICHED_RATE else home,
+                    source_name=rng.choice(SOURCES),
+                    duplicate_of_id=(rng.randint(max(1, i - 50), i)
+                                     if i and rng.random() < DUPLICATE_RATE else None),
+                )
+                for i in range(start, min(start + SEED_BATCH, count))
+            ])
+
+
+def hot_queries(count):
+    """
+    (label, queryset, paged) for each feed query, built the way the views
+    build them: ArticleFilter over the request's parameters (which also
+    hides near-duplicates), card columns, then the keyset page.
+    """
+    paginator = KeysetPagination()
+    size = paginator.page_size
+    mid = Article.objects.order_by('id').only('id', 'published_at')[count // 2]
+    cursor = encode_cursor(mid.published_at, mid.id)
+    queries = []
+    for label, params in REQUESTS:
+        articles = ArticleFilter(params, queryset=Article.objects.all()).qs.values(*CARD_FIELDS)
+        queries.append((f'{label}, first page', paginator.page_queryset(articles, params, size), False))
+        queries.append((f'{label}, deep page',
+                        paginator.page_queryset(articles, {**params, 'cursor': cursor}, size), True))
+    return queries
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan, paged):
+    """
+    Full table scans or a separate sort step mean the index isn't doing its
+    job; a cursor page must also seek into the index rather than walk it.
+    """
+    problems = []
+    for step in plan:
+        if step.startswith('SCAN') and ('USING' not in step or paged):
+            problems.append(step)
+        if 'TEMP B-TREE' in step:
+            problems.append(step)
+    return problems
+
+
+class Command(BaseCommand):
+    help = "Seed a large Article table and assert via EXPLAIN QUERY PLAN that feed queries use indexes (SQLite)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, count, repeat, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("EXPLAIN QUERY PLAN checks are SQLite-specific.")
+
+        failures = []
+        with scratch_database():
+            start = time.perf_counter()
+            seed(count)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Seeded {count} articles in {time.perf_counter() - start:.1f}s")
+
+            for label, queryset, paged in hot_queries(count):
+                plan = query_plan(queryset)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    list(queryset._chain())
+                ms = (time.perf_counter() - start) / repeat * 1000
+
+                problems = plan_problems(plan, paged)
+                verdict = 'FAIL' if problems else 'ok'
+                self.stdout.write(f"  [{verdict:>4}] {label:<30} {ms:8.2f} ms   {' / '.join(plan)}")
+                if problems:
+                    failures.append(label)
+
+        if failures:
+            raise CommandError(f"Unindexed plans for: {', '.join(failures)}")
@@ -0,0 +1,154 @@
+# nubuzz/management/commands/bench_quota.py
+
+import logging
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import setup_test_environment
+
+from nubuzz.feedcache import DEGRADED_HEADER
+from nubuzz.ingest import upsert_articles
+from nubuzz.newsapi import CATEGORIES, BudgetExhausted, NewsAPIError, fetch_top_headlines
+from nubuzz.quota import UpstreamBudget, quota_cache, upstream_denied
+from nubuzz.scheduler import IngestScheduler
+
+from ._bench import scratch_database, stub_newsapi, synthetic_articles
+
+DAY = 24 * 60 * 60
+
+
+class FakeClock:
+    def __init__(self, now=1_750_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class Command(BaseCommand):
+    help = ("Drive the upstream rate limiter and daily budget with a fake clock and a stub NewsAPI: "
+            "bursts from many clients, upstream failures, budget exhaustion.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help="Distinct client IPs.")
+        parser.add_argument('--requests', type=int, default=300, help="Feed requests in the burst.")
+        parser.add_argument('--minutes', type=int, default=30, help="Simulated minutes of traffic.")
+
+    def handle(self, *args, clients, requests, minutes, **options):
+        setup_test_environment()
+        logging.disable(logging.WARNING)   # every upstream failure here is deliberate
+        failures = []
+        quota_cache().clear()
+        failures += self.buckets(clients, minutes)
+        with scratch_database():
+            upsert_articles([{**raw, 'category': 'general'} for raw in synthetic_articles(50)])
+            quota_cache().clear()
+            failures += self.burst(clients, requests)
+            quota_cache().clear()
+            failures += self.budget()
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} quota check(s) failed")
+
+    def buckets(self, clients, minutes):
+        """Simulated traffic at 10 requests/s, one fake second at a time."""
+        clock = FakeClock()
+        factory = RequestFactory()
+        rng = random.Random(1)
+        allowed, denied = Counter(), Counter()
+        seconds = minutes * 60
+        for _ in range(seconds):
+            for _ in range(10):
+                ip = f'10.0.0.{rng.randrange(clients)}'
+                reason = upstream_denied(factory.get('/', REMOTE_ADDR=ip), clock)
+                (denied if reason else allowed)[reason or ip] += 1
+            clock.sleep(1)
+
+        total = sum(allowed.values())
+        global_cap = settings.UPSTREAM_GLOBAL_BURST + settings.UPSTREAM_GLOBAL_RATE * seconds
+        ip_cap = settings.UPSTREAM_IP_BURST + settings.UPSTREAM_IP_RATE * seconds
+        self.stdout.write(
+            f"buckets: {seconds * 10:,} requests from {clients} IPs over {minutes} fake minutes → "
+            f"{total} allowed (global cap {global_cap:.0f}, busiest IP {max(allowed.values())} of {ip_cap:.0f}), "
+            f"denied {dict(denied)}"
+        )
+        failures = []
+        if total > global_cap:
+            failures.append(f"global bucket let {total} through, cap {global_cap:.0f}")
+        if max(allowed.values()) > ip_cap:
+            failures.append(f"per-IP bucket let {max(allowed.values())} through, cap {ip_cap:.0f}")
+        return failures
+
+    def burst(self, clients, requests):
+        """Cold-feed burst while NewsAPI errors, then once it recovers."""
+        client = Client()
+        cold = [c for c in CATEGORIES if c != 'general']
+        failures = []
+        with stub_newsapi() as upstream:
+            for status in (500, 429):
+                quota_cache().clear()
+                upstream.status, upstream.requests = status, 0
+                results = Counter()
+                for i in range(requests):
+                    response = client.get(f'/nubuzz/fetch-news/?category={cold[i % len(cold)]}',
+                                          REMOTE_ADDR=f'10.0.1.{i % clients}')
+                    results[response.status_code, response.get(DEGRADED_HEADER)] += 1
+                self.stdout.write(f"burst of {requests} against an upstream answering {status}: "
+                                  f"{upstream.requests} upstream calls, responses {dict(results)}")
+                if any(code != 200 or degraded is None for code, degraded in results):
+                    failures.append(f"upstream {status}: responses {dict(results)}")
+                cap = 1 if status == 429 else settings.UPSTREAM_GLOBAL_BURST + 1
+                if upstream.requests > cap:
+                    failures.append(f"upstream {status}: {upstream.requests} upstream calls, cap {cap}")
+
+            quota_cache().clear()
+            upstream.status = 200
+            response = client.get('/nubuzz/fetch-news/?category=science', REMOTE_ADDR='10.0.2.1')
+            recovered = response.status_code == 200 and not response.has_header(DEGRADED_HEADER) \
+                and response.content != b'[]'
+            self.stdout.write(f"after recovery: {'fresh page served' if recovered else 'STILL DEGRADED'}")
+            if not recovered:
+                failures.append("degraded page outlived the upstream failure")
+        return failures
+
+    def budget(self):
+        """Daily budget: per-day counter, shared by the ingest scheduler, reset at UTC midnight."""
+        failures = []
+        clock = FakeClock()
+        budget = UpstreamBudget(5, clock)
+        spent = sum(budget.spend() for _ in range(8))
+        clock.sleep(DAY)
+        if (spent, budget.remaining()) != (5, 5):
+            failures.append(f"budget spent {spent} of 5, {budget.remaining()} left the next day")
+
+        with stub_newsapi(daily_budget=5) as upstream, override_settings(NEWS_API_DAILY_BUDGET=5):
+            scheduler = IngestScheduler(CATEGORIES, interval=60, jitter=0,
+                                        fetch=fetch_top_headlines, clock=clock, sleep=clock.sleep)
+            scheduler.run_forever(max_polls=30)
+            exhausted = sum(p.failures > 0 for p in scheduler.pollers)
+            self.stdout.write(f"scheduler, budget 5: 30 polls → {upstream.requests} upstream calls, "
+                              f"{exhausted} categories backing off")
+            if upstream.requests != 5:
+                failures.append(f"scheduler made {upstream.requests} upstream calls on a budget of 5")
+
+            quota_cache().clear()
+            upstream.status, upstream.requests = 429, 0
+            outcomes = []
+            for _ in range(3):
+                try:
+                    fetch_top_headlines('science')
+                except BudgetExhausted:
+                    outcomes.append('budget')
+                except NewsAPIError as e:
+                    outcomes.append(e.code)
+            self.stdout.write(f"upstream 429: {upstream.requests} call(s), then {outcomes[1:]}")
+            if outcomes != ['rateLimited', 'budget', 'budget']:
+                failures.append(f"429 did not exhaust the budget: {outcomes}")
+        return failures
@@ -0,0 +1,149 @@
+# nubuzz/management/commands/bench_related.py
+
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from nubuzz import embeddings
+
+from ._bench import WORDS, sentence
+
+GENERATE_CHUNK = 100_000
+
+
+def clustered_vectors(count, dim, topics, rng):
+    """Unit vectors scattered around `topics` centres, like coverage of many stories."""
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    for start in range(0, count, GENERATE_CHUNK):
+        n = min(GENERATE_CHUNK, count - start)
+        vectors = centres[rng.integers(0, topics, n)] + 0.9 * rng.standard_normal((n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        yield vectors.astype(np.float16)
+
+
+def exact_top(index, query, k, exclude_row):
+    """Brute-force top k over every stored vector, for latency and recall baselines."""
+    scores = np.empty(index.count, dtype=np.float32)
+    for start in range(0, index.count, GENERATE_CHUNK):
+        scores[start:start + GENERATE_CHUNK] = (
+            np.asarray(index.vectors[start:start + GENERATE_CHUNK], dtype=np.float32) @ query
+        )
+    scores[exclude_row] = -np.inf
+    top = np.argpartition(-scores, k)[:k]
+    return {int(index.ids[i]) for i in top}
+
+
+def build_tiny_encoder(path):
+    """Randomly initialised few-layer BERT + word-level tokenizer; no network needed."""
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+    from transformers import BertConfig, BertModel, PreTrainedTokenizerFast
+
+    specials = ['[PAD]', '[UNK]', '[CLS]', '[SEP]']
+    tok = Tokenizer(models.WordLevel(unk_token='[UNK]'))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.train_from_iterator([' '.join(WORDS), ' '.join(w.capitalize() for w in WORDS)],
+                            trainers.WordLevelTrainer(special_tokens=specials))
+    tok.post_processor = processors.TemplateProcessing(
+        single='[CLS] $A [SEP]', special_tokens=[('[CLS]', 2), ('[SEP]', 3)],
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tok, cls_token='[CLS]', sep_token='[SEP]',
+        pad_token='[PAD]', unk_token='[UNK]', model_max_length=128,
+    )
+    # MiniLM-L6 shape: 6 layers, 384 hidden.
+    config = BertConfig(vocab_size=tokenizer.vocab_size, hidden_size=384, num_hidden_layers=6,
+                        num_attention_heads=12, intermediate_size=1536)
+    BertModel(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+class Command(BaseCommand):
+    help = "Benchmark related-article lookups (IVF vs. exact) on a large float16 memmap index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1_000_000)
+        parser.add_argument('--dim', type=int, default=384)
+        parser.add_argument('--topics', type=int, default=20_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 16, 32])
+        parser.add_argument('--embed-count', type=int, default=512,
+                            help="Texts pushed through a MiniLM-sized local encoder (0 to skip).")
+
+    def handle(self, *args, count, dim, topics, queries, nprobe, embed_count, **options):
+        rng = np.random.default_rng(7)
+        path = tempfile.mkdtemp(prefix='nubuzz-embeddings-')
+        try:
+            index = embeddings.EmbeddingIndex(path)
+            start = time.perf_counter()
+            next_id = 1
+            for vectors in clustered_vectors(count, dim, topics, rng):
+                index.append(np.arange(next_id, next_id + len(vectors)), vectors)
+                next_id += len(vectors)
+            self.stdout.write(f"Stored {count:,} × {dim} float16 vectors "
+                              f"({count * dim * 2 / 2**20:,.0f} MiB) in {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            index.train()
+            self.stdout.write(f"Trained {len(index.centroids)} IVF lists in {time.perf_counter() - start:.1f}s")
+
+            ids = rng.choice(index.ids, queries, replace=False)
+            exact_sample = ids[:max(1, queries // 10)]
+            start = time.perf_counter()
+            truth = {int(pk): exact_top(index, np.asarray(index.vectors[index.row_of(pk)], dtype=np.float32),
+                                        10, index.row_of(pk))
+                     for pk in exact_sample}
+            exact_ms = (time.perf_counter() - start) / len(exact_sample) * 1000
+            self.stdout.write(f"exact scan         {exact_ms:8.2f} ms/lookup")
+
+            for probes in nprobe:
+                latencies, recall = [], []
+                for pk in ids.tolist():
+                    row = index.row_of(pk)
+                    start = time.perf_counter()
+                    hits = index.search(index.vectors[row], 10, nprobe=probes, exclude_row=row)
+                    latencies.append(time.perf_counter() - start)
+                    if pk in truth:
+                        recall.append(len(truth[pk] & {h for h, _ in hits}) / 10)
+                latencies = np.array(latencies) * 1000
+                self.stdout.write(
+                    f"ivf nprobe={probes:<4}   p50 {np.percentile(latencies, 50):6.2f} ms  "
+                    f"p99 {np.percentile(latencies, 99):6.2f} ms  recall@10 {np.mean(recall):.3f}"
+                )
+
+            # Incremental add: new rows are filed under existing lists and
+            # visible to the next lookup without retraining.
+            batch = next(clustered_vectors(1000, dim, topics, rng))
+            start = time.perf_counter()
+            index.append(np.arange(next_id, next_id + len(batch)), batch)
+            self.stdout.write(f"append 1,000 vectors {1000 * (time.perf_counter() - start):.1f} ms")
+            hits = index.search(batch[0], 1, exclude_row=None)
+            self.stdout.write(f"new row found by its own query: {hits[0][0] == next_id}")
+        finally:
+            shutil.rmtree(path)
+
+        if embed_count:
+            self.bench_embed(embed_count)
+
+    def bench_embed(self, count):
+        path = tempfile.mkdtemp(prefix='nubuzz-tiny-encoder-')
+        try:
+            build_tiny_encoder(path)
+            rng = random.Random(1)
+            texts = [f'{sentence(rng, 8)}. {sentence(rng, 25)}' for _ in range(count)]
+            with override_settings(EMBEDDING_MODEL=path):
+                if hasattr(embeddings.get_embedder, 'model'):
+                    del embeddings.get_embedder.model
+                embeddings.embed_texts(texts[:8])     # load + warm up
+                start = time.perf_counter()
+                vectors = embeddings.embed_texts(texts)
+                elapsed = time.perf_counter() - start
+                del embeddings.get_embedder.model
+        finally:
+            shutil.rmtree(path)
+        self.stdout.write(f"embed (MiniLM-sized, random weights): {count / elapsed:,.0f} texts/s, "
+                          f"dim {vectors.shape[1]}")
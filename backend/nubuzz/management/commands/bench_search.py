@@ -0,0 +1,114 @@
+# nubuzz/management/commands/bench_search.py
+
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from nubuzz import search
+from nubuzz.models import Article
+
+from ._bench import WORDS, scratch_database
+
+SEED_BATCH = 5000
+
+# Zipf-distributed vocabulary: the benchmark's WORDS are the head, followed
+# by a long tail of rarer terms, like real news text.
+TAIL_SIZE = 20_000
+VOCAB = WORDS + [f'{w}{n}' for n, w in zip(range(TAIL_SIZE), itertools.cycle(('zeph', 'quor', 'bas', 'lant')))]
+CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCAB) + 1)))
+
+# Frequent term, mid-frequency term, rare term, two frequent terms, two
+# rare terms, and a term that matches nothing. icontains only wins when
+# LIMIT is satisfied early by very common terms; anything selective forces
+# it to scan the whole table.
+QUERIES = ['climate', 'bas2042', 'quor19997', 'court verdict', 'quor19997 zeph1001', 'xylophone']
+
+# The one query above that is expected to find nothing.
+NO_MATCH = 'xylophone'
+
+# Two rare terms rarely meet by chance on a small corpus, so seed() plants
+# them together in one article out of every NEEDLE_EVERY.
+NEEDLE = 'quor19997 zeph1001'
+NEEDLE_EVERY = 10_000
+
+
+def seed(count):
+    rng = random.Random(11)
+    base = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def text(n):
+        return ' '.join(rng.choices(VOCAB, cum_weights=CUM_WEIGHTS, k=n))
+
+    with transaction.atomic():
+        for start in range(0, count, SEED_BATCH):
+            Article.objects.bulk_create([
+                Article(
+                    title=text(8).capitalize(),
+                    description=text(25),
+                    content=text(60) + (f' {NEEDLE}' if i % NEEDLE_EVERY == 0 else ''),
+                    url=f'https://example.com/seed/{i}',
+                    published_at=base + timedelta(minutes=i),
+                )
+                for i in range(start, min(start + SEED_BATCH, count))
+            ])
+
+
+def icontains_search(query, limit):
+    """What a naive backend search would do: every term icontains any text column."""
+    queryset = Article.objects.all()
+    for term in search.search_terms(query):
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(description__icontains=term) | Q(content__icontains=term)
+        )
+    return list(queryset.order_by('-published_at').values_list('id', flat=True)[:limit])
+
+
+def fts_search(query, limit):
+    return search.search_articles(query, limit, fields=['id', 'title'])
+
+
+class Command(BaseCommand):
+    help = "Benchmark FTS5 search against icontains scans on a large synthetic corpus (SQLite)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500_000)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, count, limit, repeat, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The FTS5 index is SQLite-only.")
+
+        with scratch_database():
+            start = time.perf_counter()
+            seed(count)
+            self.stdout.write(f"Seeded {count} articles (+ FTS index via triggers) "
+                              f"in {time.perf_counter() - start:.1f}s")
+            if not search.fts_available():
+                raise CommandError("FTS table missing; was migration 0011 applied?")
+
+            self.stdout.write(f"{'query':<24} {'icontains':>12} {'fts5':>12}  hits")
+            mismatched = []
+            for query in QUERIES:
+                timings, hits = {}, {}
+                for label, fn in (('icontains', icontains_search), ('fts5', fts_search)):
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        hits[label] = len(fn(query, limit))
+                    timings[label] = (time.perf_counter() - start) / repeat * 1000
+                self.stdout.write(f"{query:<24} {timings['icontains']:10.1f}ms "
+                                  f"{timings['fts5']:10.1f}ms  {hits['icontains']}/{hits['fts5']}")
+                # Both searches are capped at `limit`, so on this corpus they
+                # must find the same number of rows; a fast search that finds
+                # nothing (e.g. an index that stopped following writes)
+                # proves nothing.
+                if hits['icontains'] != hits['fts5'] or bool(hits['fts5']) == (query == NO_MATCH):
+                    mismatched.append(query)
+
+            if mismatched:
+                raise CommandError(f"Wrong or mismatched hit counts for: {', '.join(mismatched)}")
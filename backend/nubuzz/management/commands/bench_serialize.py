@@ -0,0 +1,55 @@
+# nubuzz/management/commands/bench_serialize.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article
+from nubuzz.renderers import FastJSONRenderer, orjson
+from nubuzz.serializers import ArticleSerializer
+
+from ._bench import scratch_database, synthetic_articles
+
+
+class PerFieldArticleSerializer(serializers.ModelSerializer):
+    """ArticleSerializer as it was: DRF's per-field path for every row."""
+    class Meta:
+        model  = Article
+        fields = ArticleSerializer.Meta.fields
+
+
+def old_path(page_size):
+    rows = Article.objects.order_by('-published_at', '-id')[:page_size]
+    return JSONRenderer().render(PerFieldArticleSerializer(rows, many=True).data)
+
+
+def new_path(page_size):
+    rows = Article.objects.order_by('-published_at', '-id').values(*ArticleSerializer.Meta.fields)[:page_size]
+    return FastJSONRenderer().render(ArticleSerializer(rows, many=True).data)
+
+
+class Command(BaseCommand):
+    help = "Benchmark list serialization throughput for one page of articles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, page_size, repeat, **options):
+        with scratch_database():
+            upsert_articles(synthetic_articles(page_size))
+            assert old_path(page_size) and len(new_path(page_size)) > 0
+
+            self.stdout.write(f"{page_size}-row page, query + serialize + render, "
+                              f"orjson {'on' if orjson else 'off'}")
+            for label, path in (('per-field + JSONRenderer', old_path),
+                                ('values() + fast list path', new_path)):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    path(page_size)
+                seconds = (time.perf_counter() - start) / repeat
+                self.stdout.write(f"  {label:<26} {seconds * 1000:8.1f} ms/page  "
+                                  f"{page_size / seconds:>10.0f} rows/s")
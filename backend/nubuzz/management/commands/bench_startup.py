@@ -0,0 +1,59 @@
+# nubuzz/management/commands/bench_startup.py
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Boots Django the way a web worker does and reports wall time and peak RSS.
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+import backend.urls
+{extra}
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'transformers_loaded': 'transformers' in sys.modules,
+}}))
+"""
+
+VARIANTS = [
+    ('lazy (current)', ''),
+    # What every process paid when views.py imported transformers eagerly.
+    ('eager import', 'from transformers import pipeline'),
+    # What every web worker held once it had served one /summary/ request.
+    ('eager + model', 'from nubuzz.summarizer import get_summarizer; get_summarizer()'),
+]
+
+
+class Command(BaseCommand):
+    help = "Measure Django web-worker startup time and RSS with and without the summarizer loaded."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--with-model', action='store_true',
+                            help="Also measure a worker holding a loaded model (needs SUMMARIZER_MODEL available).")
+
+    def handle(self, *args, runs, with_model, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'))
+        variants = VARIANTS if with_model else VARIANTS[:2]
+        for label, extra in variants:
+            samples = []
+            for _ in range(runs):
+                out = subprocess.run(
+                    [sys.executable, '-c', PROBE.format(extra=extra)],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+                )
+                samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            seconds = statistics.median(s['seconds'] for s in samples)
+            rss_mb = statistics.median(s['max_rss_kb'] for s in samples) / 1024
+            loaded = samples[0]['transformers_loaded']
+            self.stdout.write(f"{label:<16} startup {seconds * 1000:8.0f} ms   "
+                              f"peak RSS {rss_mb:7.1f} MB   transformers loaded: {loaded}")
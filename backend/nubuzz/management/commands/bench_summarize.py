@@ -0,0 +1,97 @@
+# nubuzz/management/commands/bench_summarize.py
+
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from nubuzz import summarizer
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article
+
+from ._bench import WORDS, scratch_database, synthetic_articles, timed
+
+
+def build_tiny_model(path):
+    """
+    Save a randomly initialised, few-kilobyte BART plus a word-level
+    tokenizer over the synthetic vocabulary. Output is gibberish, but the
+    compute shape (encode → generate → decode) matches a real model, and
+    it needs no network access.
+    """
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+    from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+    specials = ['<pad>', '<s>', '</s>', '<unk>']
+    tok = Tokenizer(models.WordLevel(unk_token='<unk>'))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.train_from_iterator([' '.join(WORDS), ' '.join(w.capitalize() for w in WORDS)],
+                            trainers.WordLevelTrainer(special_tokens=specials))
+    tok.post_processor = processors.TemplateProcessing(
+        single='<s> $A </s>', special_tokens=[('<s>', 1), ('</s>', 2)],
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tok, bos_token='<s>', eos_token='</s>',
+        pad_token='<pad>', unk_token='<unk>', model_max_length=512,
+    )
+    config = BartConfig(
+        vocab_size=tokenizer.vocab_size, d_model=64, max_position_embeddings=512,
+        encoder_layers=2, decoder_layers=2, encoder_attention_heads=4, decoder_attention_heads=4,
+        encoder_ffn_dim=128, decoder_ffn_dim=128,
+        pad_token_id=0, bos_token_id=1, eos_token_id=2, decoder_start_token_id=2,
+        forced_bos_token_id=None, forced_eos_token_id=2,
+    )
+    model = BartForConditionalGeneration(config)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+class Command(BaseCommand):
+    help = "Benchmark summaries/sec: one pipeline call per article vs. the batched, deduped engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200)
+        parser.add_argument('--duplicates', type=float, default=0.3,
+                            help="Fraction of articles that repeat another article's content.")
+        parser.add_argument('--batch-size', type=int, default=16)
+        parser.add_argument('--model', help="Local model path. Defaults to a freshly built tiny BART.")
+
+    def handle(self, *args, count, duplicates, batch_size, model, **options):
+        raw = synthetic_articles(count, seed=4)
+        for i, article in enumerate(raw[:int(count * duplicates)]):
+            # Same wire story, different outlet URL.
+            article.update({k: raw[-1 - i][k] for k in ('description', 'content')})
+
+        tmpdir = None
+        if not model:
+            tmpdir = model = tempfile.mkdtemp(prefix='nubuzz-tiny-model-')
+            build_tiny_model(model)
+
+        results = {}
+        try:
+            with override_settings(SUMMARIZER_MODEL=model, SUMMARIZER_BATCH_SIZE=batch_size):
+                if hasattr(summarizer.get_summarizer, 'pipe'):
+                    del summarizer.get_summarizer.pipe
+                summarizer.summarize_texts(['warm up ' * 20])
+
+                with scratch_database():
+                    upsert_articles(raw)
+                    contents = list(Article.objects.values_list('content', flat=True))
+                    with timed(results, 'per-article'):
+                        for content in contents:
+                            summarizer.summarize_texts([content])
+
+                with scratch_database():
+                    upsert_articles(raw)
+                    summarizer.enqueue(list(Article.objects.values_list('id', flat=True)))
+                    with timed(results, 'engine'):
+                        summarizer.SummaryEngine(batch_size=batch_size).run_until_empty()
+                    assert not Article.objects.filter(summarize_article='').exists()
+        finally:
+            if tmpdir:
+                shutil.rmtree(tmpdir)
+
+        self.stdout.write(f"{count} articles, {duplicates:.0%} duplicate content, batch size {batch_size}")
+        for label, seconds in results.items():
+            self.stdout.write(f"  {label:<12} {seconds:8.2f}s  {count / seconds:8.1f} summaries/s")
@@ -0,0 +1,155 @@
+# nubuzz/management/commands/bench_thumbnails.py
+
+import io
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from PIL import Image
+
+from nubuzz.ingest import upsert_articles
+from nubuzz.models import Article
+from nubuzz.thumbnails import evict, source_digest, thumbnail_path
+
+from ._bench import scratch_database, stub_file_server, synthetic_articles
+
+
+def write_originals(directory, count, size):
+    """
+    Photo-like JPEGs: coarse structure that survives downscaling, plus fine
+    grain that makes them compress about as badly as real ones.
+    """
+    for i in range(count):
+        coarse = [Image.effect_noise((size[0] // 24, size[1] // 24), 60 + i + c).resize(size, Image.BICUBIC)
+                  for c in range(3)]
+        grain = Image.effect_noise(size, 12)
+        image = Image.merge('RGB', [Image.blend(band, grain, 0.15) for band in coarse])
+        image.save(os.path.join(directory, f'{i}.jpg'), quality=92)
+
+
+def disk_usage(directory):
+    return sum(entry.stat().st_size for root, _, files in os.walk(directory)
+               for entry in os.scandir(root) if entry.is_file())
+
+
+class Command(BaseCommand):
+    help = ("Serve card images through /nubuzz/img/ from a local file-serving stub: "
+            "origin fetches, bytes saved, cold / warm latency, caching headers, LRU eviction.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=12)
+        parser.add_argument('--width', type=int, default=3000, help="Width of the originals.")
+        parser.add_argument('--repeat', type=int, default=5, help="Warm requests per thumbnail.")
+
+    def handle(self, *args, images, width, repeat, **options):
+        setup_test_environment()
+        logging.getLogger('django.request').setLevel(logging.ERROR)   # the deliberate 404s
+        originals = tempfile.mkdtemp(prefix='nubuzz-originals-')
+        thumbnails = tempfile.mkdtemp(prefix='nubuzz-thumbnails-')
+        failures = []
+        try:
+            write_originals(originals, images, (width, width * 2 // 3))
+            with scratch_database(), stub_file_server(originals) as origin, \
+                    override_settings(THUMBNAIL_DIR=thumbnails, THUMBNAIL_BASE_URL=''):
+                cache.clear()
+                raw = synthetic_articles(images + 1)
+                for i, article in enumerate(raw):
+                    article['urlToImage'] = f'{origin.url}/{i}.jpg'   # the last one is a 404
+                upsert_articles(raw, 'general')
+                failures += self.serve(Client(), origin, originals, images, repeat)
+                failures += self.lru(Client(), thumbnails)
+        finally:
+            shutil.rmtree(originals)
+            shutil.rmtree(thumbnails)
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} thumbnail check(s) failed")
+
+    def serve(self, client, origin, originals, images, repeat):
+        failures = []
+        cards = client.get('/nubuzz/api/news/?page_size=500').json()['results']
+        broken = next(card for card in cards if card['url_to_image'].endswith(f'/{images}.jpg'))
+        cards = [card for card in cards if card is not broken]
+        if any(set(card['thumbnails']) != {str(w) for w in settings.THUMBNAIL_WIDTHS} for card in cards):
+            failures.append("cards are missing thumbnail URLs")
+
+        cold, warm, sizes = [], [], {w: [] for w in settings.THUMBNAIL_WIDTHS}
+        for card in cards:
+            for i, url in enumerate(card['thumbnails'].values()):
+                start = time.perf_counter()
+                response = client.get(url)
+                (cold if i == 0 else warm).append(time.perf_counter() - start)
+                if response.status_code != 200 or response['Content-Type'] != 'image/webp':
+                    failures.append(f"{url}: {response.status_code}")
+                    continue
+                sizes[Image.open(io.BytesIO(response.content)).width].append(len(response.content))
+            for url in card['thumbnails'].values():
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    client.get(url)
+                    warm.append(time.perf_counter() - start)
+
+        original = statistics.mean(os.path.getsize(os.path.join(originals, f'{i}.jpg')) for i in range(images))
+        self.stdout.write(f"{len(cards)} images, {origin.requests} origin fetches; "
+                          f"original JPEG {original / 1024:,.0f} KiB on average")
+        for width, lengths in sizes.items():
+            self.stdout.write(f"  {width:4d}w WebP {statistics.mean(lengths) / 1024:7.1f} KiB "
+                              f"({statistics.mean(lengths) / original:.1%} of the original)")
+        self.stdout.write(f"first request per image (fetch + all widths): p50 {statistics.median(cold) * 1000:.0f} ms; "
+                          f"from disk: p50 {statistics.median(warm) * 1000:.1f} ms")
+        if origin.requests != len(cards):
+            failures.append(f"{origin.requests} origin fetches for {len(cards)} images")
+
+        url = cards[0]['thumbnails'][str(settings.THUMBNAIL_WIDTHS[0])]
+        response = client.get(url)
+        revalidated = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        stale = client.get(url.replace(url.split('/')[-2], '0' * 16))
+        self.stdout.write(f"headers: Cache-Control {response['Cache-Control']!r}; revalidation "
+                          f"{revalidated.status_code}; stale digest {stale.status_code} → {stale.get('Location')}")
+        if 'immutable' not in response['Cache-Control'] or revalidated.status_code != 304 \
+                or stale.status_code != 302 or stale['Location'] != url:
+            failures.append("caching headers / revalidation / stale redirect wrong")
+
+        before = origin.requests
+        statuses = {client.get(u).status_code for u in broken['thumbnails'].values() for _ in range(3)}
+        self.stdout.write(f"broken original: {statuses}, {origin.requests - before} origin fetch(es) for 9 requests")
+        if statuses != {404} or origin.requests - before != 1:
+            failures.append("broken originals are refetched or not answered 404")
+        return failures
+
+    def lru(self, client, directory):
+        """Shrink the cap below what is on disk; recently served images must survive."""
+        failures = []
+        rows = list(Article.objects.exclude(url_to_image__endswith='404').order_by('id')
+                    .values_list('id', 'url_to_image'))
+        used = disk_usage(directory)
+        # Everything generated so far becomes an hour old, then one image is viewed again.
+        past = time.time() - 3600
+        for root, _, files in os.walk(directory):
+            for name in files:
+                os.utime(os.path.join(root, name), (past, past))
+        cards = client.get('/nubuzz/api/news/?page_size=500').json()['results']
+        favourite = next(card for card in cards if card['id'] == rows[0][0])
+        for url in favourite['thumbnails'].values():
+            client.get(url)
+
+        with override_settings(THUMBNAIL_CACHE_MAX_BYTES=used // 3):
+            kept = evict()
+            digest = source_digest(rows[0][1])
+            survived = all(os.path.exists(thumbnail_path(digest, width)) for width in settings.THUMBNAIL_WIDTHS)
+            on_disk = disk_usage(directory)
+        self.stdout.write(f"eviction: cap {used // 3 / 1024:,.0f} KiB of {used / 1024:,.0f} KiB used → "
+                          f"{on_disk / 1024:,.0f} KiB kept; recently viewed image "
+                          f"{'kept' if survived else 'EVICTED'}")
+        if kept > used // 3 or on_disk > used // 3 or not survived:
+            failures.append("LRU eviction kept too much or dropped the recently used image")
+        return failures
@@ -0,0 +1,16 @@
+# nubuzz/management/commands/dedupe_articles.py
+
+from django.core.management.base import BaseCommand
+
+from nubuzz.dedupe import CHUNK, cluster_unsigned_articles
+
+
+class Command(BaseCommand):
+    help = ("Sign and cluster every article stored without a MinHash signature "
+            "(rows from before story clustering, or with DEDUPE_ON_INGEST off).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CHUNK)
+
+    def handle(self, *args, batch_size, **options):
+        self.stdout.write(f"Marked {cluster_unsigned_articles(batch_size)} articles as duplicates")
@@ -0,0 +1,36 @@
+# nubuzz/management/commands/embed_articles.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from nubuzz.embeddings import embed_new_articles, get_index, retrain_index
+
+
+class Command(BaseCommand):
+    help = ("Embed newly ingested articles into EMBEDDING_DIR for /api/news/<id>/related/. "
+            "This process is the index's only writer.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Embed the current backlog and exit.")
+        parser.add_argument('--retrain', action='store_true',
+                            help="Rebuild the IVF lists first, dropping archived and deleted articles.")
+        parser.add_argument('--idle-sleep', type=float, default=30,
+                            help="Seconds between checks for new articles.")
+
+    def handle(self, *args, once, retrain, idle_sleep, **options):
+        if retrain and get_index().count:
+            index = retrain_index()
+            live = sum(len(rows) for rows in index.lists)
+            self.stdout.write(f"Trained {len(index.centroids)} lists over {live} of {index.count} vectors")
+        while True:
+            done = embed_new_articles()
+            if once:
+                self.stdout.write(f"Embedded {done} articles")
+                return
+            if not done:
+                try:
+                    time.sleep(idle_sleep)
+                except KeyboardInterrupt:
+                    return
@@ -0,0 +1,17 @@
+# nubuzz/management/commands/enrich_articles.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from nubuzz.enrich import enrich_articles
+
+
+class Command(BaseCommand):
+    help = ("Score sentiment and extract the mentioned location for every article whose "
+            "content changed since it was last enriched (backfills, or ENRICH_ON_INGEST off).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ENRICH_BATCH_SIZE)
+
+    def handle(self, *args, batch_size, **options):
+        self.stdout.write(f"Enriched {enrich_articles(batch_size=batch_size)} articles")
@@ -0,0 +1,46 @@
+# nubuzz/management/commands/ingest_news.py
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from nubuzz.fetcher import refresh_categories
+from nubuzz.newsapi import CATEGORIES, fetch_top_headlines
+from nubuzz.scheduler import IngestScheduler
+
+
+class Command(BaseCommand):
+    help = "Poll NewsAPI per category in the background and upsert into Article."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', action='append', dest='categories',
+                            help="Category to poll (repeatable). Defaults to NEWS_API_CATEGORIES.")
+        parser.add_argument('--interval', type=float, default=settings.NEWS_API_POLL_INTERVAL,
+                            help="Seconds between polls of the same category.")
+        parser.add_argument('--jitter', type=float, default=settings.NEWS_API_POLL_JITTER,
+                            help="Random ± fraction applied to every delay.")
+        parser.add_argument('--max-backoff', type=float, default=settings.NEWS_API_MAX_BACKOFF)
+        parser.add_argument('--once', action='store_true',
+                            help="Refresh every category once, concurrently, and exit.")
+        parser.add_argument('--pages', type=int, default=1,
+                            help="Pages per category for --once.")
+
+    def handle(self, *args, categories, interval, jitter, max_backoff, once, pages, **options):
+        categories = categories or settings.NEWS_API_CATEGORIES or CATEGORIES
+        if once:
+            counts = refresh_categories(categories, pages=pages)
+            self.stdout.write(f"{', '.join(categories)}: {counts}")
+            return
+
+        session = requests.Session()
+
+        def fetch(category):
+            return fetch_top_headlines(category=category, session=session)
+
+        scheduler = IngestScheduler(categories, interval, jitter=jitter,
+                                    max_backoff=max_backoff, fetch=fetch)
+        self.stdout.write(f"Polling {', '.join(categories)} every ~{interval:.0f}s")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,55 @@
+# nubuzz/management/commands/summarize_worker.py
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from prometheus_client import start_http_server
+
+from nubuzz.summarizer import SummaryEngine
+from nubuzz.summarizer_pool import SummarizerPool
+
+
+class Command(BaseCommand):
+    help = ("Work the SummaryJob backlog, highest priority first, through a pool "
+            "of model processes, one model per SUMMARIZER_CORES_PER_PROCESS cores.")
+
+    def add_arguments(self, parser):
+        cores = settings.SUMMARIZER_CORES_PER_PROCESS
+        parser.add_argument('--batch-size', type=int, default=settings.SUMMARIZER_BATCH_SIZE,
+                            help="Pipeline batch size within each model process.")
+        parser.add_argument('--processes', type=int, default=max(1, (os.cpu_count() or 1) // cores))
+        parser.add_argument('--threads', type=int, default=cores,
+                            help="Torch threads per model process.")
+        parser.add_argument('--idle-sleep', type=float, default=settings.SUMMARIZER_IDLE_SLEEP,
+                            help="Seconds to wait before re-checking an empty queue.")
+        parser.add_argument('--cpu-share', type=float, default=settings.SUMMARIZER_CPU_SHARE,
+                            help="Max fraction of its cores the worker keeps busy (0-1].")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the current queue and exit.")
+        parser.add_argument('--metrics-port', type=int, default=None,
+                            help="Serve this process's Prometheus metrics (inference time) on this port.")
+
+    def handle(self, *args, batch_size, processes, threads, idle_sleep, cpu_share, once, metrics_port, **options):
+        if metrics_port:
+            start_http_server(metrics_port)
+        pool = SummarizerPool(
+            processes, threads,
+            model=settings.SUMMARIZER_MODEL,
+            max_new_tokens=settings.SUMMARIZER_MAX_LENGTH,
+            min_new_tokens=settings.SUMMARIZER_MIN_LENGTH,
+            batch_size=batch_size,
+            nice=settings.SUMMARIZER_NICE,
+        )
+        # One claim feeds a full pipeline batch to every process.
+        engine = SummaryEngine(summarize=pool, batch_size=batch_size * processes)
+        with pool:
+            if once:
+                self.stdout.write(f"Summarized {engine.run_until_empty()} articles")
+                return
+
+            self.stdout.write(f"Summarizing with {processes} model process(es) × {threads} thread(s)")
+            try:
+                engine.run_forever(idle_sleep, cpu_share=cpu_share)
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,183 @@
+# nubuzz/metrics.py
+#
+# Where request time goes, as Prometheus histograms served at /metrics:
+#
+#   nubuzz_request_seconds          wall time to the response headers
+#   nubuzz_request_db_queries       ORM queries per request
+#   nubuzz_request_db_seconds       time in those queries
+#   nubuzz_request_stage_seconds    named stages views time themselves
+#                                   (serialize, summary_wait, upstream, ...)
+#   nubuzz_response_bytes           body size (not for streamed responses)
+#   nubuzz_upstream_seconds         NewsAPI / image-origin calls, per outcome
+#   nubuzz_inference_seconds        summarizer model batches (worker process)
+#
+# MetricsMiddleware opens a RequestStats per request in a context variable;
+# asgiref copies the context into sync_to_async threads, so queries run on
+# any thread's connection are counted against the request that made them.
+# Requests slower than METRICS_SLOW_REQUEST_SECONDS are logged with their
+# breakdown on the `nubuzz.slow` logger.
+#
+# Each process keeps its own counters. With several workers (or the
+# summarizer worker) on one host, point PROMETHEUS_MULTIPROC_DIR at a
+# shared empty directory and /metrics aggregates them all.
+
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+
+slow_log = logging.getLogger('nubuzz.slow')
+
+SECONDS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_SECONDS = Histogram('nubuzz_request_seconds', 'Request wall time to response headers.',
+                            ['view', 'method', 'status'], buckets=SECONDS)
+DB_QUERIES = Histogram('nubuzz_request_db_queries', 'ORM queries per request.', ['view'], buckets=QUERIES)
+DB_SECONDS = Histogram('nubuzz_request_db_seconds', 'Time in ORM queries per request.', ['view'], buckets=SECONDS)
+STAGE_SECONDS = Histogram('nubuzz_request_stage_seconds', 'Time in a named stage of a request.',
+                          ['view', 'stage'], buckets=SECONDS)
+RESPONSE_BYTES = Histogram('nubuzz_response_bytes', 'Response body size.', ['view'], buckets=BYTES)
+UPSTREAM_SECONDS = Histogram('nubuzz_upstream_seconds', 'Upstream HTTP call latency.',
+                             ['upstream', 'outcome'], buckets=SECONDS)
+INFERENCE_SECONDS = Histogram('nubuzz_inference_seconds', 'Model inference time per batch.',
+                              ['model'], buckets=SECONDS + (60, 120))
+
+
+class RequestStats:
+    """What one request spent, filled in from whichever threads serve it."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.stages = defaultdict(float)
+
+
+_current = ContextVar('nubuzz_request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every DB connection (see signals.py)."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+@contextmanager
+def stage(name):
+    """Time a block as `name` within the current request, if there is one."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.stages[name] += time.perf_counter() - start
+
+
+@contextmanager
+def upstream(name):
+    """Time one upstream HTTP call; also counted as the request's `upstream` stage."""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_SECONDS.labels(name, outcome).observe(elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.stages['upstream'] += elapsed
+
+
+def untracked():
+    """
+    Detach the current task from its request's stats. For shared background
+    loops, which inherit the context of whichever request happened to start
+    them and would otherwise bill it for everyone's polling.
+    """
+    _current.set(None)
+
+
+class MetricsMiddleware:
+    """Observes every request into the histograms above; sync and async."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+
+def observe(request, response, stats, elapsed):
+    match = request.resolver_match
+    view = match.view_name if match else 'unmatched'   # route names keep label sets bounded
+    REQUEST_SECONDS.labels(view, request.method, str(response.status_code)).observe(elapsed)
+    DB_QUERIES.labels(view).observe(stats.queries)
+    DB_SECONDS.labels(view).observe(stats.db_seconds)
+    for name, seconds in stats.stages.items():
+        STAGE_SECONDS.labels(view, name).observe(seconds)
+    size = None if response.streaming else len(response.content)
+    if size is not None:
+        RESPONSE_BYTES.labels(view).observe(size)
+
+    threshold = settings.METRICS_SLOW_REQUEST_SECONDS
+    if threshold is not None and elapsed >= threshold:
+        stages = ' '.join(f'{name}={seconds * 1000:.0f}ms' for name, seconds in stats.stages.items())
+        slow_log.warning(
+            "slow request %s %s → %s in %.0fms (view=%s db=%d queries/%.0fms %s bytes=%s)",
+            request.method, request.get_full_path(), response.status_code, elapsed * 1000, view,
+            stats.queries, stats.db_seconds * 1000, stages or 'stages=none', size,
+        )
+
+
+def metrics_view(request):
+    """GET /metrics → every histogram in Prometheus' text format."""
+    allowed = settings.METRICS_ALLOWED_IPS
+    if allowed and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
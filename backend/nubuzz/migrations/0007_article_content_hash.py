@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0006_userpreference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+    ]
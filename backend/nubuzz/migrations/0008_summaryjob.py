@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0007_article_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummaryJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('content_key', models.CharField(blank=True, db_index=True, max_length=40)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary_job', to='nubuzz.article')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='nubuzz_summ_status_2331d0_idx')],
+            },
+        ),
+    ]
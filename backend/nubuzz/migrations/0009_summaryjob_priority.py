@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0008_summaryjob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='summaryjob',
+            name='nubuzz_summ_status_2331d0_idx',
+        ),
+        migrations.AddField(
+            model_name='summaryjob',
+            name='priority',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='summaryjob',
+            index=models.Index(fields=['status', '-priority', 'created_at'], name='nubuzz_summ_status_2f5fac_idx'),
+        ),
+    ]
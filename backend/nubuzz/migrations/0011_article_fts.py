@@ -0,0 +1,63 @@
+# Full-text index over Article (SQLite FTS5). Other backends fall back to
+# icontains scans in nubuzz/search.py, so this migration is a no-op there.
+
+from django.db import migrations
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE nubuzz_article_fts USING fts5(
+        title, description, content, summarize_article,
+        content='nubuzz_article', content_rowid='id',
+        tokenize='porter unicode61', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER nubuzz_article_fts_ai AFTER INSERT ON nubuzz_article BEGIN
+        INSERT INTO nubuzz_article_fts(rowid, title, description, content, summarize_article)
+        VALUES (new.id, new.title, new.description, new.content, new.summarize_article);
+    END
+    """,
+    """
+    CREATE TRIGGER nubuzz_article_fts_ad AFTER DELETE ON nubuzz_article BEGIN
+        INSERT INTO nubuzz_article_fts(nubuzz_article_fts, rowid, title, description, content, summarize_article)
+        VALUES ('delete', old.id, old.title, old.description, old.content, old.summarize_article);
+    END
+    """,
+    """
+    CREATE TRIGGER nubuzz_article_fts_au
+    AFTER UPDATE OF title, description, content, summarize_article ON nubuzz_article BEGIN
+        INSERT INTO nubuzz_article_fts(nubuzz_article_fts, rowid, title, description, content, summarize_article)
+        VALUES ('delete', old.id, old.title, old.description, old.content, old.summarize_article);
+        INSERT INTO nubuzz_article_fts(rowid, title, description, content, summarize_article)
+        VALUES (new.id, new.title, new.description, new.content, new.summarize_article);
+    END
+    """,
+    "INSERT INTO nubuzz_article_fts(nubuzz_article_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS nubuzz_article_fts_au",
+    "DROP TRIGGER IF EXISTS nubuzz_article_fts_ad",
+    "DROP TRIGGER IF EXISTS nubuzz_article_fts_ai",
+    "DROP TABLE IF EXISTS nubuzz_article_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0010_article_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
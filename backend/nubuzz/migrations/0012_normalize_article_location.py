@@ -0,0 +1,23 @@
+# Article.location used to hold the source name ("CNN", "BBC News"). It now
+# holds the normalized country code of the feed the article came from, so
+# backfill existing rows with the configured NewsAPI country.
+
+from django.conf import settings
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    Article = apps.get_model('nubuzz', 'Article')
+    country = (settings.NEWS_API_COUNTRY or 'unknown').lower()
+    Article.objects.exclude(location=country).update(location=country)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0011_article_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
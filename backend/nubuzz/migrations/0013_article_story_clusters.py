@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0012_normalize_article_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='nubuzz.article'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='minhash',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('duplicate_of__isnull', True)), fields=['-published_at', '-id'], name='article_story_recent_idx'),
+        ),
+    ]
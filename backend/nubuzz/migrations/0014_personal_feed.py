@@ -0,0 +1,107 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:41
+#
+# Preferences move from comma-joined strings into UserInterest rows; the
+# per-user FeedEntry lists are built lazily on first read.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of nubuzz/taxonomy.py's vocabularies as of this migration, so
+# later changes to the live module can't change what it did.
+CATEGORIES = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
+
+CATEGORY_ALIASES = {
+    'tech':          'technology',
+    'politics':      'general',
+    'world':         'general',
+    'top':           'general',
+    'environment':   'science',
+    'climate':       'science',
+    'sport':         'sports',
+    'entertainment': 'entertainment',
+    'finance':       'business',
+}
+
+LOCATION_ALIASES = {
+    'new york': 'us', 'washington': 'us', 'los angeles': 'us', 'chicago': 'us',
+    'united states': 'us', 'usa': 'us', 'america': 'us',
+    'london': 'gb', 'united kingdom': 'gb', 'uk': 'gb', 'britain': 'gb', 'england': 'gb',
+    'tokyo': 'jp', 'japan': 'jp',
+    'paris': 'fr', 'france': 'fr',
+    'sydney': 'au', 'melbourne': 'au', 'australia': 'au',
+    'berlin': 'de', 'germany': 'de',
+    'toronto': 'ca', 'canada': 'ca',
+    'singapore': 'sg',
+    'india': 'in', 'mumbai': 'in', 'new delhi': 'in',
+    'china': 'cn', 'beijing': 'cn',
+}
+COUNTRY_CODES = set(LOCATION_ALIASES.values())
+
+
+def normalize_category(value):
+    value = (value or '').strip().lower()
+    if value in ('', 'all'):
+        return ''
+    if value in CATEGORIES:
+        return value
+    return CATEGORY_ALIASES.get(value, value)
+
+
+def normalize_location(value):
+    value = (value or '').strip().lower()
+    if not value:
+        return ''
+    if value in COUNTRY_CODES:
+        return value
+    return LOCATION_ALIASES.get(value, value)
+
+
+def forwards(apps, schema_editor):
+    UserPreference = apps.get_model('nubuzz', 'UserPreference')
+    UserInterest = apps.get_model('nubuzz', 'UserInterest')
+    rows = []
+    for pref in UserPreference.objects.all():
+        for kind, raw, normalize in (('category', pref.categories, normalize_category),
+                                     ('location', pref.locations, normalize_location)):
+            values = {normalize(v) for v in raw.split(',')} - {''}
+            rows += [UserInterest(user_id=pref.user_id, kind=kind, value=v) for v in values]
+    UserInterest.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0013_article_story_clusters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.BigIntegerField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='nubuzz.article')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-score', '-article'], name='feed_entry_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'article'), name='unique_feed_entry')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('location', 'Location')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'value'], name='nubuzz_user_kind_e67b56_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'kind', 'value'), name='unique_user_interest')],
+            },
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0014_personal_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='enriched_hash',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+    ]
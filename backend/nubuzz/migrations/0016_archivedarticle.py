@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0015_article_enriched_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedArticle',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('url', models.URLField(unique=True)),
+                ('published_at', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('codec', models.CharField(choices=[('zlib', 'zlib'), ('zstd', 'Zstandard')], max_length=4)),
+                ('payload', models.BinaryField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Switch a fresh SQLite database to auto_vacuum=INCREMENTAL, so
+# `archive_articles` can hand the pages it frees back to the filesystem.
+# Done once here rather than as a per-connection PRAGMA: on a database that
+# is already incremental, setting it again takes the write lock, and every
+# new connection would queue behind the ingest writer.
+#
+# The mode only changes with a VACUUM, which rewrites the whole file under
+# an exclusive lock. That's instant on a new install; a database that
+# already holds articles is left alone and converted with
+# `manage.py archive_articles --full-vacuum` when convenient.
+
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    Article = apps.get_model('nubuzz', 'Article')
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] == 2 or Article.objects.exists():
+            return
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+
+
+class Migration(migrations.Migration):
+
+    # VACUUM can't run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('nubuzz', '0016_archivedarticle'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop, atomic=False),
+    ]
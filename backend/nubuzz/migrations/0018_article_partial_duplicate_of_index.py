@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 16:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0017_sqlite_incremental_vacuum'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='nubuzz.article'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('duplicate_of__isnull', False)), fields=['duplicate_of'], name='article_duplicate_of_idx'),
+        ),
+    ]
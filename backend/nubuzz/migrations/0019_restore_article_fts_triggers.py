@@ -0,0 +1,53 @@
+# On SQLite, 0018's AlterField rebuilds nubuzz_article (create / copy /
+# drop / rename), and dropping the table drops the triggers 0011 put on it,
+# so the full-text index stopped following writes. Put them back and
+# rebuild the index from the table. A separate migration rather than a step
+# in 0018, so databases that already applied 0018 get repaired too.
+
+from django.db import migrations
+
+CREATE_SQL = [
+    "DROP TRIGGER IF EXISTS nubuzz_article_fts_ai",
+    "DROP TRIGGER IF EXISTS nubuzz_article_fts_ad",
+    "DROP TRIGGER IF EXISTS nubuzz_article_fts_au",
+    """
+    CREATE TRIGGER nubuzz_article_fts_ai AFTER INSERT ON nubuzz_article BEGIN
+        INSERT INTO nubuzz_article_fts(rowid, title, description, content, summarize_article)
+        VALUES (new.id, new.title, new.description, new.content, new.summarize_article);
+    END
+    """,
+    """
+    CREATE TRIGGER nubuzz_article_fts_ad AFTER DELETE ON nubuzz_article BEGIN
+        INSERT INTO nubuzz_article_fts(nubuzz_article_fts, rowid, title, description, content, summarize_article)
+        VALUES ('delete', old.id, old.title, old.description, old.content, old.summarize_article);
+    END
+    """,
+    """
+    CREATE TRIGGER nubuzz_article_fts_au
+    AFTER UPDATE OF title, description, content, summarize_article ON nubuzz_article BEGIN
+        INSERT INTO nubuzz_article_fts(nubuzz_article_fts, rowid, title, description, content, summarize_article)
+        VALUES ('delete', old.id, old.title, old.description, old.content, old.summarize_article);
+        INSERT INTO nubuzz_article_fts(rowid, title, description, content, summarize_article)
+        VALUES (new.id, new.title, new.description, new.content, new.summarize_article);
+    END
+    """,
+    "INSERT INTO nubuzz_article_fts(nubuzz_article_fts) VALUES ('rebuild')",
+]
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubuzz', '0018_article_partial_duplicate_of_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -17,10 +17,59 @@ class Article(models.Model):
     sentiment         = models.CharField(max_length=50, default='neutral')
     location          = models.CharField(max_length=100, default='unknown')
     summarize_article = models.TextField(blank=True)
+    content_hash      = models.CharField(max_length=40, blank=True)      # ← skip unchanged re-ingests
+    enriched_hash     = models.CharField(max_length=40, null=True, blank=True)  # ← content_hash last enriched (nubuzz/enrich.py)
+    # Near-duplicate clustering (nubuzz/dedupe.py): MinHash signature of
+    # title+description, and the first stored article of the same story.
+    minhash           = models.BinaryField(null=True, editable=False)
+    duplicate_of      = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL,
+                                          related_name='duplicates', db_index=False)
+
+    class Meta:
+        # Every feed query is newest-first with an id tie-break (keyset
+        # pagination), optionally filtered by category or location, and by
+        # default collapsed to one article per story.
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], name='article_recent_idx'),
+            models.Index(fields=['-published_at', '-id'], name='article_story_recent_idx',
+                         condition=models.Q(duplicate_of__isnull=True)),
+            models.Index(fields=['category', '-published_at', '-id'], name='article_category_recent_idx'),
+            models.Index(fields=['location', '-published_at', '-id'], name='article_location_recent_idx'),
+            # Only copies are indexed by their head (for SET_NULL when a head
+            # is deleted). A full index on the column makes SQLite's planner
+            # take `duplicate_of IS NULL` for a selective lookup and sort
+            # every story-only feed page instead of walking the index above.
+            models.Index(fields=['duplicate_of'], name='article_duplicate_of_idx',
+                         condition=models.Q(duplicate_of__isnull=False)),
+        ]
 
     def __str__(self):
         return self.title
 
+class ArchivedArticle(models.Model):
+    """
+    An Article past ARCHIVE_AFTER_DAYS, moved out of the hot table by
+    `manage.py archive_articles` (see nubuzz/archive.py). It keeps its id
+    and url for lookups; every other column is one compressed JSON blob.
+    """
+    ZLIB = 'zlib'
+    ZSTD = 'zstd'
+    CODEC_CHOICES = [
+        (ZLIB, 'zlib'),
+        (ZSTD, 'Zstandard'),
+    ]
+
+    id           = models.BigIntegerField(primary_key=True)    # the Article's id
+    url          = models.URLField(unique=True)
+    published_at = models.DateTimeField(db_index=True)
+    archived_at  = models.DateTimeField(auto_now_add=True)
+    codec        = models.CharField(max_length=4, choices=CODEC_CHOICES)
+    payload      = models.BinaryField()
+
+    def __str__(self):
+        return f"Archived article {self.id}"
+
+
 class UserPreference(models.Model):
     user       = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     categories = models.CharField(max_length=255, blank=True)
@@ -28,3 +77,83 @@ class UserPreference(models.Model):
 
     def __str__(self):
         return f"Prefs for {self.user.username}"
+
+
+class UserInterest(models.Model):
+    """
+    One normalized row per category / location a user follows, derived from
+    UserPreference whenever it is saved (see nubuzz/personalize.py), so
+    ranking never has to parse the comma-joined strings.
+    """
+    CATEGORY = 'category'
+    LOCATION = 'location'
+    KIND_CHOICES = [
+        (CATEGORY, 'Category'),
+        (LOCATION, 'Location'),
+    ]
+
+    user  = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='interests')
+    kind  = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind', 'value'], name='unique_user_interest'),
+        ]
+        indexes = [models.Index(fields=['kind', 'value'])]
+
+    def __str__(self):
+        return f"{self.user_id} follows {self.kind} {self.value}"
+
+
+class FeedEntry(models.Model):
+    """
+    A user's materialized personal feed: their top PERSONAL_FEED_SIZE
+    articles by `score` (see nubuzz/personalize.py). Serving a page is one
+    range read on (user, -score, -article).
+    """
+    user    = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_entries')
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='feed_entries')
+    score   = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'article'], name='unique_feed_entry'),
+        ]
+        indexes = [models.Index(fields=['user', '-score', '-article'], name='feed_entry_rank_idx')]
+
+    def __str__(self):
+        return f"{self.article_id} for {self.user_id} ({self.score})"
+
+
+class SummaryJob(models.Model):
+    """
+    Queue entry for the batch summarizer (see nubuzz/summarizer.py).
+    One row per article; `content_key` is a hash of the article content so
+    identical wire stories are only run through the model once. Workers
+    claim the highest `priority` first.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE    = 'done'
+    FAILED  = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE,    'Done'),
+        (FAILED,  'Failed'),
+    ]
+
+    article     = models.OneToOneField(Article, on_delete=models.CASCADE, related_name='summary_job')
+    status      = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    content_key = models.CharField(max_length=40, blank=True, db_index=True)
+    priority    = models.BigIntegerField(default=0)
+    error       = models.CharField(max_length=200, blank=True)
+    created_at  = models.DateTimeField(auto_now_add=True)
+    updated_at  = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', '-priority', 'created_at'])]
+
+    def __str__(self):
+        return f"Summary of {self.article_id}: {self.status}"
@@ -0,0 +1,87 @@
+# nubuzz/newsapi.py
+
+import requests
+from django.conf import settings
+
+from .metrics import upstream
+from .quota import upstream_budget
+
+# NewsAPI's fixed top-headlines categories.
+CATEGORIES = [
+    'business',
+    'entertainment',
+    'general',
+    'health',
+    'science',
+    'sports',
+    'technology',
+]
+
+
+# NewsAPI's error code once the plan's request quota is used up.
+RATE_LIMITED = 'rateLimited'
+
+
+class NewsAPIError(Exception):
+    """Upstream request failed or NewsAPI answered with status != ok."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class BudgetExhausted(NewsAPIError):
+    """The day's NEWS_API_DAILY_BUDGET is spent; no request was made."""
+
+    def __init__(self):
+        super().__init__('Daily NewsAPI budget exhausted')
+
+
+def top_headlines_params(category=None, page=None):
+    params = {
+        'country':  settings.NEWS_API_COUNTRY,
+        'apiKey':   settings.NEWS_API_KEY,
+        'pageSize': settings.NEWS_API_PAGE_SIZE,
+    }
+    if category:
+        params['category'] = category
+    if page:
+        params['page'] = page
+    return params
+
+
+def parse_response(data):
+    """Return the article list from a decoded NewsAPI body, or raise."""
+    if not isinstance(data, dict):
+        raise NewsAPIError('Bad payload')
+    if data.get('status') != 'ok':
+        raise NewsAPIError(data.get('message', 'Failed to fetch'), code=data.get('code'))
+    return data.get('articles') or []
+
+
+def fetch_top_headlines(category=None, page=None, session=None):
+    """
+    GET {NEWS_API_URL}/top-headlines and return the raw article dicts.
+    Pass a requests.Session to reuse its keep-alive connection across calls.
+    Every call spends from the shared daily budget (see quota.py).
+    """
+    budget = upstream_budget()
+    if not budget.spend():
+        raise BudgetExhausted()
+    http = session or requests
+    try:
+        with upstream('newsapi'):
+            resp = http.get(
+                f"{settings.NEWS_API_URL.rstrip('/')}/top-headlines",
+                params=top_headlines_params(category, page),
+                timeout=settings.NEWS_API_TIMEOUT,
+            )
+            data = resp.json()
+    except (requests.RequestException, ValueError) as e:
+        raise NewsAPIError(f'NewsAPI request failed: {e}') from e
+    try:
+        return parse_response(data)
+    except NewsAPIError as e:
+        if e.code == RATE_LIMITED:
+            budget.exhaust()
+        raise
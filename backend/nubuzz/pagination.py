@@ -0,0 +1,183 @@
+# nubuzz/pagination.py
+
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(published_at, pk):
+    raw = f"{published_at.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Opaque cursor → (published_at, id) of the last row already served."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        published_at, pk = raw.rsplit('|', 1)
+        published_at, pk = parse_datetime(published_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+    if published_at is None:
+        raise InvalidCursor(cursor)
+    return published_at, pk
+
+
+def decode_score_cursor(cursor):
+    """Opaque cursor → (score, article id) of the last feed entry already served."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        score, pk = raw.split('|')
+        return int(score), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first keyset pagination over (published_at, id).
+
+    Each page is `WHERE (published_at, id) < cursor ORDER BY published_at
+    DESC, id DESC LIMIT n`, so serving page 1000 costs the same as page 1 —
+    no OFFSET scan, and rows inserted meanwhile never shift a page.
+
+    `paginate()` works on plain Django requests too, for views outside DRF.
+    """
+    cursor_query_param    = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or settings.NEWS_PAGE_SIZE
+        self.max_page_size = settings.NEWS_MAX_PAGE_SIZE
+        self.next_cursor = None
+        self.last_modified = None
+        self.request = None
+
+    def get_page_size(self, params):
+        try:
+            size = int(params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def page_queryset(self, queryset, params, page_size):
+        """The single LIMITed query behind a page (one extra row to detect `next`)."""
+        queryset = queryset.order_by('-published_at', '-id')
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            published_at, pk = decode_cursor(cursor)
+            # The redundant `published_at <= x` conjunct is what lets the
+            # database seek into the (published_at, id) index instead of
+            # walking it from the top.
+            queryset = queryset.filter(published_at__lte=published_at).filter(
+                Q(published_at__lt=published_at) | Q(id__lt=pk)
+            )
+        return queryset[:page_size + 1]
+
+    def paginate(self, queryset, request):
+        page_size, query = self.prepare(queryset, request)
+        return self.finish(list(query), page_size)
+
+    async def apaginate(self, queryset, request):
+        """`paginate()` for async views, reading the page through the async ORM."""
+        page_size, query = self.prepare(queryset, request)
+        return self.finish([row async for row in query], page_size)
+
+    def prepare(self, queryset, request):
+        params = getattr(request, 'query_params', request.GET)
+        self.request = request
+        page_size = self.get_page_size(params)
+        return page_size, self.page_queryset(queryset, params, page_size)
+
+    def finish(self, rows, page_size):
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = None
+        self.last_modified = None
+        if rows:
+            newest = rows[0]
+            self.last_modified = newest['published_at'] if isinstance(newest, dict) else newest.published_at
+        if has_next:
+            self.next_cursor = self.row_cursor(rows[-1])
+        return rows
+
+    def row_cursor(self, row):
+        if isinstance(row, dict):
+            return encode_cursor(row['published_at'], row['id'])
+        return encode_cursor(row.published_at, row.id)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        try:
+            return self.paginate(queryset, request)
+        except InvalidCursor:
+            raise ParseError(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_last_modified_header(self):
+        """HTTP date of the newest article on the page (rows are newest-first)."""
+        if self.last_modified is None:
+            return None
+        return http_date(self.last_modified.timestamp())
+
+    def get_paginated_response(self, data):
+        headers = {}
+        if self.last_modified is not None:
+            headers['Last-Modified'] = self.get_last_modified_header()
+        return Response({'next': self.get_next_link(), 'results': data}, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Best-first keyset pagination over a personal feed's FeedEntry rows,
+    ordered by (score, article) instead of recency. Rows are `.values()`
+    dicts carrying 'score', 'article_id' and 'published_at'.
+    """
+
+    def finish(self, rows, page_size):
+        rows = super().finish(rows, page_size)
+        if rows:
+            self.last_modified = max(row['published_at'] for row in rows)
+        return rows
+
+    def page_queryset(self, queryset, params, page_size):
+        queryset = queryset.order_by('-score', '-article_id')
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            score, pk = decode_score_cursor(cursor)
+            queryset = queryset.filter(score__lte=score).filter(
+                Q(score__lt=score) | Q(article_id__lt=pk)
+            )
+        return queryset[:page_size + 1]
+
+    def row_cursor(self, row):
+        raw = f"{row['score']}|{row['article_id']}".encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
@@ -0,0 +1,162 @@
+# nubuzz/personalize.py
+#
+# Personal feeds. Each user's followed categories / locations live as
+# UserInterest rows; their top PERSONAL_FEED_SIZE articles live as FeedEntry
+# rows ranked by a single score, so /api/feed/ is one indexed range read.
+#
+# The score is absolute (minutes since the epoch plus fixed boosts), so an
+# entry never needs re-scoring as time passes: ingest only has to insert new
+# articles that beat a user's current cut-off and trim the tail.
+
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+
+from .models import Article, FeedEntry, UserInterest
+from .taxonomy import normalize_category, normalize_location
+
+NO_INTERESTS = (frozenset(), frozenset())
+
+
+def parse_interests(categories, locations):
+    """Comma-joined preference strings → {(kind, normalized value)}."""
+    interests = set()
+    for kind, raw, normalize in ((UserInterest.CATEGORY, categories, normalize_category),
+                                 (UserInterest.LOCATION, locations, normalize_location)):
+        interests.update((kind, value) for value in map(normalize, (raw or '').split(',')) if value)
+    return interests
+
+
+def sync_interests(preference):
+    """Rewrite the user's UserInterest rows from their UserPreference."""
+    wanted = parse_interests(preference.categories, preference.locations)
+    current = set(UserInterest.objects.filter(user_id=preference.user_id).values_list('kind', 'value'))
+    with transaction.atomic():
+        for kind, value in current - wanted:
+            UserInterest.objects.filter(user_id=preference.user_id, kind=kind, value=value).delete()
+        UserInterest.objects.bulk_create(
+            [UserInterest(user_id=preference.user_id, kind=kind, value=value) for kind, value in wanted - current],
+            ignore_conflicts=True,
+        )
+    return current != wanted
+
+
+def user_interests(user_ids=None):
+    """{user_id: (categories, locations)} as frozensets, for users following anything."""
+    rows = UserInterest.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    found = defaultdict(lambda: (set(), set()))
+    for user_id, kind, value in rows.values_list('user_id', 'kind', 'value'):
+        found[user_id][0 if kind == UserInterest.CATEGORY else 1].add(value)
+    return {user_id: (frozenset(cats), frozenset(locs)) for user_id, (cats, locs) in found.items()}
+
+
+def score_articles(published_at, categories, locations, profile):
+    """
+    Scores for parallel arrays of article fields under one (categories,
+    locations) profile: publish time in minutes, plus the configured boosts
+    for a followed category and a followed location.
+    """
+    cats, locs = profile
+    scores = np.array([int(p.timestamp() // 60) for p in published_at], dtype=np.int64)
+    if cats:
+        scores += np.isin(categories, list(cats)) * settings.PERSONAL_FEED_CATEGORY_BOOST
+    if locs:
+        scores += np.isin(locations, list(locs)) * settings.PERSONAL_FEED_LOCATION_BOOST
+    return scores
+
+
+def story_heads():
+    return Article.objects.filter(duplicate_of__isnull=True)
+
+
+def rebuild_feed(user_id):
+    """
+    Recompute one user's feed from scratch (first read, or a preference
+    change). With no interests the feed is simply the newest stories.
+    An article can only make the top N if it is among the N newest of its
+    match class — any, per category, per location, per category+location —
+    so those few indexed reads are the whole candidate set.
+    """
+    size = settings.PERSONAL_FEED_SIZE
+    profile = user_interests([user_id]).get(user_id, NO_INTERESTS)
+    cats, locs = profile
+    classes = [{}] + [{'category': c} for c in cats] + [{'location': l} for l in locs]
+    classes += [{'category': c, 'location': l} for c in cats for l in locs]
+
+    fields = ('id', 'published_at', 'category', 'location')
+    candidates = {}
+    for lookup in classes:
+        for row in story_heads().filter(**lookup).order_by('-published_at', '-id').values_list(*fields)[:size]:
+            candidates[row[0]] = row
+    rows = list(candidates.values())
+    entries = []
+    if rows:
+        ids, published_at, categories, locations = zip(*rows)
+        scores = score_articles(published_at, categories, locations, profile)
+        ranked = sorted(zip(scores.tolist(), ids), reverse=True)[:size]
+        entries = [FeedEntry(user_id=user_id, article_id=pk, score=score) for score, pk in ranked]
+    with transaction.atomic():
+        FeedEntry.objects.filter(user_id=user_id).delete()
+        FeedEntry.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+def trim_feed(user_id, size):
+    """Drop entries ranked below `size`."""
+    cutoff = (
+        FeedEntry.objects.filter(user_id=user_id)
+        .order_by('-score', '-article_id').values_list('score', 'article_id')[size:size + 1]
+    )
+    for score, article_id in cutoff:
+        tail = FeedEntry.objects.filter(user_id=user_id, score__lte=score)
+        tail.exclude(score=score, article_id__gt=article_id).delete()
+
+
+def add_to_feeds(article_ids):
+    """
+    Ingest stage: merge newly stored story heads into every built personal feed.
+    Articles are scored once per distinct interest profile; each user gets
+    only those beating their current cut-off, then the list is trimmed back
+    to PERSONAL_FEED_SIZE. Returns the number of entries written.
+    """
+    rows = list(story_heads().filter(id__in=article_ids).values_list('id', 'published_at', 'category', 'location'))
+    if not rows:
+        return 0
+    ids, published_at, categories, locations = zip(*rows)
+    ids = np.array(ids)
+
+    size = settings.PERSONAL_FEED_SIZE
+    stats = {
+        row['user_id']: (row['n'], row['low'])
+        for row in FeedEntry.objects.values('user_id').annotate(n=Count('id'), low=Min('score'))
+    }
+    # Users without a built feed are skipped: rebuild_feed runs on first read.
+    interests = user_interests(list(stats))
+    by_profile = defaultdict(list)
+    for user_id in stats:
+        by_profile[interests.get(user_id, NO_INTERESTS)].append(user_id)
+
+    entries, full = [], []
+    for profile, users in by_profile.items():
+        scores = score_articles(published_at, categories, locations, profile)
+        for user_id in users:
+            count, low = stats[user_id]
+            keep = scores > low if count >= size else np.ones(len(scores), dtype=bool)
+            if not keep.any():
+                continue
+            entries += [
+                FeedEntry(user_id=user_id, article_id=int(pk), score=int(score))
+                for pk, score in zip(ids[keep], scores[keep])
+            ]
+            if count + int(keep.sum()) > size:
+                full.append(user_id)
+    with transaction.atomic():
+        FeedEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+        for user_id in full:
+            trim_feed(user_id, size)
+    return len(entries)
@@ -0,0 +1,130 @@
+# nubuzz/quota.py
+#
+# Guards on NewsAPI usage, kept in the shared cache so every web and ingest
+# process draws from the same allowance:
+#
+#   - token buckets (per client IP and global) in front of the calls a web
+#     request can trigger, so a burst of traffic cannot turn into a burst
+#     of upstream calls;
+#   - a per-UTC-day budget that every upstream call, scheduled or not,
+#     spends from, so the plan's daily quota is never overrun.
+#
+# `clock` is injectable everywhere so the limits can be exercised with a
+# fake clock.
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+DAY = 24 * 60 * 60
+
+# Buckets are read-modify-write; this makes them exact within a process.
+# Across processes two requests can occasionally share a token.
+_bucket_lock = threading.Lock()
+
+
+def quota_cache():
+    return caches[settings.QUOTA_CACHE_ALIAS]
+
+
+class TokenBucket:
+    """
+    Holds up to `burst` tokens, refilled at `rate` tokens per second; each
+    allowed action takes one. Stored as (tokens, timestamp) under `key`, and
+    left to expire once it would have refilled completely.
+    """
+
+    def __init__(self, key, rate, burst, clock=time.time):
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.timeout = int(burst / rate) + 1
+
+    def level(self, state, now):
+        if state is None:
+            return self.burst
+        tokens, stamp = state
+        return min(self.burst, tokens + (now - stamp) * self.rate)
+
+    def take(self):
+        """Take a token if one is available; returns whether it was."""
+        cache = quota_cache()
+        with _bucket_lock:
+            now = self.clock()
+            level = self.level(cache.get(self.key), now)
+            allowed = level >= 1
+            cache.set(self.key, (level - 1 if allowed else level, now), self.timeout)
+        return allowed
+
+
+class UpstreamBudget:
+    """NewsAPI calls allowed per UTC day, counted atomically with cache incr."""
+
+    def __init__(self, limit, clock=time.time):
+        self.limit = limit
+        self.clock = clock
+
+    def key(self):
+        day = datetime.fromtimestamp(self.clock(), timezone.utc).date()
+        return f'quota:newsapi:{day.isoformat()}'
+
+    def used(self):
+        return quota_cache().get(self.key(), 0)
+
+    def remaining(self):
+        return max(0, self.limit - self.used())
+
+    def spend(self):
+        """Count one upstream call; False (and nothing counted) once the day's budget is gone."""
+        cache, key = quota_cache(), self.key()
+        cache.add(key, 0, 2 * DAY)
+        if cache.incr(key) > self.limit:
+            cache.decr(key)
+            return False
+        return True
+
+    async def aspend(self):
+        cache, key = quota_cache(), self.key()
+        await cache.aadd(key, 0, 2 * DAY)
+        if await cache.aincr(key) > self.limit:
+            await cache.adecr(key)
+            return False
+        return True
+
+    def exhaust(self):
+        """Upstream says the quota is gone (HTTP 429): stop calling until tomorrow."""
+        quota_cache().set(self.key(), self.limit, 2 * DAY)
+
+    async def aexhaust(self):
+        await quota_cache().aset(self.key(), self.limit, 2 * DAY)
+
+
+def upstream_budget(clock=time.time):
+    return UpstreamBudget(settings.NEWS_API_DAILY_BUDGET, clock)
+
+
+def client_ip(request):
+    # REMOTE_ADDR only: X-Forwarded-For is client-controlled unless a proxy
+    # we run rewrites it, and that is a deployment decision.
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def upstream_denied(request, clock=time.time):
+    """
+    Why a request may not trigger a NewsAPI call right now — 'budget',
+    'rate-limited' — or None if it may (having taken its tokens).
+    """
+    if upstream_budget(clock).remaining() <= 0:
+        return 'budget'
+    per_ip = TokenBucket(f'quota:bucket:ip:{client_ip(request)}',
+                         settings.UPSTREAM_IP_RATE, settings.UPSTREAM_IP_BURST, clock)
+    shared = TokenBucket('quota:bucket:global',
+                         settings.UPSTREAM_GLOBAL_RATE, settings.UPSTREAM_GLOBAL_BURST, clock)
+    # Per-IP first, so one noisy client cannot drain the shared bucket.
+    if not per_ip.take() or not shared.take():
+        return 'rate-limited'
+    return None
@@ -0,0 +1,31 @@
+# nubuzz/renderers.py
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; falls back to DRF's encoder
+    orjson = None
+
+
+def dumps(data):
+    """JSON-encode `data` to bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer that encodes with orjson when available. Output
+    is compact either way; `indent` from the Accept header is honoured only
+    on the stdlib fallback.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
@@ -0,0 +1,97 @@
+# nubuzz/search.py
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Article
+
+FTS_TABLE = 'nubuzz_article_fts'
+
+# BM25 column weights: title, description, content, summarize_article.
+BM25_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+
+SNIPPET_TOKENS = 12
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())[:16]
+
+
+def match_expression(terms):
+    """
+    User text → FTS5 MATCH expression. Each term is quoted (so FTS syntax in
+    the input is inert) and all terms must match; the last one is
+    prefix-matched for search-as-you-type: `climate chan` finds
+    "climate change".
+    """
+    *head, last = terms
+    return ' '.join([f'"{term}"' for term in head] + [f'"{last}"*'])
+
+
+def fts_available():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def fts_search(terms, limit, offset):
+    """[(article_id, snippet)] best BM25 match first."""
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    sql = f"""
+        SELECT rowid,
+               snippet({FTS_TABLE}, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS})
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY bm25({FTS_TABLE}, {weights})
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match_expression(terms), limit, offset])
+        return cursor.fetchall()
+
+
+def scan_search(terms, limit, offset):
+    """
+    Fallback for databases without the FTS index: every term must appear
+    (icontains) in title or description; newest first, no snippets.
+    """
+    queryset = Article.objects.all()
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    ids = queryset.order_by('-published_at', '-id').values_list('id', flat=True)[offset:offset + limit]
+    return [(pk, '') for pk in ids]
+
+
+def search_articles(query, limit, offset=0, fields=None):
+    """
+    Ranked search over articles. Returns up to `limit` `.values(*fields)`
+    dicts in rank order, each with an extra `snippet` key.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    search = fts_search if fts_available() else scan_search
+    hits = search(terms, limit, offset)
+
+    rows = {
+        row['id']: row
+        for row in Article.objects.filter(id__in=[pk for pk, _ in hits]).values(*(fields or ['id']))
+    }
+    results = []
+    for pk, snippet in hits:
+        if pk in rows:
+            rows[pk]['snippet'] = snippet
+            results.append(rows[pk])
+    return results
+
+
+def rebuild_index():
+    """Repopulate the FTS index from nubuzz_article (e.g. after a table rebuild)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
@@ -1,12 +1,54 @@
 # nubuzz/serializers.py
 
+from datetime import timezone
+
 from rest_framework import serializers
 from .models import Article, UserPreference
+from .thumbnails import thumbnail_urls
 from django.contrib.auth.models import User
 
+
+def format_utc_datetime(value):
+    """Same string DRF's DateTimeField emits for an aware UTC datetime."""
+    value = value.astimezone(timezone.utc)
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+class ArticleListSerializer(serializers.ListSerializer):
+    """
+    Fast path for article lists: rows (model instances or `.values()` dicts)
+    are mapped straight onto the child's Meta.fields, skipping DRF's
+    per-field to_representation machinery. Only published_at needs
+    formatting and thumbnails deriving; everything else is already a plain
+    str/int.
+    """
+
+    def to_representation(self, data):
+        rows = data.all() if hasattr(data, 'all') else data
+        fields = self.child.Meta.fields
+        format_datetime = format_utc_datetime
+        out = []
+        for row in rows:
+            if isinstance(row, dict):
+                item = {f: row[f] for f in fields}
+            else:
+                item = {f: row.serializable_value(f) for f in fields}
+            item['published_at'] = format_datetime(item['published_at'])
+            item['thumbnails'] = thumbnail_urls(item['id'], item['url_to_image'])
+            out.append(item)
+        return out
+
+
 class ArticleSerializer(serializers.ModelSerializer):
+    """
+    Card-sized article: everything the feed needs, no body text. Meta.fields
+    are the columns to select; `thumbnails` ({width: URL} of the image
+    proxy, or null) is derived from id and url_to_image.
+    """
     class Meta:
         model  = Article
+        list_serializer_class = ArticleListSerializer
         fields = [
             'id',
             'source_id', 'source_name',
@@ -19,9 +61,22 @@ class ArticleSerializer(serializers.ModelSerializer):
             'category',
             'location',
             'summarize_article',
+            'duplicate_of',
         ]
 
 
+class ArticleDetailSerializer(serializers.ModelSerializer):
+    """Full article for /api/news/<id>/, including the content body."""
+    class Meta:
+        model  = Article
+        fields = ArticleSerializer.Meta.fields + ['content', 'sentiment']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['thumbnails'] = thumbnail_urls(data['id'], data['url_to_image'])
+        return data
+
+
 class UserPreferenceSerializer(serializers.ModelSerializer):
     class Meta:
         model  = UserPreference
@@ -0,0 +1,47 @@
+# nubuzz/signals.py
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_tokens
+from .feedcache import bump_generation
+from .metrics import record_query
+from .models import Article, UserPreference
+from .personalize import rebuild_feed, sync_interests
+
+
+@receiver([post_save, post_delete], sender=Article)
+def invalidate_feeds(sender, **kwargs):
+    # Single-row writes (admin, shell, summarize fallbacks). Bulk ingestion
+    # paths skip signals and bump the generation themselves.
+    bump_generation()
+
+
+@receiver(post_save, sender=UserPreference)
+def refresh_personal_feed(sender, instance, **kwargs):
+    if sync_interests(instance):
+        rebuild_feed(instance.user_id)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    # Logout (and user deletion, which cascades here).
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    # A deactivated or edited user must not live on in a cached token.
+    if not created:
+        forget_tokens(Token.objects.filter(user=instance).values_list('key', flat=True), instance.pk)
+
+
+@receiver(connection_created)
+def count_queries(sender, connection, **kwargs):
+    # Per-request query counts and time for /metrics, whichever thread's
+    # connection the request's queries run on.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,270 @@
+# nubuzz/summarizer.py
+
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .feedcache import bump_generation
+from .metrics import INFERENCE_SECONDS
+from .models import Article, SummaryJob, UserInterest, UserPreference
+
+logger = logging.getLogger(__name__)
+
+# Articles shorter than this are not worth running through the model.
+MIN_WORDS = 10
+TOO_SHORT = 'Content too short'
+
+
+def get_summarizer():
+    """
+    Lazy-loaded HuggingFace pipeline, one per process. transformers is
+    imported here rather than at module level so Django processes that
+    never summarize (web workers, migrate, ...) never pay for it.
+    """
+    if not hasattr(get_summarizer, "pipe"):
+        from transformers import pipeline
+        get_summarizer.pipe = pipeline("summarization", model=settings.SUMMARIZER_MODEL)
+    return get_summarizer.pipe
+
+
+def summarize_texts(texts):
+    """
+    Run one batched in-process pipeline call over `texts`, returning
+    summaries in order. The worker uses SummarizerPool instead.
+    """
+    summarizer = get_summarizer()
+    results = summarizer(
+        texts,
+        max_new_tokens=settings.SUMMARIZER_MAX_LENGTH,
+        min_new_tokens=settings.SUMMARIZER_MIN_LENGTH,
+        do_sample=False,
+        truncation=True,
+        batch_size=settings.SUMMARIZER_BATCH_SIZE,
+    )
+    return [r['summary_text'] for r in results]
+
+
+def content_key(content):
+    return hashlib.sha1(content.strip().encode('utf-8')).hexdigest()
+
+
+def too_short(content):
+    return not content or len(content.split()) < MIN_WORDS
+
+
+def category_popularity():
+    """category → share of users (0..1) who follow it in their preferences."""
+    users = UserPreference.objects.count()
+    if not users:
+        return {}
+    counts = (
+        UserInterest.objects.filter(kind=UserInterest.CATEGORY)
+        .values_list('value').annotate(n=Count('user_id', distinct=True))
+    )
+    return {category: n / users for category, n in counts}
+
+
+def job_priority(article, popularity, on_demand):
+    """
+    Single sortable score, in minutes: newer articles rank higher, articles
+    in popular categories rank as if published up to
+    SUMMARIZER_CATEGORY_BOOST minutes later, and a reader actually waiting
+    on a summary jumps ahead of the whole ingest backlog.
+    """
+    score = int(article.published_at.timestamp() // 60)
+    score += int(popularity.get(article.category.lower(), 0) * settings.SUMMARIZER_CATEGORY_BOOST)
+    if on_demand:
+        score += settings.SUMMARIZER_ON_DEMAND_BOOST
+    return score
+
+
+def enqueue(article_ids, on_demand=True):
+    """
+    Queue summaries for the given articles, keyed by story so each
+    near-duplicate cluster is summarized once. Articles that already have a
+    summary or a job are left alone, except that an on-demand request
+    raises the priority of a still-pending job and puts a job that failed
+    in the model back in the queue. Returns {article_id: status}.
+    """
+    articles = Article.objects.filter(id__in=article_ids).select_related('duplicate_of').only(
+        'id', 'content', 'summarize_article', 'published_at', 'category', 'duplicate_of__content',
+    )
+    existing = {
+        article_id: (status, error)
+        for article_id, status, error in
+        SummaryJob.objects.filter(article_id__in=article_ids).values_list('article_id', 'status', 'error')
+    }
+    popularity = category_popularity()
+
+    jobs, bumped, retried = [], {}, {}
+    for art in articles:
+        priority = job_priority(art, popularity, on_demand)
+        if art.id in existing:
+            status, error = existing[art.id]
+            if on_demand and status == SummaryJob.PENDING:
+                bumped[art.id] = priority
+            elif on_demand and status == SummaryJob.FAILED and error != TOO_SHORT:
+                retried[art.id] = priority
+            continue
+        if art.summarize_article:
+            status, error = SummaryJob.DONE, ''
+        elif too_short(art.content):
+            status, error = SummaryJob.FAILED, TOO_SHORT
+        else:
+            status, error = SummaryJob.PENDING, ''
+        jobs.append(SummaryJob(
+            article=art,
+            status=status,
+            error=error,
+            priority=priority,
+            # Near-duplicates share their story head's key, so one model
+            # run covers the whole cluster.
+            content_key=content_key((art.duplicate_of or art).content or ''),
+        ))
+    SummaryJob.objects.bulk_create(jobs, batch_size=500, ignore_conflicts=True)
+    for article_id, priority in bumped.items():
+        SummaryJob.objects.filter(
+            article_id=article_id, status=SummaryJob.PENDING, priority__lt=priority,
+        ).update(priority=priority)
+    # Model failures are often transient (OOM, a killed process); a reader
+    # asking again gets another attempt.
+    for article_id, priority in retried.items():
+        SummaryJob.objects.filter(article_id=article_id, status=SummaryJob.FAILED).update(
+            status=SummaryJob.PENDING, error='', priority=priority, updated_at=timezone.now(),
+        )
+
+    if not on_demand:
+        return {}
+    return {
+        article_id: statuses['status']
+        for article_id, statuses in job_statuses(article_ids).items()
+    }
+
+
+def job_statuses(article_ids):
+    """{article_id: {'status', 'summary', 'error'}} for articles that have a job."""
+    rows = SummaryJob.objects.filter(article_id__in=article_ids).values_list(
+        'article_id', 'status', 'error', 'article__summarize_article',
+    )
+    return {
+        article_id: {
+            'status':  status,
+            'summary': summary if status == SummaryJob.DONE else '',
+            'error':   error,
+        }
+        for article_id, status, error, summary in rows
+    }
+
+
+class SummaryEngine:
+    """
+    Drains pending SummaryJobs in batches:
+
+      1. claim up to `batch_size` highest-priority jobs (pending → running),
+         along with running jobs whose worker hasn't finished them within
+         SUMMARIZER_CLAIM_TIMEOUT (it crashed or was killed mid-batch),
+      2. group them by content hash and reuse any summary already produced
+         for the same content,
+      3. run the remaining unique texts through one batched pipeline call,
+      4. write summaries back to Article.summarize_article and mark jobs done.
+
+    `summarize` maps a list of texts to a list of summaries and defaults to
+    the HuggingFace pipeline, so tests and benchmarks can swap it out.
+    """
+
+    def __init__(self, summarize=summarize_texts, batch_size=None):
+        self.summarize  = summarize
+        self.batch_size = batch_size or settings.SUMMARIZER_BATCH_SIZE
+
+    def claim(self):
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.SUMMARIZER_CLAIM_TIMEOUT)
+        with transaction.atomic():
+            jobs = list(
+                SummaryJob.objects.select_for_update(skip_locked=True)
+                .filter(Q(status=SummaryJob.PENDING) | Q(status=SummaryJob.RUNNING, updated_at__lt=stale))
+                .order_by('-priority', 'created_at')
+                .select_related('article')[:self.batch_size]
+            )
+            SummaryJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=SummaryJob.RUNNING, updated_at=now,
+            )
+        return jobs
+
+    def cached_summaries(self, keys):
+        """content_key → summary for content we have summarized before."""
+        return dict(
+            SummaryJob.objects.filter(content_key__in=keys, status=SummaryJob.DONE)
+            .exclude(article__summarize_article='')
+            .values_list('content_key', 'article__summarize_article')
+        )
+
+    def run_once(self):
+        """Process one batch. Returns the number of jobs handled."""
+        jobs = self.claim()
+        if not jobs:
+            return 0
+
+        groups = defaultdict(list)
+        for job in jobs:
+            groups[job.content_key].append(job)
+
+        summaries = self.cached_summaries(list(groups))
+        todo = [key for key in groups if key not in summaries]
+        now = timezone.now()
+        try:
+            texts = [groups[key][0].article.content for key in todo]
+            if texts:
+                with INFERENCE_SECONDS.labels('summarizer').time():
+                    summaries.update(zip(todo, self.summarize(texts)))
+        except Exception as e:
+            logger.exception("Summarization batch of %d failed", len(todo))
+            for key in todo:
+                for job in groups[key]:
+                    job.status, job.error, job.updated_at = SummaryJob.FAILED, str(e)[:200], now
+            SummaryJob.objects.bulk_update(
+                [job for key in todo for job in groups[key]],
+                ['status', 'error', 'updated_at'],
+            )
+            groups = {key: groups[key] for key in groups if key in summaries}
+
+        articles, done = [], []
+        for key, group in groups.items():
+            for job in group:
+                job.article.summarize_article = summaries[key]
+                job.status, job.error, job.updated_at = SummaryJob.DONE, '', now
+                articles.append(job.article)
+                done.append(job)
+        with transaction.atomic():
+            Article.objects.bulk_update(articles, ['summarize_article'])
+            SummaryJob.objects.bulk_update(done, ['status', 'error', 'updated_at'])
+            if articles:
+                bump_generation()
+        return len(jobs)
+
+    def run_until_empty(self):
+        total = 0
+        while processed := self.run_once():
+            total += processed
+        return total
+
+    def run_forever(self, idle_sleep, cpu_share=1.0, sleep=time.sleep):
+        """
+        Work the backlog indefinitely. After each batch that took `t` seconds
+        the worker rests `t * (1 - cpu_share) / cpu_share`, so summarization
+        uses at most `cpu_share` of the cores it runs on and leaves the rest
+        to ingestion and serving.
+        """
+        while True:
+            start = time.monotonic()
+            if not self.run_once():
+                sleep(idle_sleep)
+            elif cpu_share < 1.0:
+                sleep((time.monotonic() - start) * (1 - cpu_share) / cpu_share)
@@ -0,0 +1,64 @@
+# nubuzz/summarizer_pool.py
+#
+# Runs the HuggingFace model in separate worker processes. This module must
+# stay free of Django imports: pool children are spawned fresh and only
+# import what they need, so neither Django nor the web workers ever hold a
+# copy of the model.
+
+import multiprocessing
+import os
+
+_pipe = None
+_options = None
+
+
+def _init_worker(model, options, threads, nice):
+    global _pipe, _options
+    import torch
+    from transformers import pipeline
+
+    if nice:
+        os.nice(nice)
+    torch.set_num_threads(threads)
+    _pipe = pipeline("summarization", model=model)
+    _options = options
+
+
+def _summarize_chunk(texts):
+    results = _pipe(texts, do_sample=False, truncation=True, **_options)
+    return [r['summary_text'] for r in results]
+
+
+class SummarizerPool:
+    """
+    A pool of `processes` model processes, each limited to `threads` torch
+    threads, so one model copy serves `threads` cores. Calling the pool with
+    a list of texts spreads it over the processes and returns summaries in
+    order — a drop-in `summarize` callable for SummaryEngine. `nice` lowers
+    the children's OS priority so inference only soaks up idle CPU.
+    """
+
+    def __init__(self, processes, threads, model, max_new_tokens, min_new_tokens, batch_size, nice=0):
+        self.processes = processes
+        options = {
+            'max_new_tokens': max_new_tokens,
+            'min_new_tokens': min_new_tokens,
+            'batch_size':     batch_size,
+        }
+        ctx = multiprocessing.get_context('spawn')
+        self.pool = ctx.Pool(processes, initializer=_init_worker, initargs=(model, options, threads, nice))
+
+    def __call__(self, texts):
+        size = -(-len(texts) // self.processes)
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        return [summary for chunk in self.pool.map(_summarize_chunk, chunks) for summary in chunk]
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,65 @@
+# nubuzz/taxonomy.py
+#
+# Normalized vocabularies for Article.category and Article.location, so
+# ingestion writes and feed filters agree on the same values.
+
+from django.conf import settings
+
+from .newsapi import CATEGORIES
+
+# Labels the frontend (and people) use → NewsAPI category.
+CATEGORY_ALIASES = {
+    'tech':          'technology',
+    'politics':      'general',
+    'world':         'general',
+    'top':           'general',
+    'environment':   'science',
+    'climate':       'science',
+    'sport':         'sports',
+    'entertainment': 'entertainment',
+    'finance':       'business',
+}
+
+# Cities, country names and codes → ISO 3166-1 alpha-2 code (lowercase,
+# as NewsAPI's `country` parameter expects).
+LOCATION_ALIASES = {
+    'new york': 'us', 'washington': 'us', 'los angeles': 'us', 'chicago': 'us',
+    'united states': 'us', 'usa': 'us', 'america': 'us',
+    'london': 'gb', 'united kingdom': 'gb', 'uk': 'gb', 'britain': 'gb', 'england': 'gb',
+    'tokyo': 'jp', 'japan': 'jp',
+    'paris': 'fr', 'france': 'fr',
+    'sydney': 'au', 'melbourne': 'au', 'australia': 'au',
+    'berlin': 'de', 'germany': 'de',
+    'toronto': 'ca', 'canada': 'ca',
+    'singapore': 'sg',
+    'india': 'in', 'mumbai': 'in', 'new delhi': 'in',
+    'china': 'cn', 'beijing': 'cn',
+}
+COUNTRY_CODES = set(LOCATION_ALIASES.values())
+
+UNKNOWN_LOCATION = 'unknown'
+
+
+def normalize_category(value):
+    """'Tech' → 'technology'; '' / 'All' → '' (no filter)."""
+    value = (value or '').strip().lower()
+    if value in ('', 'all'):
+        return ''
+    if value in CATEGORIES:
+        return value
+    return CATEGORY_ALIASES.get(value, value)
+
+
+def normalize_location(value):
+    """'New York' → 'us', 'GB' → 'gb'; unrecognized names pass through lowercased."""
+    value = (value or '').strip().lower()
+    if not value:
+        return ''
+    if value in COUNTRY_CODES:
+        return value
+    return LOCATION_ALIASES.get(value, value)
+
+
+def feed_location():
+    """Location stamped on ingested top-headlines: the country they were fetched for."""
+    return normalize_location(settings.NEWS_API_COUNTRY) or UNKNOWN_LOCATION
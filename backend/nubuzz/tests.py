@@ -1,3 +1,699 @@
+import asyncio
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import tracemalloc
+import zlib
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import OperationalError, connection
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from .archive import archive_articles, find_article
+from .authentication import CachedTokenAuthentication, token_cache, token_cache_key, user_cache_key
+from .dedupe import candidate_pairs, cluster_unsigned_articles
+from .embeddings import EmbeddingIndex, embed_new_articles, get_index, retrain_index
+from .feedcache import DEGRADED_HEADER, current_generation
+from .ingest import upsert_articles
+from .live import Broadcaster, Subscription
+from .management.commands import bench_export
+from .management.commands._bench import stub_file_server, stub_newsapi
+from .management.commands.bench_thumbnails import write_originals
+from .models import Article, ArchivedArticle, FeedEntry, SummaryJob, UserPreference
+from .pagination import decode_cursor
+from .quota import quota_cache, upstream_budget
+from .scheduler import IngestScheduler
+from .search import search_articles
+from .summarizer import SummaryEngine, enqueue
+from . import thumbnails
+
+
+def raw_article(n, published_at=None, **extra):
+    """A NewsAPI-shaped article dict."""
+    published_at = published_at or timezone.now()
+    raw = {
+        'source':      {'id': 'reuters', 'name': 'Reuters'},
+        'author':      'Reporter',
+        'title':       f'Story number {n} about the harvest festival',
+        'description': f'Details of story {n}.',
+        'content':     f'Full text of story {n}, long enough to be worth summarizing by the model.',
+        'url':         f'https://example.com/story/{n}',
+        'urlToImage':  '',
+        'publishedAt': published_at.isoformat(),
+    }
+    raw.update(extra)
+    return raw
+
+
+class ArchiveTests(TestCase):
+
+    def test_reingested_archived_url_does_not_block_archiving(self):
+        old = timezone.now() - timedelta(days=200)
+        upsert_articles([raw_article(1, old), raw_article(2, old)])
+        original = Article.objects.get(url='https://example.com/story/1').id
+        self.assertEqual(archive_articles(), 2)
+
+        counts = upsert_articles([raw_article(1, old)])
+        self.assertEqual(counts['unchanged'], 1)
+        self.assertFalse(Article.objects.exists())
+
+        upsert_articles([raw_article(3, old)])
+        self.assertEqual(archive_articles(), 1)
+        self.assertEqual(ArchivedArticle.objects.count(), 3)
+        self.assertTrue(find_article(pk=original).archived)
+
+    def test_hot_copy_of_archived_url_is_dropped(self):
+        old = timezone.now() - timedelta(days=200)
+        upsert_articles([raw_article(1, old)])
+        original = Article.objects.get().id
+        archive_articles()
+        # A copy stored before ingest learned to skip archived urls.
+        Article.objects.create(url='https://example.com/story/1', title='Again', published_at=old)
+
+        self.assertEqual(archive_articles(), 1)
+        self.assertFalse(Article.objects.exists())
+        self.assertEqual(ArchivedArticle.objects.get().id, original)
+
+
+    def test_archived_head_hands_its_story_to_one_copy(self):
+        old = timezone.now() - timedelta(days=200)
+        head = Article.objects.create(url='https://example.com/story/1', title='Harvest', published_at=old)
+        for n, age in ((2, 2), (3, 1)):
+            Article.objects.create(url=f'https://example.com/story/{n}', title='Harvest', duplicate_of=head,
+                                   published_at=timezone.now() - timedelta(days=age))
+
+        self.assertEqual(archive_articles(), 1)
+        cards = self.client.get('/nubuzz/api/news/').json()['results']
+        self.assertEqual([card['url'] for card in cards], ['https://example.com/story/2'])
+        promoted = Article.objects.get(url='https://example.com/story/2')
+        self.assertEqual(Article.objects.get(url='https://example.com/story/3').duplicate_of, promoted)
+
+
+class SummaryQueueTests(TestCase):
+
+    def setUp(self):
+        upsert_articles([raw_article(1)])
+        self.article = Article.objects.get()
+        self.engine = SummaryEngine(summarize=lambda texts: ['Summary.' for _ in texts])
+
+    def test_stale_running_job_is_reclaimed(self):
+        SummaryJob.objects.update(status=SummaryJob.RUNNING)
+        self.assertEqual(self.engine.run_once(), 0)
+
+        with self.settings(SUMMARIZER_CLAIM_TIMEOUT=60):
+            SummaryJob.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+            self.assertEqual(self.engine.run_once(), 1)
+        self.assertEqual(SummaryJob.objects.get().status, SummaryJob.DONE)
+
+    def test_on_demand_request_retries_model_failure(self):
+        SummaryJob.objects.update(status=SummaryJob.FAILED, error='CUDA out of memory')
+        self.assertEqual(enqueue([self.article.id], on_demand=False), {})
+        self.assertEqual(SummaryJob.objects.get().status, SummaryJob.FAILED)
+
+        self.assertEqual(enqueue([self.article.id]), {self.article.id: SummaryJob.PENDING})
+        self.engine.run_once()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.summarize_article, 'Summary.')
+
+    def test_too_short_failure_is_not_retried(self):
+        Article.objects.filter(id=self.article.id).update(content='Too short.')
+        SummaryJob.objects.all().delete()
+        self.assertEqual(enqueue([self.article.id]), {self.article.id: SummaryJob.FAILED})
+        self.assertEqual(enqueue([self.article.id]), {self.article.id: SummaryJob.FAILED})
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        token_cache().clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'reader-password')
+        self.key = Token.objects.create(user=self.user).key
+        self.auth = CachedTokenAuthentication()
+
+    def test_cache_holds_no_credentials(self):
+        user, _ = self.auth.authenticate_credentials(self.key)
+        user, token = self.auth.authenticate_credentials(self.key)
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.key))
+
+        cached = pickle.dumps([token_cache().get(token_cache_key(self.key)),
+                               token_cache().get(user_cache_key(self.user.pk))])
+        self.assertNotIn(self.key.encode(), cached)
+        self.assertNotIn(self.user.password.encode(), cached)
+
+    def test_cache_hit_rejects_inactive_user(self):
+        self.auth.authenticate_credentials(self.key)
+        # Deactivated without signals, once the cached user has expired.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        token_cache().delete(user_cache_key(self.user.pk))
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_saving_user_evicts_cached_copy(self):
+        self.auth.authenticate_credentials(self.key)
+        self.auth.authenticate_credentials(self.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+
+class DedupeTests(TestCase):
+
+    def test_bucket_members_are_compared_with_each_other(self):
+        # All three share band 0; rows 1 and 2 share nothing else, and row
+        # 0 (the bucket's first) is a different story.
+        sigs = np.array([[1, 1, 1, 9, 9, 9],
+                         [1, 1, 1, 2, 3, 4],
+                         [1, 1, 1, 5, 6, 7]], dtype=np.uint32)
+        self.assertIn((1, 2), candidate_pairs(sigs, bands=2))
+        self.assertEqual(candidate_pairs(sigs, bands=2, first_new=2), {(0, 2), (1, 2)})
+
+    def test_backfill_clusters_unsigned_rows(self):
+        copy = {'description': 'Officials said the harvest festival drew record crowds this weekend.'}
+        with self.settings(DEDUPE_ON_INGEST=False):
+            upsert_articles([raw_article(1, **copy), raw_article(2, **copy), raw_article(3)])
+        self.assertFalse(Article.objects.filter(minhash__isnull=False).exists())
+
+        self.assertEqual(cluster_unsigned_articles(batch_size=2), 1)
+        first, second, third = Article.objects.order_by('id')
+        self.assertEqual((first.duplicate_of_id, second.duplicate_of_id, third.duplicate_of_id),
+                         (None, first.id, None))
+        self.assertFalse(Article.objects.filter(minhash__isnull=True).exists())
+
+
+class InvalidCursorTests(TestCase):
+
+    def test_bad_cursor_is_a_bad_request_everywhere(self):
+        user = User.objects.create_user('reader', 'reader@example.com', 'reader-password')
+        self.client.force_login(user)
+        for url in ('/nubuzz/fetch-news/', '/nubuzz/api/news/', '/nubuzz/api/feed/'):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'cursor': 'not-a-cursor'})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+
+class KeysetPaginationTests(TestCase):
+
+    def test_rows_sharing_a_timestamp_are_split_by_id(self):
+        tie = timezone.now().replace(microsecond=0)
+        Article.objects.bulk_create([
+            Article(url=f'https://example.com/story/{n}', title=f'Story {n}',
+                    published_at=tie + timedelta(minutes=1) if n == 7 else tie)
+            for n in range(8)
+        ])
+        expected = list(Article.objects.order_by('-published_at', '-id').values_list('id', flat=True))
+
+        ids, pages, url = [], 0, '/nubuzz/api/news/?page_size=3'
+        while url:
+            body = self.client.get(url).json()
+            page = [card['id'] for card in body['results']]
+            ids += page
+            pages += 1
+            url = body['next']
+            if url:
+                cursor = url.split('cursor=', 1)[1].split('&', 1)[0]
+                self.assertEqual(decode_cursor(cursor)[1], page[-1])
+        self.assertEqual(ids, expected)
+        self.assertEqual((pages, len(page)), (3, 2))
+        self.assertIsNone(body['next'])
+
+
+class UpstreamQuotaTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        quota_cache().clear()
+
+    def test_exhausted_budget_serves_degraded_feed_without_calling_upstream(self):
+        with stub_newsapi() as upstream:
+            upstream_budget().exhaust()
+            response = self.client.get('/nubuzz/fetch-news/', {'category': 'science'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response[DEGRADED_HEADER], 'budget')
+            self.assertEqual(response.json(), [])
+            self.assertEqual(upstream.requests, 0)
+
+            # Degraded pages aren't cached: once the budget is back, the
+            # next read fetches.
+            quota_cache().clear()
+            response = self.client.get('/nubuzz/fetch-news/', {'category': 'science'})
+            self.assertFalse(response.has_header(DEGRADED_HEADER))
+            self.assertTrue(response.json())
+            self.assertEqual(upstream.requests, 1)
+
+    def test_rate_limited_client_gets_stored_feed(self):
+        upsert_articles([raw_article(1)], category='science')
+        with stub_newsapi() as upstream, self.settings(UPSTREAM_IP_BURST=1):
+            upstream.status = 500
+            codes = []
+            with self.assertLogs('nubuzz.fetcher', 'WARNING'):
+                for category in ('sports', 'health', 'business'):
+                    response = self.client.get('/nubuzz/fetch-news/', {'category': category})
+                    codes.append((response.status_code, response[DEGRADED_HEADER]))
+            self.assertEqual(codes, [(200, 'upstream-error'), (200, 'rate-limited'), (200, 'rate-limited')])
+            self.assertEqual(upstream.requests, 1)
+
+            response = self.client.get('/nubuzz/fetch-news/', {'category': 'science'})
+            self.assertFalse(response.has_header(DEGRADED_HEADER))
+            self.assertEqual([a['url'] for a in response.json()], ['https://example.com/story/1'])
+
+
+class IngestSchedulerTests(TestCase):
+
+    def setUp(self):
+        quota_cache().clear()
+        self.now = 1000.0
+
+    def poll(self, scheduler):
+        [poller] = scheduler.pollers
+        self.now = poller.next_run
+        scheduler.run_pending()
+        return poller.failures, poller.next_run - self.now
+
+    def test_polls_store_articles_and_failures_back_off(self):
+        scheduler = IngestScheduler(['science'], interval=60, jitter=0, clock=lambda: self.now)
+        with stub_newsapi(page_size=5) as upstream:
+            self.assertEqual(self.poll(scheduler), (0, 60))
+            self.assertEqual(Article.objects.filter(category='science').count(), 5)
+
+            upstream.status = 500
+            with self.assertLogs('nubuzz.scheduler', 'WARNING'):
+                self.assertEqual(self.poll(scheduler), (1, 60))
+
+            upstream.status = 200
+            locked = OperationalError('database is locked')
+            with (mock.patch('nubuzz.scheduler.upsert_articles', side_effect=locked),
+                  self.assertLogs('nubuzz.scheduler', 'ERROR')):
+                self.assertEqual(self.poll(scheduler), (2, 120))
+
+            self.assertEqual(self.poll(scheduler), (0, 60))
+            self.assertEqual(upstream.requests, 4)
+
+
+class FeedCacheTests(TestCase):
+
+    url = '/nubuzz/api/news/'
+
+    def setUp(self):
+        caches['default'].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_articles([raw_article(1)])
+
+    def test_repeat_read_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_etag_is_strong_hash_of_body(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], '"%s"' % hashlib.sha1(response.content).hexdigest())
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_conditional_requests_get_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        since = response['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_ingest_invalidates_cached_pages(self):
+        etag = self.client.get(self.url)['ETag']
+        generation = current_generation()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            upsert_articles([raw_article(2, timezone.now() + timedelta(minutes=1), title='Volcano erupts',
+                                         description='Lava reaches the coast.', content='Residents evacuated.')])
+        self.assertTrue(callbacks)
+        self.assertGreater(current_generation(), generation)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['url'] for card in response.json()['results']],
+                         ['https://example.com/story/2', 'https://example.com/story/1'])
+
+
+class PersonalFeedTests(TestCase):
+
+    TOPICS = ['Volcano', 'Election', 'Glacier', 'Marathon', 'Satellite', 'Vaccine']
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader', password='secret')
+        self.client.force_login(self.user)
+        self.start = timezone.now() - timedelta(hours=6)
+
+    def ingest(self, n, category, minutes):
+        topic = self.TOPICS[n]
+        upsert_articles([raw_article(
+            n, self.start + timedelta(minutes=minutes), title=f'{topic} headline',
+            description=f'{topic} coverage.', content=f'Everything about the {topic.lower()} today.',
+        )], category=category)
+
+    def feed(self):
+        return [card['url'].rsplit('/', 1)[1] for card in self.client.get('/nubuzz/api/feed/').json()['results']]
+
+    def test_followed_category_ranks_first(self):
+        self.ingest(0, 'sports', 0)
+        self.ingest(1, 'politics', 60)
+        UserPreference.objects.create(user=self.user, categories='sports')
+        self.assertEqual(self.feed(), ['0', '1'])
+
+    def test_ingest_merges_into_built_feed(self):
+        self.ingest(0, 'politics', 0)
+        self.assertEqual(self.feed(), ['0'])
+        self.ingest(1, 'science', 60)
+        self.assertEqual(self.feed(), ['1', '0'])
+
+    def test_feed_is_trimmed_to_its_size(self):
+        with self.settings(PERSONAL_FEED_SIZE=3):
+            for n in range(3):
+                self.ingest(n, 'science', n)
+            self.assertEqual(self.feed(), ['2', '1', '0'])
+            for n in range(3, 5):
+                self.ingest(n, 'science', n)
+            self.assertEqual(FeedEntry.objects.filter(user=self.user).count(), 3)
+            self.assertEqual(self.feed(), ['4', '3', '2'])
+
+    def test_preference_change_rebuilds_feed(self):
+        self.ingest(0, 'science', 0)
+        self.ingest(1, 'sports', 1)
+        UserPreference.objects.create(user=self.user, categories='sports')
+        self.assertEqual(self.feed(), ['1', '0'])
+
+        response = self.client.patch('/nubuzz/api/user/preferences/', {'categories': 'science'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.feed(), ['0', '1'])
+
+
+class NDJSONExportTests(TestCase):
+
+    def test_export_streams_in_bounded_memory(self):
+        count = 20_000
+        bench_export.seed(count)
+        with self.settings(NDJSON_CHUNK_SIZE=200):
+            response = self.client.get('/nubuzz/api/news/', {'format': 'ndjson'})
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            size = lines = 0
+            tracemalloc.start()
+            try:
+                for chunk in response.streaming_content:
+                    size += len(chunk)
+                    lines += chunk.count(b'\n')
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        self.assertEqual(lines, count)
+        # A buffered export holds the whole body, and more in row objects.
+        self.assertLess(peak, size / 5)
+
+
+def stub_embed(texts, dim=32):
+    """Hashed bag-of-words vectors: texts sharing words come out close."""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().replace('.', ' ').split():
+            vectors[row, zlib.crc32(word.encode()) % dim] += 1
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float16)
+
+
+class EmbeddingIndexTests(TestCase):
+
+    STORIES = [
+        ('Volcano erupts', 'Lava flows toward the coast.'),
+        ('Election results', 'Votes counted in the capital.'),
+        ('Volcano lava flows', 'Coast villages evacuated.'),
+        ('Marathon record', 'Runner breaks the world record.'),
+    ]
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix='nubuzz-test-embeddings-')
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        settings = self.settings(EMBEDDING_DIR=self.dir, EMBEDDING_TRAIN_MIN=10 ** 6, EMBEDDING_NLIST=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.ids = [self.article(n, title, description) for n, (title, description) in enumerate(self.STORIES)]
+
+    def article(self, n, title, description):
+        return Article.objects.create(url=f'https://example.com/story/{n}', title=title,
+                                      description=description, published_at=timezone.now()).id
+
+    def test_only_new_articles_are_appended(self):
+        self.assertEqual(embed_new_articles(embed=stub_embed), 4)
+        self.assertEqual(embed_new_articles(embed=stub_embed), 0)
+        self.ids.append(self.article(9, 'Glacier retreats', 'Ice melts faster.'))
+        self.assertEqual(embed_new_articles(embed=stub_embed), 1)
+        self.assertEqual(get_index().ids.tolist(), self.ids)
+
+    def test_readers_pick_up_appends_and_training(self):
+        embed_new_articles(embed=stub_embed, batch_size=2)
+        reader = EmbeddingIndex(self.dir).refresh()
+        self.assertEqual((reader.count, reader.centroids), (4, None))
+
+        self.ids.append(self.article(9, 'Volcano ash cloud', 'Flights over the coast grounded.'))
+        with self.settings(EMBEDDING_TRAIN_MIN=5):
+            embed_new_articles(embed=stub_embed)
+        reader.refresh()
+        self.assertEqual(reader.count, 5)
+        self.assertEqual(len(reader.centroids), 2)
+        self.assertEqual(sorted(np.concatenate(reader.lists).tolist()), list(range(5)))
+        self.assertEqual(reader.related(self.ids[0], 1)[0][0], self.ids[2])
+
+    def test_related_endpoint_returns_nearest_other_stories(self):
+        embed_new_articles(embed=stub_embed)
+        results = self.client.get(f'/nubuzz/api/news/{self.ids[0]}/related/', {'limit': 2}).json()['results']
+        self.assertEqual(results[0]['id'], self.ids[2])
+        self.assertNotIn(self.ids[0], [item['id'] for item in results])
+        self.assertGreater(results[0]['similarity'], results[1]['similarity'])
+
+    def test_retrain_drops_deleted_articles_from_the_lists(self):
+        embed_new_articles(embed=stub_embed)
+        Article.objects.filter(id=self.ids[2]).delete()
+        index = retrain_index()
+        self.assertEqual(sorted(np.concatenate(index.lists).tolist()), [0, 1, 3])
+        hits = EmbeddingIndex(self.dir).refresh().search(stub_embed(['Volcano lava flows'])[0], 4)
+        self.assertNotIn(self.ids[2], [pk for pk, _ in hits])
+
+
+class ThumbnailCacheTests(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix='nubuzz-test-thumbnails-')
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        settings = self.settings(THUMBNAIL_DIR=self.dir, THUMBNAIL_CACHE_LOW_WATER=0.5)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        thumbnails._usage = None
+        self.addCleanup(setattr, thumbnails, '_usage', None)
+
+    def cached(self, name, size, age):
+        path = thumbnails.thumbnail_path(name, 320)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        stamp = timezone.now().timestamp() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_evicts_least_recently_used_down_to_low_water(self):
+        oldest, older, recent = (self.cached(name, 400, age)
+                                 for name, age in (('aa01', 300), ('bb02', 200), ('cc03', 100)))
+        with self.settings(THUMBNAIL_CACHE_MAX_BYTES=1000):
+            self.assertEqual(thumbnails.evict(), 400)
+        self.assertEqual([os.path.exists(p) for p in (oldest, older, recent)], [False, False, True])
+
+    def test_under_cap_keeps_everything(self):
+        self.cached('aa01', 400, 100)
+        with self.settings(THUMBNAIL_CACHE_MAX_BYTES=1000):
+            self.assertEqual(thumbnails.evict(), 400)
+
+    def test_rendering_past_the_cap_evicts_older_images(self):
+        originals = tempfile.mkdtemp(prefix='nubuzz-test-originals-')
+        self.addCleanup(shutil.rmtree, originals, ignore_errors=True)
+        write_originals(originals, 3, (900, 600))
+
+        def renditions(source):
+            digest = thumbnails.source_digest(source)
+            return [thumbnails.thumbnail_path(digest, width) for width in [160, 320, 640]]
+
+        with stub_file_server(originals) as origin, self.settings(THUMBNAIL_WIDTHS=[160, 320, 640]):
+            sources = [f'{origin.url}/{i}.jpg' for i in range(3)]
+            thumbnails.get_thumbnail(sources[0], 320)
+            per_image = sum(os.path.getsize(path) for path in renditions(sources[0]))
+            an_hour_ago = timezone.now().timestamp() - 3600
+            for path in renditions(sources[0]):
+                os.utime(path, (an_hour_ago, an_hour_ago))
+
+            # Room for two images' renditions: the third pushes the least
+            # recently used one out, down to 90% of the cap.
+            with self.settings(THUMBNAIL_CACHE_MAX_BYTES=int(per_image * 2.5),
+                               THUMBNAIL_CACHE_LOW_WATER=0.9):
+                thumbnails.get_thumbnail(sources[1], 320)
+                thumbnails.get_thumbnail(sources[2], 320)
+            self.assertEqual(origin.requests, 3)
+
+        self.assertEqual([all(map(os.path.exists, renditions(s))) for s in sources], [False, True, True])
+        self.assertFalse(any(map(os.path.exists, renditions(sources[0]))))
+
+
+class IngestCategoryTests(TestCase):
+
+    def setUp(self):
+        self.published_at = timezone.now()
+
+    def test_story_keeps_its_first_category(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_articles([raw_article(1, self.published_at)], category='sports')
+        generation = current_generation()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = upsert_articles([raw_article(1, self.published_at)], category='general')
+        self.assertEqual(counts, {'created': 0, 'updated': 0, 'unchanged': 1})
+        self.assertEqual(Article.objects.get().category, 'sports')
+        self.assertEqual(current_generation(), generation)
+
+    def test_untagged_story_takes_a_category(self):
+        upsert_articles([raw_article(1, self.published_at)])
+        counts = upsert_articles([raw_article(1, self.published_at)], category='science')
+        self.assertEqual(counts['updated'], 1)
+        self.assertEqual(Article.objects.get().category, 'science')
+
+        changed = raw_article(1, self.published_at, title='Story number 1, updated')
+        upsert_articles([changed], category='health')
+        article = Article.objects.get()
+        self.assertEqual((article.title, article.category), ('Story number 1, updated', 'science'))
+
+
+class LiveBroadcastTests(TestCase):
+
+    def hub(self, interval=3600, overlap=30):
+        hub = Broadcaster(interval, overlap)
+        hub.last_id = hub.settled_id = 0
+        self.subscription = Subscription()
+        hub.subscribers.add(self.subscription)
+        return hub
+
+    def received(self):
+        ids = []
+        while not self.subscription.queue.empty():
+            ids.append(self.subscription.queue.get_nowait()[0])
+        return ids
+
+    async def article(self, pk):
+        await Article.objects.acreate(id=pk, url=f'https://example.com/story/{pk}',
+                                      title=f'Story {pk}', published_at=timezone.now())
+
+    async def test_row_committed_out_of_id_order_is_sent_once(self):
+        hub = self.hub()
+        await self.article(2)
+        await hub.poll()
+        # Id 1 was allocated first but its transaction committed later.
+        await self.article(1)
+        await hub.poll()
+        await hub.poll()
+        self.assertEqual(self.received(), [2, 1])
+        self.assertEqual(hub.last_id, 2)
+
+    async def test_rows_settle_after_the_overlap_window(self):
+        hub = self.hub(overlap=0)
+        await self.article(2)
+        await hub.poll()
+        await hub.poll()
+        self.assertEqual(hub.settled_id, 2)
+        await self.article(1)
+        await hub.poll()
+        self.assertEqual(self.received(), [2])
+
+    async def test_failed_poll_does_not_stop_broadcasting(self):
+        hub = self.hub(interval=0)
+        polls = []
+
+        async def poll():
+            polls.append(1)
+            if len(polls) == 1:
+                raise ConnectionError('server closed the connection')
+            if len(polls) == 3:
+                hub.unsubscribe(self.subscription)
+
+        hub.poll = poll
+        with self.assertLogs('nubuzz.live', 'ERROR'):
+            await hub.run()
+        self.assertEqual(len(polls), 3)
+
+    async def test_stopped_broadcaster_closes_streams(self):
+        hub = self.hub()
+        hub.task = asyncio.ensure_future(hub.run())
+        await asyncio.sleep(0)
+        hub.task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await hub.task
+        self.assertTrue(self.subscription.overflowed)
+        self.assertEqual(self.received(), [None])
+
+
+class SearchTests(TestCase):
+
+    def test_migrated_index_follows_ingest(self):
+        # 0018 rebuilds nubuzz_article on SQLite, which drops the FTS triggers.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'nubuzz_article_fts_%'")
+            self.assertEqual(len(cursor.fetchall()), 3)
+
+        upsert_articles([raw_article(1, title='Volcano erupts near the coast')])
+        response = self.client.get('/nubuzz/api/search/', {'q': 'volcano'})
+        self.assertEqual(response.status_code, 200)
+        [hit] = response.json()['results']
+        self.assertEqual(hit['url'], 'https://example.com/story/1')
+        self.assertIn('<mark>Volcano</mark>', hit['snippet'])
+
+    def test_title_match_outranks_body_match(self):
+        upsert_articles([
+            raw_article(1, content='A long report that mentions the volcano only in passing, near the end.'),
+            raw_article(2, title='Volcano erupts near the coast'),
+        ])
+        hits = search_articles('volcano', 10, fields=['id', 'url'])
+        self.assertEqual([hit['url'] for hit in hits],
+                         ['https://example.com/story/2', 'https://example.com/story/1'])
+
+    def test_last_term_is_prefix_matched(self):
+        upsert_articles([raw_article(1, title='Climate change talks stall')])
+        self.assertEqual(len(search_articles('climate chan', 10)), 1)
+        self.assertEqual(search_articles('clim change', 10), [])
+
+    def test_snippet_highlights_matched_terms(self):
+        upsert_articles([raw_article(1, title='Volcano erupts near the coast')])
+        [hit] = search_articles('erupt', 10)
+        self.assertIn('Volcano <mark>erupts</mark> near the coast', hit['snippet'])
+
+    def test_pages_through_ingested_results(self):
+        upsert_articles([raw_article(n, title=f'Volcano update {n}') for n in range(5)])
+        urls, url = [], '/nubuzz/api/search/?q=volcano&page_size=2'
+        while url:
+            body = self.client.get(url).json()
+            self.assertLessEqual(len(body['results']), 2)
+            urls += [hit['url'] for hit in body['results']]
+            url = body['next']
+        self.assertEqual(sorted(urls), [f'https://example.com/story/{n}' for n in range(5)])
+
+    def test_index_follows_updates_and_deletes(self):
+        upsert_articles([raw_article(1, title='Volcano erupts near the coast')])
+        upsert_articles([raw_article(1, title='Glacier retreats faster than expected')])
+        self.assertEqual(search_articles('volcano', 10), [])
+        self.assertEqual(len(search_articles('glacier', 10)), 1)
 
-# Create your tests here.
+        Article.objects.all().delete()
+        self.assertEqual(search_articles('glacier', 10), [])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM nubuzz_article_fts WHERE nubuzz_article_fts MATCH 'glacier'")
+            self.assertEqual(cursor.fetchone()[0], 0)
@@ -0,0 +1,227 @@
+# nubuzz/thumbnails.py
+#
+# Card-sized WebP renditions of publisher images (Article.url_to_image).
+#
+# The original is fetched once per source URL and every THUMBNAIL_WIDTHS
+# rendition is generated from it in one pass. Files are named after the
+# SHA-256 of the source URL:
+#
+#   THUMBNAIL_DIR/ab/abcdef…-320.webp
+#
+# The public URL carries a prefix of the same digest, so it changes
+# whenever the article's image does and can be cached as immutable.
+#
+# The directory is capped at THUMBNAIL_CACHE_MAX_BYTES. Hits refresh a
+# file's mtime, and once the cap is crossed the least recently used files
+# go first, down to THUMBNAIL_CACHE_LOW_WATER of the cap. Any number of
+# processes may share the directory: writes are atomic renames and the
+# eviction scan reads the disk rather than trusting in-process counters.
+
+import functools
+import hashlib
+import io
+import os
+import threading
+import time
+import weakref
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import get_script_prefix, reverse
+from PIL import Image, ImageOps
+
+from .metrics import upstream
+
+# Characters of the source digest carried in the public URL.
+URL_DIGEST_LENGTH = 16
+
+# A hit refreshes the file's mtime (its LRU position) at most this often.
+TOUCH_INTERVAL = 60
+
+_FAILED = 'thumb:failed:{}'
+
+
+class ThumbnailError(Exception):
+    """The original could not be fetched or decoded."""
+
+
+def failure_cache():
+    return caches[settings.THUMBNAIL_CACHE_ALIAS]
+
+
+def source_digest(source):
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+@functools.lru_cache
+def _url_prefix(script_prefix):
+    # Everything before /<article_id>/<digest>/<width>.webp. Resolved once:
+    # a reverse() per URL would dominate serializing a page of cards.
+    return reverse('thumbnail', args=(0, '0', 0)).rsplit('/', 3)[0]
+
+
+def thumbnail_urls(article_id, source):
+    """{width: URL} for an article's image, or None if it has none."""
+    if not source:
+        return None
+    digest = source_digest(source)[:URL_DIGEST_LENGTH]
+    prefix = settings.THUMBNAIL_BASE_URL + _url_prefix(get_script_prefix())
+    return {width: f'{prefix}/{article_id}/{digest}/{width}.webp' for width in settings.THUMBNAIL_WIDTHS}
+
+
+def thumbnail_path(digest, width):
+    return os.path.join(settings.THUMBNAIL_DIR, digest[:2], f'{digest}-{width}.webp')
+
+
+# Source digest → lock, so concurrent misses for one image share one fetch.
+_locks = weakref.WeakValueDictionary()
+_locks_lock = threading.Lock()
+
+
+def _lock_for(digest):
+    with _locks_lock:
+        lock = _locks.get(digest)
+        if lock is None:
+            lock = _locks[digest] = threading.Lock()
+        return lock
+
+
+def get_thumbnail(source, width):
+    """
+    WebP bytes of the `width` rendition of `source`, fetching and rendering
+    on first use. Raises ThumbnailError, remembered for
+    THUMBNAIL_FAILURE_TTL so a broken image is not refetched on every view.
+    """
+    digest = source_digest(source)
+    path = thumbnail_path(digest, width)
+    data = _read(path)
+    if data is not None:
+        return data
+    if failure_cache().get(_FAILED.format(digest)):
+        raise ThumbnailError(f'{source} failed recently')
+    with _lock_for(digest):
+        data = _read(path)
+        if data is not None:
+            return data
+        try:
+            renditions = render_thumbnails(fetch_original(source))
+        except ThumbnailError:
+            failure_cache().set(_FAILED.format(digest), True, settings.THUMBNAIL_FAILURE_TTL)
+            raise
+        written = sum(_write(thumbnail_path(digest, w), data) for w, data in renditions.items())
+    _account(written)
+    return renditions[width]
+
+
+def fetch_original(source):
+    """The original image's bytes, refusing anything over THUMBNAIL_MAX_SOURCE_BYTES."""
+    if not source.startswith(('http://', 'https://')):
+        raise ThumbnailError(f'Unsupported image URL {source!r}')
+    limit = settings.THUMBNAIL_MAX_SOURCE_BYTES
+    try:
+        with upstream('image'), \
+                requests.get(source, stream=True, timeout=settings.THUMBNAIL_FETCH_TIMEOUT) as resp:
+            resp.raise_for_status()
+            body = bytearray()
+            for chunk in resp.iter_content(64 * 1024):
+                body += chunk
+                if len(body) > limit:
+                    raise ThumbnailError(f'{source} is over {limit} bytes')
+    except requests.RequestException as e:
+        raise ThumbnailError(f'Fetching {source} failed: {e}') from e
+    return bytes(body)
+
+
+def render_thumbnails(data):
+    """{width: WebP bytes} for every THUMBNAIL_WIDTHS; never upscales."""
+    widths = sorted(settings.THUMBNAIL_WIDTHS, reverse=True)
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEGs decode straight at a reduced scale (still ≥ the largest width).
+        image.draft('RGB', (widths[0], widths[0]))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            transparent = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if transparent else 'RGB')
+        out = {}
+        # Largest first, each rendition resized from the previous one.
+        for width in widths:
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+            buf = io.BytesIO()
+            image.save(buf, 'WEBP', quality=settings.THUMBNAIL_QUALITY, method=4)
+            out[width] = buf.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ThumbnailError(f'Undecodable image: {e}') from e
+    return out
+
+
+def _read(path):
+    """The file's bytes, or None if it is not on disk; bumps its LRU position."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+            mtime = os.fstat(f.fileno()).st_mtime
+    except FileNotFoundError:
+        return None
+    now = time.time()
+    if now - mtime > TOUCH_INTERVAL:
+        try:
+            os.utime(path, (now, now))
+        except FileNotFoundError:   # evicted in between; we have the bytes anyway
+            pass
+    return data
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+# Bytes this process believes are on disk; None until the first scan.
+_usage = None
+_usage_lock = threading.Lock()
+
+
+def _account(written):
+    global _usage
+    with _usage_lock:
+        if _usage is not None:
+            _usage += written
+            if _usage <= settings.THUMBNAIL_CACHE_MAX_BYTES:
+                return
+        _usage = evict()
+
+
+def evict():
+    """Delete least recently used files until under the low-water mark; returns bytes kept."""
+    files = []
+    for shard in os.scandir(settings.THUMBNAIL_DIR):
+        if shard.is_dir():
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.webp'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    if total <= settings.THUMBNAIL_CACHE_MAX_BYTES:
+        return total
+    target = settings.THUMBNAIL_CACHE_MAX_BYTES * settings.THUMBNAIL_CACHE_LOW_WATER
+    files.sort()
+    for _, size, path in files:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
@@ -2,15 +2,24 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenRefreshView
+from .feedcache import cached_feed
 from .views import (
     fetch_news_view,
     summarize_article,
+    article_list,
+    live_news,
+    thumbnail_view,
     ArticleViewSet,
+    ArticleSearchView,
+    PersonalFeedView,
+    SummaryJobView,
     UserPreferenceUpdateAPIView,
 #login and register
     RegisterView,
     CustomAuthToken,
-    
+    CustomTokenObtainPairView,
+    LogoutView,
 )
 
 router = DefaultRouter()
@@ -19,9 +28,18 @@ router.register(r'news', ArticleViewSet, basename='news')
 urlpatterns = [
     path('fetch-news/', fetch_news_view, name='fetch_news'),
     path('summary/<int:article_id>/', summarize_article, name='summarize_article'),
+    path('api/news/', article_list, name='news-list'),
+    path('api/news/live/', live_news, name='news-live'),
+    path('img/<int:article_id>/<str:digest>/<int:width>.webp', thumbnail_view, name='thumbnail'),
+    path('api/search/', cached_feed(ArticleSearchView.as_view()), name='article_search'),
+    path('api/feed/', PersonalFeedView.as_view(), name='personal_feed'),
+    path('api/summaries/', SummaryJobView.as_view(), name='summary_jobs'),
     path('api/user/preferences/', UserPreferenceUpdateAPIView.as_view(), name='user-preferences'),
     path('api/', include(router.urls)),
     path('api/register/', RegisterView.as_view(), name='register'),
     path('api/login/', CustomAuthToken.as_view(), name='login'),
+    path('api/logout/', LogoutView.as_view(), name='logout'),
+    path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
 ]
@@ -1,13 +1,36 @@
 # nubuzz/views.py
 
-from django.http import JsonResponse
+import itertools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
 from django.views.decorators.http import require_GET
-from .models import Article, UserPreference
-import requests
-
-from rest_framework import viewsets, generics, permissions
-from django_filters.rest_framework import DjangoFilterBackend
-from .serializers import ArticleSerializer, UserPreferenceSerializer
+from .models import Article, FeedEntry, SummaryJob, UserPreference
+from .archive import find_article
+from .feedcache import DEGRADED_HEADER, cached_feed
+from .embeddings import get_index
+from .fetcher import refresh_category
+from .filters import ArticleFilter
+from .live import Subscription, live_events
+from .longpoll import summary_watcher
+from .metrics import stage
+from .newsapi import CATEGORIES
+from .pagination import FeedPagination, InvalidCursor, KeysetPagination
+from .personalize import rebuild_feed
+from .quota import upstream_denied
+from .search import search_articles
+from .summarizer import enqueue, job_statuses, too_short
+from .taxonomy import normalize_category
+from .thumbnails import ThumbnailError, get_thumbnail, source_digest, thumbnail_urls
+
+from rest_framework import mixins, viewsets, generics, permissions
+from rest_framework.decorators import action
+from .renderers import FastJSONRenderer, dumps
+from .serializers import ArticleDetailSerializer, ArticleSerializer, UserPreferenceSerializer
 from rest_framework import generics
 from django.contrib.auth.models import User
 from .serializers import RegisterSerializer
@@ -17,125 +40,422 @@ from rest_framework.permissions import AllowAny
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.serializers import AuthTokenSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.utils.urls import replace_query_param
+
+
+# Columns a feed card needs; content / sentiment stay in the DB.
+CARD_FIELDS = [
+    'id', 'source_id', 'source_name', 'author', 'title', 'description',
+    'url', 'url_to_image', 'published_at', 'category', 'location',
+    'summarize_article',
+]
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
 
-NEWS_API_KEY = '15866422dea04a8b85fc0ae163cdca13'
 
 @require_GET
-def fetch_news_view(request):
+@cached_feed
+async def fetch_news_view(request):
     """
-     GET /nubuzz/fetch-news/?category=... 
-    → Quickly fetch headlines, upsert into DB, and return JSON array.
-    Does NOT summarize here, so it returns in <1s.
+     GET /nubuzz/fetch-news/?category=...&location=...&cursor=...&page_size=...
+    → Serve the latest headlines straight from the DB as a JSON array,
+      filtered on the category / location recorded at ingest.
+    NewsAPI is polled off the request path by `manage.py ingest_news`; a
+    category that has never been ingested is fetched once on first read
+    (NEWS_FETCH_ON_MISS), with concurrent readers sharing that one fetch.
+    That fetch is rate limited per client and overall and spends from the
+    daily NewsAPI budget; when it is refused or fails, whatever the DB holds
+    is served with an `X-Nubuzz-Degraded` header and is not cached.
+    The next page's URL, if any, is in the `Link: <...>; rel="next"` header.
+    Cards carry no content body; fetch /api/news/<id>/ for the full article.
+    Responses are cached until the next ingest and support ETag /
+    Last-Modified revalidation.
     """
-    category = request.GET.get('category')
-    url = f'https://newsapi.org/v2/top-headlines?country=us&apiKey={NEWS_API_KEY}'
-    if category:
-        url += f'&category={category}'
-
+    paginator = KeysetPagination()
+    articles = ArticleFilter(request.GET, queryset=Article.objects.all()).qs.values(*CARD_FIELDS)
     try:
-        resp = requests.get(url, timeout=5)
-        data = resp.json()
-    except Exception as e:
-        return JsonResponse(
-            {'status': 'error', 'message': f'NewsAPI request failed: {e}'},
-            status=500
-        )
-
-    if data.get('status') != 'ok':
-        return JsonResponse(
-            {'status': 'error', 'message': data.get('message', 'Failed to fetch')},
-            status=500
-        )
-
-    # Persist articles without summarization
-    for raw in data.get('articles', []):
-        url = raw.get('url')
-        if not url:
-            continue
-
-        source = raw.get('source') or {}
-        source_id   = source.get('id')   or ''
-        source_name = source.get('name') or ''
-        title       = raw.get('title')       or ''
-        author      = raw.get('author')      or ''
-        desc        = raw.get('description') or ''
-        content     = raw.get('content')     or ''
-        combined    = f"{desc}\n\n{content}".strip()
-
-        Article.objects.update_or_create(
-            url=url,
-            defaults={
-                'source_id':        source_id,
-                'source_name':      source_name,
-                'title':            title,
-                'author':           author,
-                'description':      desc,
-                'content':          combined,
-                'url_to_image':     raw.get('urlToImage') or '',
-                'published_at':     raw.get('publishedAt'),
-                'location':         source_name or 'unknown',
-                'sentiment':        'neutral',
-                # leave summarize_article blank for now
+        page = await paginator.apaginate(articles, request)
+    except InvalidCursor:
+        return JsonResponse({'error': paginator.invalid_cursor_message}, status=400)
+    category = normalize_category(request.GET.get('category'))
+    degraded = None
+    if not page and category in CATEGORIES and settings.NEWS_FETCH_ON_MISS \
+            and not request.GET.get('location') and not request.GET.get(paginator.cursor_query_param):
+        degraded = await sync_to_async(upstream_denied)(request)
+        if degraded is None:
+            with stage('refresh'):
+                refreshed = await refresh_category(category)
+            if refreshed:
+                page = await paginator.apaginate(articles, request)
+            else:
+                degraded = 'upstream-error'
+
+    with stage('serialize'):
+        formatted = [
+            {
+                'id':          art['id'],
+                'source':      {'id': art['source_id'], 'name': art['source_name']},
+                'author':      art['author'] or None,
+                'title':       art['title'],
+                'description': art['description'] or None,
+                'url':         art['url'],
+                'urlToImage':  art['url_to_image'] or None,
+                'thumbnails':  thumbnail_urls(art['id'], art['url_to_image']),
+                'publishedAt': art['published_at'].isoformat(),
+                'category':    art['category'],
+                'location':    art['location'],
+                # full body lives at /api/news/<id>/
+                'summary':     art['summarize_article'] or '',
             }
-        )
-
-    # Return the latest 35 articles as JSON array
-    formatted = []
-    for art in Article.objects.all().order_by('-published_at')[:100]:
-        formatted.append({
-            'source':      {'id': art.source_id, 'name': art.source_name},
-            'author':      art.author or None,
-            'title':       art.title,
-            'description': art.description or None,
-            'url':         art.url,
-            'urlToImage':  art.url_to_image or None,
-            'publishedAt': art.published_at.isoformat(),
-            'content':     art.content or None,
-            # summary is empty until you call /summary/<id>/
-            'summary':     art.summarize_article or '',
-        })
-
-    return JsonResponse(formatted, safe=False)
+            for art in page
+        ]
+        body = dumps(formatted)
+    response = HttpResponse(body, content_type='application/json')
+    next_link = paginator.get_next_link()
+    if next_link:
+        response['Link'] = f'<{next_link}>; rel="next"'
+    if paginator.last_modified is not None:
+        response['Last-Modified'] = paginator.get_last_modified_header()
+    if degraded:
+        response[DEGRADED_HEADER] = degraded
+    return response
 
 
-# Lazy‐loaded summarizer for on-demand summaries only
-from transformers import pipeline
-def get_summarizer():
-    if not hasattr(get_summarizer, "pipe"):
-        get_summarizer.pipe = pipeline("summarization")
-    return get_summarizer.pipe
-
 @require_GET
-def summarize_article(request, article_id):
+async def summarize_article(request, article_id):
     """
-    GET /nubuzz/summary/<article_id>/
-    → Runs the summarization pipeline (heavy!) only on demand.
+    GET /nubuzz/summary/<article_id>/?wait=<seconds>
+    → Return the stored summary, or queue the article for the batch
+      summarizer (`manage.py summarize_worker`) and answer 202.
+      With ?wait=, hold the request open (up to SUMMARY_MAX_WAIT) until the
+      summary is ready instead of making the client poll.
     """
     try:
-        art = Article.objects.get(id=article_id)
+        art = await Article.objects.only('id', 'title', 'content', 'summarize_article').aget(id=article_id)
     except Article.DoesNotExist:
         return JsonResponse({'error': 'Article not found'}, status=404)
 
-    if not art.content or len(art.content.split()) < 10:
+    if art.summarize_article:
+        return JsonResponse({'title': art.title, 'summary': art.summarize_article})
+
+    if too_short(art.content):
         return JsonResponse({'error': 'Content too short'}, status=400)
 
-    summarizer = get_summarizer()
-    summary = summarizer(art.content, max_length=50, min_length=25, do_sample=False)[0]['summary_text']
-    art.summarize_article = summary
-    art.save(update_fields=['summarize_article'])
+    try:
+        wait = min(float(request.GET.get('wait', 0)), settings.SUMMARY_MAX_WAIT)
+    except ValueError:
+        return JsonResponse({'error': 'wait must be a number of seconds'}, status=400)
+
+    status = (await sync_to_async(enqueue)([art.id])).get(art.id)
+    # A job that finished since the article was read resolves on the
+    # watcher's next check, like any other.
+    if wait > 0 and status != SummaryJob.FAILED:
+        with stage('summary_wait'):
+            finished = await summary_watcher().wait(art.id, wait)
+        if finished and finished['status'] == SummaryJob.DONE:
+            return JsonResponse({'title': art.title, 'summary': finished['summary']})
+        if finished:
+            status = finished['status']
+    return JsonResponse({'title': art.title, 'status': status}, status=202)
+
+
+@require_GET
+@cached_feed
+async def article_list(request):
+    """
+    GET /nubuzz/api/news/?category=...&location=...&cursor=...&page_size=...
+    → {"next": ..., "results": [...]}: card fields fetched with .values()
+      through the async ORM and serialized via ArticleSerializer's fast
+      path, behind the shared feed cache.
+    ?format=ndjson (or Accept: application/x-ndjson) streams the whole
+    filtered feed instead; see `stream_articles`.
+    """
+    articles = ArticleFilter(request.GET, queryset=Article.objects.all()).qs
+    if wants_ndjson(request):
+        return stream_articles(request, articles)
+
+    paginator = KeysetPagination()
+    try:
+        rows = await paginator.apaginate(articles.values(*ArticleSerializer.Meta.fields), request)
+    except InvalidCursor:
+        return JsonResponse({'error': paginator.invalid_cursor_message}, status=400)
+    data = {'next': paginator.get_next_link(), 'results': ArticleSerializer(rows, many=True).data}
+    response = HttpResponse(dumps(data), content_type='application/json')
+    if paginator.last_modified is not None:
+        response['Last-Modified'] = paginator.get_last_modified_header()
+    return response
+
+
+def wants_ndjson(request):
+    if 'format' in request.GET:
+        return request.GET['format'] == 'ndjson'
+    return NDJSON_MEDIA_TYPE in request.headers.get('Accept', '')
+
+
+def stream_articles(request, queryset):
+    """
+    The whole filtered feed, newest first, one card per line. Rows come off
+    a server-side cursor NDJSON_CHUNK_SIZE at a time and are encoded a chunk
+    at a time, so memory stays flat however many rows match and the first
+    bytes go out before the query finishes. The body is an async generator
+    under ASGI and a plain one under WSGI, so neither server has to buffer
+    it to bridge the two.
+    """
+    chunk_size = settings.NDJSON_CHUNK_SIZE
+    rows = queryset.order_by('-published_at', '-id').values(*ArticleSerializer.Meta.fields)
+    serializer = ArticleSerializer(many=True)
+
+    def encode(chunk):
+        return b''.join(dumps(item) + b'\n' for item in serializer.to_representation(chunk))
+
+    def lines():
+        iterator = rows.iterator(chunk_size=chunk_size)
+        while chunk := list(itertools.islice(iterator, chunk_size)):
+            yield encode(chunk)
+
+    async def alines():
+        chunk = []
+        async for row in rows.aiterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield encode(chunk)
+                chunk = []
+        if chunk:
+            yield encode(chunk)
+
+    body = alines() if isinstance(request, ASGIRequest) else lines()
+    response = StreamingHttpResponse(body, content_type=NDJSON_MEDIA_TYPE)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+
+@require_GET
+async def live_news(request):
+    """
+    GET /nubuzz/api/news/live/?category=...&location=...
+    → text/event-stream of newly ingested stories matching the filters, one
+      `article` event (a card, id = article id) each. Reconnecting clients
+      send Last-Event-ID and are replayed what they missed first.
+    Served only under ASGI: a WSGI worker would be tied up for the whole
+    life of the connection.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Live updates need the ASGI server'}, status=501)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id', ''))
+    except ValueError:
+        last_event_id = None
+    subscription = Subscription(request.GET.get('category'), request.GET.get('location'))
+    response = StreamingHttpResponse(live_events(subscription, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'   # let nginx pass events straight through
+    return response
 
-    return JsonResponse({'title': art.title, 'summary': summary})
 
+@require_GET
+async def thumbnail_view(request, article_id, digest, width):
+    """
+    GET /nubuzz/img/<article_id>/<digest>/<width>.webp
+    → WebP rendition of the article's image at one of THUMBNAIL_WIDTHS, as
+      linked from the `thumbnails` of every card. The URL changes with the
+      image, so responses are cacheable for a year; a stale digest
+      redirects to the current one. 404 if the image can't be had.
+    """
+    if width not in settings.THUMBNAIL_WIDTHS:
+        raise Http404('Unsupported width')
+    source = await Article.objects.filter(pk=article_id).values_list('url_to_image', flat=True).afirst()
+    if not source:
+        raise Http404('No image')
+    if not source_digest(source).startswith(digest):
+        return HttpResponseRedirect(thumbnail_urls(article_id, source)[width])
+
+    etag = f'"{digest}-{width}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is None:
+        try:
+            # Off the thread-sensitive executor: fetching and resizing
+            # shouldn't queue behind (or hold up) other sync work.
+            data = await sync_to_async(get_thumbnail, thread_sensitive=False)(source, width)
+        except ThumbnailError:
+            response = HttpResponse(status=404)
+            response['Cache-Control'] = f'public, max-age={settings.THUMBNAIL_FAILURE_TTL}'
+            return response
+        response = HttpResponse(data, content_type='image/webp')
+    else:
+        response = not_modified
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 # ─── DRF ViewSets ───────────────────────────────────────────────────────────────
 
-class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset         = Article.objects.all().order_by('-published_at')
-    serializer_class = ArticleSerializer
-    filter_backends  = [DjangoFilterBackend]
-    filterset_fields = ['category', 'location']
+class ArticleViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Retrieve: the full article, copies of a story included, falling back to
+    the archive for articles past retention (marked `"archived": true`).
+    The list at /api/news/ is the async `article_list` view.
+    """
+    queryset         = Article.objects.all()
+    serializer_class = ArticleDetailSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def retrieve(self, request, pk=None):
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
+        return self.found(find_article(pk=pk))
+
+    @action(detail=False)
+    def lookup(self, request):
+        """
+        GET /nubuzz/api/news/lookup/?url=...
+        → The article stored under this URL, hot or archived.
+        """
+        url = request.query_params.get('url')
+        if not url:
+            return Response({'error': 'url is required'}, status=status.HTTP_400_BAD_REQUEST)
+        return self.found(find_article(url=url))
+
+    def found(self, article):
+        if article is None:
+            raise Http404
+        with stage('serialize'):
+            data = self.get_serializer(article).data
+        data['archived'] = article.archived
+        return Response(data)
+
+    @action(detail=True)
+    def related(self, request, pk=None):
+        """
+        GET /nubuzz/api/news/<id>/related/?limit=...
+        → Other stories closest to this one in embedding space, most similar
+          first, one card per story. Empty until `embed_articles` has
+          reached the article.
+        """
+        article = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', settings.RELATED_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.RELATED_MAX_SIZE))
+
+        # Over-fetch: copies of this story and of each other are dropped.
+        with stage('vector_search'):
+            hits = get_index().related(article.id, limit * 3) or []
+        rows = Article.objects.filter(id__in=[hit_id for hit_id, _ in hits]).values(*ArticleSerializer.Meta.fields)
+        by_id = {row['id']: row for row in rows}
+        seen = {article.duplicate_of_id or article.id}
+        results, similarities = [], []
+        for hit_id, similarity in hits:
+            row = by_id.get(hit_id)
+            if row is None or (row['duplicate_of'] or hit_id) in seen:
+                continue
+            seen.add(row['duplicate_of'] or hit_id)
+            results.append(row)
+            similarities.append(round(similarity, 4))
+            if len(results) == limit:
+                break
+        with stage('serialize'):
+            data = ArticleSerializer(results, many=True).data
+        for item, similarity in zip(data, similarities):
+            item['similarity'] = similarity
+        return Response({'results': data})
+
+
+class ArticleSearchView(APIView):
+    """
+    GET /nubuzz/api/search/?q=...&page=...&page_size=...
+    → Full-text search over title, description, content and summary,
+      BM25-ranked, prefix-matched, with highlighted snippets.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes   = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = int(request.query_params.get('page_size', settings.SEARCH_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        page_size = max(1, min(page_size, settings.SEARCH_MAX_PAGE_SIZE))
+
+        rows = search_articles(query, page_size + 1, (page - 1) * page_size,
+                               fields=ArticleSerializer.Meta.fields)
+        has_next, rows = len(rows) > page_size, rows[:page_size]
+
+        results = ArticleSerializer(rows, many=True).data
+        for item, row in zip(results, rows):
+            item['snippet'] = row['snippet']
+        next_link = None
+        if has_next:
+            next_link = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+        return Response({'next': next_link, 'results': results})
+
+
+class PersonalFeedView(APIView):
+    """
+    GET /nubuzz/api/feed/?cursor=...&page_size=...
+    → The authenticated user's feed: stories ranked by recency, boosted for
+      the categories and locations in their preferences. Served from the
+      user's materialized FeedEntry list (one indexed read per page), built
+      on first read and kept current by ingest.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes   = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def feed_rows(self, user):
+        article_fields = {f: F(f'article__{f}') for f in ArticleSerializer.Meta.fields if f != 'id'}
+        # By id: under stateless JWT auth request.user is a TokenUser.
+        return FeedEntry.objects.filter(user_id=user.id).values('score', 'article_id', **article_fields)
+
+    def get(self, request):
+        paginator = FeedPagination()
+        try:
+            rows = paginator.paginate(self.feed_rows(request.user), request)
+        except InvalidCursor:
+            return Response({'error': paginator.invalid_cursor_message}, status=status.HTTP_400_BAD_REQUEST)
+        if not rows and paginator.cursor_query_param not in request.query_params:
+            if rebuild_feed(request.user.id):
+                rows = paginator.paginate(self.feed_rows(request.user), request)
+
+        results = ArticleSerializer([{**row, 'id': row['article_id']} for row in rows], many=True).data
+        response = paginator.get_paginated_response(results)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class SummaryJobView(APIView):
+    """
+    POST /nubuzz/api/summaries/  {"article_ids": [1, 2, ...]}  → queue many at once
+    GET  /nubuzz/api/summaries/?ids=1,2,...                   → poll their status
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            ids = [int(i) for i in request.query_params.get('ids', '').split(',') if i]
+        except ValueError:
+            return Response({'error': 'ids must be comma-separated integers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(job_statuses(ids))
+
+    def post(self, request):
+        ids = request.data.get('article_ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return Response({'error': 'article_ids must be a list of integers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(enqueue(ids), status=status.HTTP_202_ACCEPTED)
 
 
 class UserPreferenceUpdateAPIView(generics.UpdateAPIView):
@@ -143,7 +463,7 @@ class UserPreferenceUpdateAPIView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        obj, _ = UserPreference.objects.get_or_create(user=self.request.user)
+        obj, _ = UserPreference.objects.get_or_create(user_id=self.request.user.id)
         return obj
  
 #register new user
@@ -185,14 +505,21 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     Custom Token Obtain Pair view to return user data along with tokens
     """
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        user = User.objects.get(username=request.data['username'])
-        response.data['user'] = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        }
-        return response
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+        # The serializer already loaded the user while authenticating.
+        user = serializer.user
+        return Response({
+            **serializer.validated_data,
+            'user': {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email
+            },
+        })
     
 #login 
 from django.contrib.auth import authenticate
@@ -237,5 +564,7 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        request.user.auth_token.delete()
+        # Also evicts the cached token (signals.forget_deleted_token). JWTs
+        # are stateless and simply expire.
+        Token.objects.filter(user_id=request.user.id).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,6 +1,7 @@
 // src/api.js
 
-const API_BASE            = "http://127.0.0.1:8000/nubuzz"
+export const API_ORIGIN   = "http://127.0.0.1:8000"
+const API_BASE            = `${API_ORIGIN}/nubuzz`
 const FETCH_NEWS_ENDPOINT = `${API_BASE}/fetch-news/`
 
 export const fetchNewsData = async ({ category, location } = {}) => {
@@ -3,6 +3,7 @@
 import { useState, useRef, useEffect } from "react"
 import { useTheme } from "../context/ThemeContext"
 import { Share2, Bookmark, ExternalLink, Clock, MessageCircle, ChevronRight, Heart } from "lucide-react"
+import { API_ORIGIN } from "../api"
 
 const NewsCard = ({ item }) => {
   const { darkMode } = useTheme()
@@ -25,6 +26,15 @@ const NewsCard = ({ item }) => {
   const [imageError, setImageError] = useState(false)
   const hasValidImage = imageUrl && !imageError
 
+  // Resized WebP copies from the backend's image proxy ({width: url});
+  // fall back to the publisher's original if they fail to load
+  const [thumbnailError, setThumbnailError] = useState(false)
+  const thumbnails = !thumbnailError && item.thumbnails ? Object.entries(item.thumbnails) : null
+  const thumbnailSrcSet = thumbnails
+    ? thumbnails.map(([width, src]) => `${new URL(src, API_ORIGIN)} ${width}w`).join(", ")
+    : undefined
+  const thumbnailSrc = thumbnails ? new URL(thumbnails[thumbnails.length - 1][1], API_ORIGIN).toString() : null
+
   // Animation on scroll
   useEffect(() => {
     const observer = new IntersectionObserver(
@@ -228,14 +238,18 @@ const NewsCard = ({ item }) => {
             <div className="mt-4 px-5 overflow-hidden">
               <div className="rounded-lg overflow-hidden relative">
                 <img
-                  src={imageUrl || "/placeholder.svg"}
+                  src={thumbnailSrc || imageUrl || "/placeholder.svg"}
+                  srcSet={thumbnailSrcSet}
+                  sizes="(max-width: 640px) 100vw, 400px"
+                  loading="lazy"
+                  decoding="async"
                   alt={title}
                   className={`
                     w-full object-cover transition-transform duration-700
                     ${isHovered ? "scale-105" : "scale-100"}
                   `}
                   style={{ maxHeight: "300px" }}
-                  onError={() => setImageError(true)}
+                  onError={() => (thumbnails ? setThumbnailError(true) : setImageError(true))}
                 />
                 {/* Overlay gradient on hover */}
                 <div